@@ -0,0 +1,105 @@
+"""
+Cold import cost of each deployed function, split into what an instance
+pays at startup (importing main.py with FUNCTION_TARGET set) and what the
+first invocation pays (importing the function's handler module). Each
+function is measured in a fresh interpreter with `-X importtime`, and the
+slowest top-level packages are listed.
+
+Run from the functions directory:
+    python -m benchmarks.bench_imports [--top 8] [--output imports.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from main import FUNCTION_MODULES
+
+# Printed by the child between the startup and first-invocation imports
+_MARKER = "--first-invocation--"
+
+_CHILD = """
+import importlib, sys, time
+start = time.perf_counter()
+import main
+startup = time.perf_counter() - start
+print({marker!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+fxn = importlib.import_module({fxn_module!r})
+importlib.import_module(fxn._HANDLER_MODULE)
+print(startup * 1000, (time.perf_counter() - start) * 1000)
+"""
+
+
+def _package_times(lines: List[str]) -> Dict[str, float]:
+    """
+    Sums `-X importtime` self times by top-level package, in milliseconds.
+    """
+    totals: Dict[str, float] = defaultdict(float)
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return dict(totals)
+
+
+def _top(totals: Dict[str, float], count: int) -> Dict[str, float]:
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return {name: round(ms, 1) for name, ms in ranked[:count]}
+
+
+def measure(function_name: str, top: int) -> Dict[str, Any]:
+    env = dict(os.environ, FUNCTION_TARGET=function_name, LOG_LEVEL="WARNING")
+    code = _CHILD.format(marker=_MARKER, fxn_module=FUNCTION_MODULES[function_name])
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    stderr = completed.stderr.splitlines()
+    split = stderr.index(_MARKER)
+    startup_ms, first_invocation_ms = map(float, completed.stdout.split()[-2:])
+
+    return {
+        "startup_ms": startup_ms,
+        "first_invocation_ms": first_invocation_ms,
+        "startup_packages": _top(_package_times(stderr[:split]), top),
+        "first_invocation_packages": _top(_package_times(stderr[split + 1 :]), top),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {name: measure(name, args.top) for name in FUNCTION_MODULES}
+
+    for name, result in results.items():
+        print(
+            f"\n{name}: startup {result['startup_ms']:.0f} ms,"
+            f" first invocation {result['first_invocation_ms']:.0f} ms"
+        )
+        for phase in ("startup_packages", "first_invocation_packages"):
+            packages = ", ".join(
+                f"{package} {ms:.0f}" for package, ms in result[phase].items()
+            )
+            print(f"  {phase:<26} {packages}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark for the slotted models against equivalent dict-backed
+classes, at contact-sync scale.
+
+Run from the functions directory:
+    python -m benchmarks.bench_models [user_count]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from src.core.models.user_model import UserModel
+from src.core.utils.phone_normalizer import match_keys
+
+
+class _DictPhone:
+    """Phone with the same fields, stored in a per-instance __dict__"""
+
+    def __init__(self, iso_code, dial_code, phone_number):
+        self.iso_code = iso_code
+        self.dial_code = dial_code
+        self.phone_number = phone_number
+        self.normalized, self.full_key, self.suffix_key = match_keys(
+            phone_number, dial_code
+        )
+
+    @staticmethod
+    def from_map(data):
+        return _DictPhone(
+            iso_code=data.get("isoCode", ""),
+            dial_code=data.get("dialCode", ""),
+            phone_number=data.get("phoneNumber", ""),
+        )
+
+
+class _DictUserModel:
+    """UserModel with the same fields, stored in a per-instance __dict__"""
+
+    def __init__(self, id, phone, photo, tokens):
+        self.id = id
+        self.phone = phone
+        self.photo = photo
+        self.tokens = tokens
+
+    @staticmethod
+    def from_map(data):
+        return _DictUserModel(
+            id=data.get("id", ""),
+            phone=_DictPhone.from_map(data.get("phone", {})),
+            photo=data.get("photo", ""),
+            tokens=data.get("tokens", []),
+        )
+
+
+def generate_user_maps(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"user{index:08d}",
+            "phone": {
+                "isoCode": "KE",
+                "dialCode": "+254",
+                "phoneNumber": f"+2547{rng.randrange(10**8):08d}",
+            },
+            "photo": f"https://example.com/photos/{index}.jpg",
+            "tokens": [],
+        }
+        for index in range(count)
+    ]
+
+
+def measure(from_map, user_maps):
+    """
+    Returns (seconds, peak bytes) to build one model per user map.
+    """
+    match_keys.cache_clear()
+    start = time.perf_counter()
+    models = [from_map(data) for data in user_maps]
+    seconds = time.perf_counter() - start
+
+    match_keys.cache_clear()
+    tracemalloc.start()
+    models = [from_map(data) for data in user_maps]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del models
+    return seconds, peak
+
+
+def main(user_count=100_000):
+    user_maps = generate_user_maps(user_count)
+
+    results = {
+        "dict-backed": measure(_DictUserModel.from_map, user_maps),
+        "slotted": measure(UserModel.from_map, user_maps),
+    }
+
+    print(f"Building {user_count} users with phones")
+    for name, (seconds, peak) in results.items():
+        print(f"  {name:<12} {seconds * 1000:9.1f} ms  {peak / 2**20:8.1f} MiB peak")
+
+    baseline_seconds, baseline_peak = results["dict-backed"]
+    seconds, peak = results["slotted"]
+    print(
+        f"  slotted saves {100 * (1 - peak / baseline_peak):.0f}% memory"
+        f" and {100 * (1 - seconds / baseline_seconds):.0f}% time"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,142 @@
+"""
+Synthetic users and address books for the benchmarks.
+
+Numbers are written the way they reach the server: E.164 with or without
+"+", national with a trunk "0", and with spaces or dashes. A share of users
+in other countries reuse the last 7 digits of Kenyan users, so suffix
+collisions are exercised too.
+"""
+
+import random
+from typing import Any, Dict, List
+
+# (iso code, dial code, national number length)
+COUNTRIES = [
+    ("KE", "+254", 9),
+    ("UG", "+256", 9),
+    ("TZ", "+255", 9),
+    ("NG", "+234", 10),
+    ("US", "+1", 10),
+]
+
+# Fraction of users whose last 7 digits collide with another user's
+COLLISION_RATE = 0.02
+
+# Fraction of address-book entries that belong to a registered user
+REGISTERED_RATE = 0.3
+
+
+def _national_number(rng: random.Random, length: int) -> str:
+    return str(rng.randrange(1, 10)) + "".join(
+        str(rng.randrange(10)) for _ in range(length - 1)
+    )
+
+
+def _format_number(rng: random.Random, dial_code: str, national: str) -> str:
+    """
+    Writes a number in one of the formats clients send.
+    """
+    country = dial_code.lstrip("+")
+    style = rng.randrange(5)
+    if style == 0:
+        return f"+{country}{national}"
+    if style == 1:
+        return f"0{national}"
+    if style == 2:
+        return f"{country}{national}"
+    if style == 3:
+        return f"+{country} {national[:3]} {national[3:6]} {national[6:]}"
+    return f"0{national[:3]}-{national[3:6]}-{national[6:]}"
+
+
+def generate_users(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Returns user documents as stored in the users collection.
+    """
+    rng = random.Random(seed)
+    users = []
+    for index in range(count):
+        iso_code, dial_code, length = rng.choice(COUNTRIES)
+        national = _national_number(rng, length)
+
+        if users and rng.random() < COLLISION_RATE:
+            # Reuse another user's last 7 digits in a different country
+            other = rng.choice(users)["phone"]["phoneNumber"]
+            national = national[:-7] + other[-7:]
+
+        users.append(
+            {
+                "id": f"user{index:08d}",
+                "phone": {
+                    "isoCode": iso_code,
+                    "dialCode": dial_code,
+                    "phoneNumber": f"{dial_code}{national}",
+                },
+                "photo": f"https://example.com/photos/{index}.jpg",
+                "tokens": [f"token-{index}-{device}" for device in range(rng.randrange(1, 4))],
+            }
+        )
+    return users
+
+
+def generate_address_book(
+    users: List[Dict[str, Any]], count: int, seed: int = 11
+) -> List[Dict[str, Any]]:
+    """
+    Returns contact maps as the app sends them: some registered users in
+    assorted formats, the rest unknown numbers.
+    """
+    rng = random.Random(seed)
+    contacts = []
+    for index in range(count):
+        if users and rng.random() < REGISTERED_RATE:
+            phone = rng.choice(users)["phone"]
+            dial_code = phone["dialCode"]
+            national = phone["phoneNumber"][len(dial_code) :]
+        else:
+            _, dial_code, length = rng.choice(COUNTRIES)
+            national = _national_number(rng, length)
+
+        phone_numbers = [
+            {
+                "isoCode": "",
+                "dialCode": "",
+                "phoneNumber": _format_number(rng, dial_code, national),
+            }
+        ]
+        if rng.random() < 0.2:
+            _, other_dial_code, length = rng.choice(COUNTRIES)
+            phone_numbers.append(
+                {
+                    "isoCode": "",
+                    "dialCode": "",
+                    "phoneNumber": _format_number(
+                        rng, other_dial_code, _national_number(rng, length)
+                    ),
+                }
+            )
+
+        contacts.append(
+            {
+                "name": f"Contact {index}",
+                "phoneNumbers": phone_numbers,
+                "id": None,
+                "photo": None,
+            }
+        )
+    return contacts
+
+
+def generate_text_message(sender: str, receiver: str, index: int) -> Dict[str, Any]:
+    """
+    Returns a freshly written sender copy of a text message.
+    """
+    return {
+        "text": f"Message number {index}",
+        "id": f"message{index:08d}",
+        "sender": sender,
+        "receiver": receiver,
+        "status": "none",
+        "timeSent": None,
+        "type": "text",
+    }
@@ -0,0 +1,378 @@
+"""
+Offline benchmark suite for contact matching and message processing.
+
+Generates synthetic users and address books at each scale, loads them into
+the fake backend and measures matching time and memory, model
+(de)serialization, per-message trigger latency, and FCM calls for message
+bursts with and without notification coalescing. Results are printed as
+a table and can be written as JSON to compare runs.
+
+Run from the functions directory:
+    python -m benchmarks.run_benchmarks [--scales 1000 10000 100000] [--latency 0.01]
+        [--output results.json]
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.datasets import (
+    generate_address_book,
+    generate_text_message,
+    generate_users,
+)
+from src.contact.models.contact_model import ContactModel
+from src.contact.services import get_registered_contacts as registered_contacts
+from src.contact.services.phone_keys import build_phone_keys
+from src.contact.services.phone_matcher import PhoneMatcher
+from src.contact.services.registered_snapshot import (
+    RegisteredSnapshot,
+    write_phone_snapshot,
+)
+from src.contact.services.user_directory import UserDirectory
+from src.core.models.user_model import UserModel
+from src.core.utils.phone_normalizer import match_keys, normalize_phone_number
+from src.message.services import notification_queue
+from src.message.services.notification_scheduler import (
+    LocalTimerScheduler,
+    set_scheduler,
+)
+from src.message.services.process_message_created import process_message_created
+from src.message.services.processed_messages import _recent as recent_messages
+from src.message.services.token_cache import _cache as token_cache
+from tests.fakes.fake_backend import FakeBackend, install_fake_backend
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+DEFAULT_ADDRESS_BOOK_SIZE = 1_000
+DEFAULT_MESSAGE_COUNT = 200
+DEFAULT_BURST_COUNT = 20
+DEFAULT_BURST_SIZE = 10
+
+# Coalescing window used for the burst benchmark
+BURST_WINDOW_SECONDS = 0.05
+
+
+def _clear_caches() -> None:
+    match_keys.cache_clear()
+    normalize_phone_number.cache_clear()
+    token_cache.clear()
+
+
+def _timed(fn: Callable[[], Any]):
+    """
+    Returns (result, milliseconds) for a single call.
+    """
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _peak_memory(fn: Callable[[], Any]) -> float:
+    """
+    Returns the peak traced allocation of a call, in MiB.
+    """
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak / 2**20
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_ms": ordered[-1],
+    }
+
+
+def _load_users(backend: FakeBackend, user_maps: List[Dict[str, Any]]) -> None:
+    for data in user_maps:
+        document = dict(data)
+        document.update(build_phone_keys(UserModel.from_map(data).phone))
+        backend.firestore.put(f"users/{data['id']}", document)
+
+
+def bench_serialization(user_maps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    _clear_caches()
+    users, from_map_ms = _timed(
+        lambda: [UserModel.from_map(data) for data in user_maps]
+    )
+    _, to_map_ms = _timed(lambda: [user.to_map() for user in users])
+
+    _clear_caches()
+    from_map_mib = _peak_memory(
+        lambda: [UserModel.from_map(data) for data in user_maps]
+    )
+
+    return {
+        "user_from_map_ms": from_map_ms,
+        "user_to_map_ms": to_map_ms,
+        "user_from_map_peak_mib": from_map_mib,
+    }
+
+
+def bench_matching(
+    backend: FakeBackend,
+    user_maps: List[Dict[str, Any]],
+    contact_maps: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    users = [UserModel.from_map(data) for data in user_maps]
+    contacts, parse_ms = _timed(
+        lambda: [ContactModel.from_map(data) for data in contact_maps]
+    )
+
+    matcher, build_ms = _timed(lambda: PhoneMatcher(users))
+    build_mib = _peak_memory(lambda: PhoneMatcher(users))
+
+    def match_all():
+        return sum(
+            1
+            for contact in contacts
+            if any(matcher.match(phone) is not None for phone in contact.phone_numbers)
+        )
+
+    matched, match_ms = _timed(match_all)
+
+    # Query path: no snapshot or user directory, candidates fetched with `in`
+    # queries. The bucket has no snapshot yet.
+    registered_contacts.registered_snapshot = RegisteredSnapshot()
+    registered_contacts.user_directory = UserDirectory(max_users=0)
+    registered_contacts.user_directory.get_matcher()
+    registered_contacts.user_directory.wait_until_loaded()
+    backend.counter.reset()
+    query_matches, query_ms = _timed(
+        lambda: registered_contacts.find_registered_contacts(contacts)
+    )
+    query_counts = backend.counter.reset()
+
+    # The same candidate queries sent one at a time, as before the async path
+    _, sequential_query_ms = _timed(
+        lambda: registered_contacts.query_candidate_users(contacts)
+    )
+
+    # Directory path: warm instance serving every lookup from memory
+    directory = UserDirectory()
+    registered_contacts.user_directory = directory
+    directory.get_matcher()
+    _, directory_load_ms = _timed(directory.wait_until_loaded)
+    directory_matches, directory_ms = _timed(
+        lambda: registered_contacts.find_registered_contacts(contacts)
+    )
+    directory.close()
+
+    # Snapshot path: a cold instance downloading and mapping the snapshot
+    _, snapshot_write_ms = _timed(write_phone_snapshot)
+    snapshot = RegisteredSnapshot()
+    registered_contacts.registered_snapshot = snapshot
+    backend.counter.reset()
+    _, snapshot_load_ms = _timed(snapshot.get_matcher)
+    snapshot_matches, snapshot_ms = _timed(
+        lambda: registered_contacts.find_registered_contacts(contacts)
+    )
+    snapshot_counts = backend.counter.reset()
+
+    return {
+        "contacts": len(contacts),
+        "contact_from_map_ms": parse_ms,
+        "matcher_build_ms": build_ms,
+        "matcher_build_peak_mib": build_mib,
+        "matcher_match_ms": match_ms,
+        "matched_contacts": matched,
+        "query_path_ms": query_ms,
+        "query_path_matches": len(query_matches),
+        "query_path_queries": query_counts.get("queries", 0),
+        "query_path_reads": query_counts.get("reads", 0),
+        "sequential_query_ms": sequential_query_ms,
+        "directory_load_ms": directory_load_ms,
+        "directory_path_ms": directory_ms,
+        "directory_path_matches": len(directory_matches),
+        "snapshot_write_ms": snapshot_write_ms,
+        "snapshot_load_ms": snapshot_load_ms,
+        "snapshot_path_ms": snapshot_ms,
+        "snapshot_path_matches": len(snapshot_matches),
+        "snapshot_path_reads": snapshot_counts.get("reads", 0),
+        "snapshot_bytes": snapshot_counts.get("storage_bytes_downloaded", 0),
+    }
+
+
+def bench_trigger(
+    backend: FakeBackend, user_maps: List[Dict[str, Any]], message_count: int
+) -> Dict[str, Any]:
+    token_cache.clear()
+    recent_messages.clear()
+
+    samples = []
+    reads = []
+    writes = []
+    for index in range(message_count):
+        sender = user_maps[index % len(user_maps)]["id"]
+        receiver = user_maps[(index * 7 + 1) % len(user_maps)]["id"]
+        data = generate_text_message(sender, receiver, index)
+        params = {"user_id": sender, "chat_id": receiver, "message_id": data["id"]}
+
+        # The trigger fires after the sender's copy exists
+        backend.firestore.put(
+            f"users/{sender}/chats/{receiver}/messages/{data['id']}", data
+        )
+
+        backend.counter.reset()
+        _, elapsed = _timed(lambda: process_message_created(params, dict(data)))
+        counts = backend.counter.reset()
+        samples.append(elapsed)
+        reads.append(counts.get("reads", 0))
+        writes.append(counts.get("writes", 0))
+
+    result = {
+        "messages": message_count,
+        "notifications_sent": len(backend.messaging.sent),
+        "reads_per_message": statistics.fmean(reads),
+        "writes_per_message": statistics.fmean(writes),
+    }
+    result.update(_percentiles(samples))
+    return result
+
+
+def _send_bursts(
+    backend: FakeBackend,
+    user_maps: List[Dict[str, Any]],
+    burst_count: int,
+    burst_size: int,
+) -> Dict[str, int]:
+    token_cache.clear()
+    recent_messages.clear()
+    backend.firestore.clear("processedMessages")
+    backend.counter.reset()
+    for burst in range(burst_count):
+        sender = user_maps[burst % len(user_maps)]["id"]
+        receiver = user_maps[(burst * 7 + 1) % len(user_maps)]["id"]
+        for index in range(burst_size):
+            data = generate_text_message(sender, receiver, burst * burst_size + index)
+            data["id"] = f"burst{burst:04d}-{index:04d}"
+            backend.firestore.put(
+                f"users/{sender}/chats/{receiver}/messages/{data['id']}", data
+            )
+            process_message_created(
+                {"user_id": sender, "chat_id": receiver, "message_id": data["id"]},
+                data,
+            )
+    return backend.counter.snapshot()
+
+
+def bench_bursts(
+    backend: FakeBackend,
+    user_maps: List[Dict[str, Any]],
+    burst_count: int,
+    burst_size: int,
+) -> Dict[str, Any]:
+    """
+    Sends bursts of messages from one sender to one receiver, first with a
+    notification per message, then coalesced per burst.
+    """
+    direct = _send_bursts(backend, user_maps, burst_count, burst_size)
+
+    scheduler = LocalTimerScheduler()
+    set_scheduler(scheduler)
+    notification_queue.COALESCE_WINDOW_SECONDS = BURST_WINDOW_SECONDS
+    try:
+        _send_bursts(backend, user_maps, burst_count, burst_size)
+        while scheduler.pending():
+            time.sleep(BURST_WINDOW_SECONDS)
+        coalesced = backend.counter.snapshot()
+    finally:
+        notification_queue.COALESCE_WINDOW_SECONDS = 0
+        set_scheduler(None)
+
+    result = {"messages": burst_count * burst_size}
+    for mode, counts in (("direct", direct), ("coalesced", coalesced)):
+        for name in ("fcm_sends", "fcm_messages", "reads", "writes"):
+            result[f"{mode}_{name}"] = counts.get(name, 0)
+    return result
+
+
+def run_scale(
+    scale: int, address_book_size: int, message_count: int, latency: float
+) -> Dict[str, Any]:
+    user_maps = generate_users(scale)
+    contact_maps = generate_address_book(user_maps, address_book_size)
+
+    backend = install_fake_backend(latency=latency)
+    _load_users(backend, user_maps)
+
+    try:
+        return {
+            "users": scale,
+            "serialization": bench_serialization(user_maps),
+            "matching": bench_matching(backend, user_maps, contact_maps),
+            "trigger": bench_trigger(backend, user_maps, message_count),
+            "bursts": bench_bursts(
+                backend, user_maps, DEFAULT_BURST_COUNT, DEFAULT_BURST_SIZE
+            ),
+        }
+    finally:
+        backend.uninstall()
+
+
+def _print_table(results: List[Dict[str, Any]]) -> None:
+    for result in results:
+        print(f"\n{result['users']} users")
+        for section in ("serialization", "matching", "trigger", "bursts"):
+            print(f"  {section}")
+            for name, value in result[section].items():
+                rendered = f"{value:.2f}" if isinstance(value, float) else str(value)
+                print(f"    {name:<26} {rendered:>12}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--contacts", type=int, default=DEFAULT_ADDRESS_BOOK_SIZE)
+    parser.add_argument("--messages", type=int, default=DEFAULT_MESSAGE_COUNT)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per Firestore or FCM call",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    # Per-call logs would dominate the timings; errors still show up
+    logging.getLogger("tubonge").setLevel(logging.ERROR)
+
+    results = [
+        run_scale(scale, args.contacts, args.messages, args.latency)
+        for scale in args.scales
+    ]
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "contacts": args.contacts,
+            "messages": args.messages,
+            "latency": args.latency,
+        },
+        "results": results,
+    }
+
+    _print_table(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,34 @@
+import os
 from firebase_admin import initialize_app
 
 # Initialize Firebase app first
 initialize_app()
 
-print("Firebase Functions initialized")
+from src.core.utils.import_timing import timed_import
+from src.core.utils.logger import get_logger
 
-# Import functions at module level but don't execute them
-# This allows Firebase Functions to discover and register them
-from src.contact.functions.request_registered_contacts_fxn import (
-    request_registered_contacts,
-)
-from src.message.functions.on_message_created_fxn import on_message_created
+get_logger(__name__).info("Firebase Functions initialized")
+
+# Module defining each deployed function. Each module only imports its
+# trigger decorator; handlers load their dependencies on first invocation.
+FUNCTION_MODULES = {
+    "request_registered_contacts": "src.contact.functions.request_registered_contacts_fxn",
+    "on_user_written": "src.contact.functions.on_user_written_fxn",
+    "on_message_created": "src.message.functions.on_message_created_fxn",
+    "flush_notifications": "src.message.functions.flush_notifications_fxn",
+    "update_message_receipts": "src.message.functions.update_message_receipts_fxn",
+    "get_message_history": "src.message.functions.get_message_history_fxn",
+    "write_phone_snapshot": "src.contact.functions.write_phone_snapshot_fxn",
+}
+
+# The runtime sets FUNCTION_TARGET to the one function an instance serves,
+# so only that function is imported. Deploy-time discovery and the emulator
+# leave it unset and get every function.
+_target = os.environ.get("FUNCTION_TARGET")
+_names = [_target] if _target in FUNCTION_MODULES else list(FUNCTION_MODULES)
+
+for _name in _names:
+    globals()[_name] = getattr(timed_import(FUNCTION_MODULES[_name]), _name)
 
 # Export the functions explicitly
-__all__ = ["request_registered_contacts", "on_message_created"]
+__all__ = _names
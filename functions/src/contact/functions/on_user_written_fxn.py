@@ -0,0 +1,25 @@
+from firebase_functions.firestore_fn import (
+    on_document_written,
+    Event,
+    Change,
+    DocumentSnapshot,
+)
+from src.core.utils.import_timing import timed_import
+
+# Loaded on the first event, so a cold start only pays for the decorator
+_HANDLER_MODULE = "src.contact.services.process_user_written"
+
+
+@on_document_written(document="users/{user_id}")
+def on_user_written(event: Event[Change[DocumentSnapshot]]) -> None:
+    """
+    Keeps the denormalized phone key fields on user documents in sync with
+    the user's phone number, and records registered or unregistered phone
+    suffixes for delta contact syncs.
+    """
+    handler = timed_import(_HANDLER_MODULE)
+    handler.process_user_written(
+        user_id=event.params.get("user_id"),
+        before_snapshot=event.data.before,
+        after_snapshot=event.data.after,
+    )
@@ -0,0 +1,19 @@
+from firebase_functions import scheduler_fn
+from firebase_functions.options import MemoryOption
+from src.core.utils.import_timing import timed_import
+
+# Loaded on the first run, so a cold start only pays for the decorator
+_HANDLER_MODULE = "src.contact.services.registered_snapshot"
+
+
+# Every user is read and held in memory while the snapshot is built
+@scheduler_fn.on_schedule(
+    schedule="every 6 hours", memory=MemoryOption.GB_1, timeout_sec=540
+)
+def write_phone_snapshot(event: scheduler_fn.ScheduledEvent) -> None:
+    """
+    Uploads a compact snapshot of every registered phone number, which
+    contact syncs memory-map instead of querying Firestore.
+    """
+    handler = timed_import(_HANDLER_MODULE)
+    handler.write_phone_snapshot()
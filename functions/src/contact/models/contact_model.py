@@ -4,6 +4,8 @@ from src.core.models.phone_model import Phone
 
 
 class ContactModel:
+    __slots__ = ("name", "phone_numbers", "id", "photo")
+
     def __init__(
         self,
         name: str,
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from google.api_core.exceptions import FailedPrecondition
+from src.contact.models.contact_model import ContactModel
+from src.core.models.phone_model import Phone
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads, record_writes
+from src.contact.services.get_registered_contacts import find_registered_contacts
+from src.contact.services.phone_keys import PHONE_SUFFIX_FIELD, phone_suffix
+from src.contact.services.phone_registry import (
+    REGISTRY_RETENTION,
+    stream_registry_changes,
+    suffix_hash,
+)
+
+logger = get_logger(__name__)
+
+# Per-client sync state, keyed by the id embedded in the sync token. States
+# expire through a Firestore TTL policy on `expireAt`, set to when the
+# registry entries a delta would need start expiring
+CONTACT_SYNC_STATES = "contactSyncStates"
+
+# Registry entries carry server timestamps, so each sync rereads a short
+# overlap to cover clock skew; applying an entry twice is a no-op
+SYNC_CLOCK_MARGIN = timedelta(minutes=1)
+
+# Registry entries a delta reads at most. Each delta reads every sign-up and
+# phone change since its token, matched against the address book in memory,
+# so a token with more changes behind it is sent back for a full sync,
+# which costs about as much.
+MAX_DELTA_CHANGES = 5_000
+
+
+class SyncTokenError(Exception):
+    """
+    Raised when a sync token is unknown, stale or expired. The client has to
+    run a full sync to get a new one.
+    """
+
+
+class SyncResult:
+    def __init__(
+        self,
+        registered: List[ContactModel],
+        unregistered: List[ContactModel],
+        sync_token: str,
+    ):
+        self.registered = registered
+        self.unregistered = unregistered
+        self.sync_token = sync_token
+
+
+def _contact_keys(contact: ContactModel) -> List[str]:
+    keys = []
+    for phone in contact.phone_numbers:
+        suffix = phone_suffix(phone)
+        if suffix is not None:
+            keys.append(suffix_hash(suffix))
+    return keys
+
+
+def _encode_token(state_id: str, version: int) -> str:
+    return f"{state_id}.{version}"
+
+
+def _decode_token(sync_token: str) -> Tuple[str, int]:
+    try:
+        state_id, version = sync_token.rsplit(".", 1)
+        return state_id, int(version)
+    except (AttributeError, ValueError) as e:
+        raise SyncTokenError(f"Malformed sync token: {sync_token}") from e
+
+
+def _record_matches(
+    suffixes: Dict[str, str],
+    contacts: List[ContactModel],
+    registered: List[ContactModel],
+) -> None:
+    for contact in contacts:
+        for key in _contact_keys(contact):
+            suffixes.setdefault(key, "")
+    for contact in registered:
+        for key in _contact_keys(contact):
+            suffixes[key] = contact.id
+
+
+def start_sync(contacts: List[ContactModel]) -> SyncResult:
+    """
+    Matches a full address book and stores its hashed phone suffixes, so
+    later syncs can send only changes along with the returned token.
+    """
+    synced_at = datetime.now(timezone.utc) - SYNC_CLOCK_MARGIN
+
+    registered = find_registered_contacts(contacts)
+    suffixes: Dict[str, str] = {}
+    _record_matches(suffixes, contacts, registered)
+
+    state_ref = get_db().collection(CONTACT_SYNC_STATES).document()
+    state_ref.set(
+        {
+            "suffixes": suffixes,
+            "version": 1,
+            "syncedAt": synced_at,
+            "expireAt": synced_at + REGISTRY_RETENTION,
+        }
+    )
+    record_writes()
+
+    logger.info("Started contact sync %s with %d keys", state_ref.id, len(suffixes))
+    return SyncResult(registered, [], _encode_token(state_ref.id, 1))
+
+
+def apply_delta(
+    sync_token: str, added: List[ContactModel], removed: List[ContactModel]
+) -> SyncResult:
+    """
+    Applies added and removed contacts to a stored sync state and returns
+    only what changed since the token was issued: matches among the added
+    contacts, plus users who registered or unregistered a number already in
+    the address book. Those carry the user's phone but no contact name, so
+    the client merges them by phone number.
+    """
+    state_id, version = _decode_token(sync_token)
+    state_ref = get_db().collection(CONTACT_SYNC_STATES).document(state_id)
+    snapshot = state_ref.get()
+    record_reads()
+
+    state = snapshot.to_dict() if snapshot.exists else None
+    if state is None or state.get("version") != version:
+        raise SyncTokenError(f"Unknown or stale sync token: {sync_token}")
+
+    # TTL deletion lags, so expiry is checked here too. States written before
+    # `expireAt` existed are treated as expired.
+    now = datetime.now(timezone.utc)
+    expire_at = state.get("expireAt")
+    if expire_at is None or expire_at <= now + SYNC_CLOCK_MARGIN:
+        raise SyncTokenError(f"Expired sync token: {sync_token}")
+
+    synced_at = state["syncedAt"]
+    suffixes: Dict[str, str] = state.get("suffixes") or {}
+
+    # Drop removed contacts first so no changes are reported for them
+    for contact in removed:
+        for key in _contact_keys(contact):
+            suffixes.pop(key, None)
+
+    registered: List[ContactModel] = []
+    unregistered: List[ContactModel] = []
+
+    changes_read = 0
+    for change_doc in stream_registry_changes(synced_at, MAX_DELTA_CHANGES + 1):
+        changes_read += 1
+        if changes_read > MAX_DELTA_CHANGES:
+            raise SyncTokenError(f"Too many changes since sync token: {sync_token}")
+
+        change = change_doc.to_dict()
+        key = suffix_hash(change[PHONE_SUFFIX_FIELD])
+        if key not in suffixes:
+            continue
+
+        contact = ContactModel(
+            name="",
+            phone_numbers=[Phone.from_map(change.get("phone", {}))],
+            id=change["userId"],
+            photo=change.get("photo"),
+        )
+        if change["registered"]:
+            if not suffixes[key]:
+                suffixes[key] = change["userId"]
+                registered.append(contact)
+        elif suffixes[key] == change["userId"]:
+            suffixes[key] = ""
+            unregistered.append(contact)
+
+    if added:
+        added_registered = find_registered_contacts(added)
+        _record_matches(suffixes, added, added_registered)
+        registered.extend(added_registered)
+
+    try:
+        state_ref.update(
+            {
+                "suffixes": suffixes,
+                "version": version + 1,
+                "syncedAt": now - SYNC_CLOCK_MARGIN,
+                "expireAt": now - SYNC_CLOCK_MARGIN + REGISTRY_RETENTION,
+            },
+            option=get_db().write_option(last_update_time=snapshot.update_time),
+        )
+    except FailedPrecondition as e:
+        raise SyncTokenError(f"Sync token used concurrently: {sync_token}") from e
+    record_writes()
+
+    logger.info(
+        "Applied delta to contact sync %s: %d added, %d removed, %d registered, %d unregistered",
+        state_id,
+        len(added),
+        len(removed),
+        len(registered),
+        len(unregistered),
+    )
+    return SyncResult(registered, unregistered, _encode_token(state_id, version + 1))
@@ -1,81 +1,216 @@
-import logging
-from firebase_admin import firestore
-from typing import List
+import asyncio
+import os
+from google.cloud.firestore_v1.base_query import FieldFilter
+from typing import Any, Dict, List, Tuple
 from src.contact.models.contact_model import ContactModel
 from src.core.models.user_model import UserModel
-
-logger = logging.getLogger()
-
-# Use lazy initialization for Firestore client
-_db = None
-
-
-def get_db():
-    """Lazy initialization of Firestore client"""
-    global _db
-    if _db is None:
-        _db = firestore.client()
-    return _db
-
-
-def has_seven_digit_match(phone_number1: str, phone_number2: str) -> bool:
-    if len(phone_number1) < 7 or len(phone_number2) < 7:
-        return False
-    # Get the last 7 digits of each phone number
-    last_seven_1 = phone_number1[-7:]
-    last_seven_2 = phone_number2[-7:]
-    return last_seven_1 == last_seven_2
-
-
-def is_direct_match(phone_number1: str, phone_number2: str) -> bool:
-    return phone_number1 == phone_number2
-
-
-def get_registered_contacts(contacts: List[ContactModel]) -> List:
-
-    print("[GET_REGISTERED] Fetching users from Firestore")
-    # Reference to the 'users' collection in Firestore using lazy initialization
+from src.contact.services.phone_keys import (
+    IN_QUERY_LIMIT,
+    PHONE_NORMALIZED_FIELD,
+    PHONE_SUFFIX_FIELD,
+    phone_suffix,
+)
+from src.contact.services.phone_matcher import PhoneMatcher
+from src.contact.services.registered_snapshot import registered_snapshot
+from src.contact.services.user_directory import user_directory
+from src.core.utils.event_loop import run_coroutine
+from src.core.utils.firestore_async_client import get_async_db
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads, stage
+
+logger = get_logger(__name__)
+
+# Candidate queries in flight at once on the async path
+CANDIDATE_QUERY_CONCURRENCY = int(os.environ.get("CONTACT_QUERY_CONCURRENCY", "16"))
+
+# Seconds before a single candidate query is given up on
+CANDIDATE_QUERY_TIMEOUT_SECONDS = float(
+    os.environ.get("CONTACT_QUERY_TIMEOUT_SECONDS", "10")
+)
+
+
+def _chunks(values: List[str], size: int):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def candidate_queries(contacts: List[ContactModel]) -> List[Tuple[str, List[str]]]:
+    """
+    Returns the (field, values) `in` queries that fetch every user whose
+    phone could match one of the contacts. Numbers shorter than 7 digits can
+    only match directly, so they are looked up by their normalized number.
+    """
+    suffixes = set()
+    short_numbers = set()
+    for contact in contacts:
+        for phone in contact.phone_numbers:
+            suffix = phone_suffix(phone)
+            if suffix is not None:
+                suffixes.add(suffix)
+            elif phone.normalized:
+                short_numbers.add(phone.normalized)
+
+    return [
+        (field, chunk)
+        for field, values in (
+            (PHONE_SUFFIX_FIELD, suffixes),
+            (PHONE_NORMALIZED_FIELD, short_numbers),
+        )
+        for chunk in _chunks(sorted(values), IN_QUERY_LIMIT)
+    ]
+
+
+def _to_users(user_docs: Dict[str, dict]) -> List[UserModel]:
+    # Keep document id order so ties resolve as they did with a full scan
+    return [UserModel.from_map(user_docs[doc_id]) for doc_id in sorted(user_docs)]
+
+
+def query_candidate_users(contacts: List[ContactModel]) -> List[UserModel]:
+    """
+    Fetches only the users whose phone could match one of the contacts, using
+    chunked `in` queries on the indexed phone suffix field, one at a time.
+    """
     users_ref = get_db().collection("users")
+    user_docs: Dict[str, dict] = {}
+
+    for field, chunk in candidate_queries(contacts):
+        results = list(users_ref.where(filter=FieldFilter(field, "in", chunk)).stream())
+        record_reads(max(1, len(results)))
+        for user_doc in results:
+            user_docs[user_doc.id] = user_doc.to_dict()
+
+    return _to_users(user_docs)
+
+
+async def query_candidate_users_async(
+    queries: List[Tuple[str, List[str]]]
+) -> List[UserModel]:
+    """
+    Runs candidate queries concurrently on the async Firestore client, at
+    most CANDIDATE_QUERY_CONCURRENCY at a time. A query that outlives
+    CANDIDATE_QUERY_TIMEOUT_SECONDS fails the lookup and cancels the rest.
+    """
+    users_ref = get_async_db().collection("users")
+    semaphore = asyncio.Semaphore(CANDIDATE_QUERY_CONCURRENCY)
+
+    async def fetch(field: str, chunk: List[str]):
+        async with semaphore:
+            results = await asyncio.wait_for(
+                users_ref.where(filter=FieldFilter(field, "in", chunk)).get(),
+                CANDIDATE_QUERY_TIMEOUT_SECONDS,
+            )
+        record_reads(max(1, len(results)))
+        return results
+
+    async with asyncio.TaskGroup() as group:
+        tasks = [group.create_task(fetch(field, chunk)) for field, chunk in queries]
+
+    user_docs: Dict[str, dict] = {}
+    for task in tasks:
+        for user_doc in task.result():
+            user_docs[user_doc.id] = user_doc.to_dict()
+    return _to_users(user_docs)
+
+
+def fetch_candidate_users(contacts: List[ContactModel]) -> List[UserModel]:
+    """
+    Fetches candidate users with concurrent queries on the shared event
+    loop, or one query at a time if there is only one or the async path
+    fails.
+    """
+    queries = candidate_queries(contacts)
+    if len(queries) > 1:
+        try:
+            return run_coroutine(query_candidate_users_async(queries))
+        except Exception as e:
+            errors = e.exceptions if isinstance(e, ExceptionGroup) else (e,)
+            logger.warning(
+                "Concurrent candidate lookup failed with %d errors, querying in turn: %r",
+                len(errors),
+                errors[0],
+            )
+    return query_candidate_users(contacts)
+
+
+def find_registered_contacts(contacts: List[ContactModel]) -> List[ContactModel]:
+    """
+    Returns a copy of every contact that matches a registered user, carrying
+    the user's id, phone and photo.
+    """
+    with stage("user_fetch"):
+        # The snapshot is usable on a cold instance once downloaded, and only
+        # costs reads for registrations made since it was written
+        matcher = registered_snapshot.get_matcher()
+        if matcher is not None:
+            logger.info("Using phone snapshot with %d users", len(matcher))
+        else:
+            # Then the warm instance's user directory, which costs no reads
+            matcher = user_directory.get_matcher()
+            if matcher is not None:
+                logger.info("Using user directory with %d users", len(matcher))
+
+        if matcher is None:
+            logger.info("Fetching candidate users from Firestore")
+            users = fetch_candidate_users(contacts)
+            logger.info("Fetched %d candidate users from Firestore", len(users))
+
+            # Index users once so every contact phone is a dictionary lookup
+            matcher = PhoneMatcher(users)
+
+    with stage("match"):
+        matched_contacts = _match_contacts(matcher, contacts)
+
+    logger.info("Total matched contacts: %d", len(matched_contacts))
+    return matched_contacts
 
-    # Fetch all users from Firestore
-    results = users_ref.stream()
-
-    # Transform results to UserModel instances
-    users = [UserModel.from_map(user.to_dict()) for user in results]
-    print(f"[GET_REGISTERED] Fetched {len(users)} users from Firestore")
 
-    # Create a dictionary to map phone numbers to user ids
+def _match_contacts(
+    matcher: PhoneMatcher, contacts: List[ContactModel]
+) -> List[ContactModel]:
     matched_contacts = []
 
     for contact in contacts:
-        match_found = False
         for phone in contact.phone_numbers:
-            if match_found:
-                break
-            for user in users:
-                user_phone_number = user.phone.phone_number
-                if is_direct_match(
-                    phone.phone_number, user_phone_number
-                ) or has_seven_digit_match(phone.phone_number, user_phone_number):
-                    # Append a copy of the contact with the matched user id to the matched_contacts list
-                    matched_contacts.append(
-                        contact.copy_with(
-                            id=user.id,
-                            phone_numbers=[
-                                phone.copy_with(
-                                    phone_number=user.phone.phone_number,
-                                    iso_code=user.phone.iso_code,
-                                    dial_code=user.phone.dial_code,
-                                )
-                            ],
-                            photo=user.photo,
-                        ).to_json()
-                    )
-                    match_found = True
-                    print(
-                        f"[GET_REGISTERED] Match found for contact {contact.name} with user {user.id}"
-                    )
-                    break
-
-    print(f"[GET_REGISTERED] Total matched contacts: {len(matched_contacts)}")
+            match = matcher.match(phone)
+            if match is None:
+                continue
+
+            user = match.user
+            if match.is_ambiguous:
+                logger.info(
+                    "Ambiguous 7-digit match for contact %s: %d users share the suffix of %s, using user %s",
+                    contact.name,
+                    len(match.candidates),
+                    phone.phone_number,
+                    user.id,
+                )
+
+            # Append a copy of the contact with the matched user id to the matched_contacts list
+            matched_contacts.append(
+                contact.copy_with(
+                    id=user.id,
+                    phone_numbers=[
+                        phone.copy_with(
+                            phone_number=user.phone.phone_number,
+                            iso_code=user.phone.iso_code,
+                            dial_code=user.phone.dial_code,
+                        )
+                    ],
+                    photo=user.photo,
+                )
+            )
+            logger.debug("Match found for contact %s with user %s", contact.name, user.id)
+            break
+
     return matched_contacts
+
+
+def get_registered_contacts(contacts: List[ContactModel]) -> List[Dict[str, Any]]:
+    """
+    Returns the registered contacts as maps, ready to be serialized once with
+    the rest of the response.
+    """
+    registered = find_registered_contacts(contacts)
+    with stage("serialize"):
+        return [contact.to_map() for contact in registered]
@@ -0,0 +1,191 @@
+import json
+from typing import List
+from firebase_functions import https_fn
+from flask import stream_with_context
+
+from src.contact.models.contact_model import ContactModel
+from src.contact.services.contact_sync import SyncTokenError, apply_delta, start_sync
+from src.contact.services.get_registered_contacts import get_registered_contacts
+from src.contact.services.stream_registered_contacts import (
+    CONTACT_PARSE_ERRORS,
+    stream_registered_contacts,
+)
+from src.core.services.create_response import create_response, create_stream_response
+from src.core.utils.logger import get_logger, log_payload
+from src.core.utils.tracing import stage, traced
+
+logger = get_logger(__name__)
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Clients that send `contactFormat: "map"` get contacts as JSON objects;
+# older app versions omit it and keep getting JSON-encoded strings
+CONTACT_FORMAT_MAP = "map"
+
+
+def _format_contacts(contacts: List[ContactModel], legacy: bool) -> List:
+    if legacy:
+        return [contact.to_json() for contact in contacts]
+    return [contact.to_map() for contact in contacts]
+
+
+def _parse_contacts(contacts_data) -> List[ContactModel]:
+    """
+    Parses contacts sent either as maps or as JSON strings.
+    """
+    with stage("parse"):
+        return [
+            (
+                ContactModel.from_map(json.loads(contact))
+                if isinstance(contact, str)
+                else ContactModel.from_map(contact)
+            )
+            for contact in contacts_data
+        ]
+
+
+@traced("request_registered_contacts")
+def handle_registered_contacts_request(req: https_fn.Request) -> https_fn.Response:
+    """
+    Returns the registered contacts among a list of phone numbers.
+    Requests sent as application/x-ndjson, one contact per line, are matched
+    incrementally and answered with a stream of NDJSON contacts.
+
+    Clients can opt into delta syncing by sending `sync: true` with a full
+    address book, then only `added`/`removed` contacts with the returned
+    `syncToken` on later calls. A 409 with `resyncRequired` asks for a new
+    full sync.
+    """
+    try:
+        logger.info("Received request to get registered contacts")
+
+        # Log request details for debugging
+        logger.debug("Request method: %s, URL: %s", req.method, req.url)
+        log_payload(logger, "Request headers", dict(req.headers))
+
+        # Check if it's a POST request
+        if req.method != "POST":
+            logger.warning("Invalid request method: %s. Expected POST", req.method)
+            return create_response(
+                {"error": f"Invalid request method: {req.method}. Expected POST"}, 405
+            )
+
+        # Opt-in streaming mode for large address books
+        if req.mimetype == NDJSON_MIMETYPE:
+            logger.info("Streaming registered contacts from NDJSON body")
+            # The body is read while the response streams, after this returns
+            return create_stream_response(
+                stream_with_context(stream_registered_contacts(req.stream))
+            )
+
+        # Extract data from POST request body
+        request_json = req.get_json(silent=True)
+        if not request_json:
+            # Log the raw request body for debugging
+            try:
+                log_payload(
+                    logger,
+                    "Invalid or missing JSON in request body. Raw body",
+                    req.get_data(as_text=True),
+                )
+            except Exception:
+                logger.warning("Could not read request body", exc_info=True)
+
+            return create_response(
+                {"error": "Invalid or missing JSON in request body"}, 400
+            )
+
+        log_payload(logger, "Request JSON", request_json)
+
+        # Check if "data" key exists and is not None
+        data = request_json.get("data")
+        if data is None:
+            logger.warning("Missing 'data' in request JSON")
+            return create_response({"error": "Missing 'data' in request JSON"}, 400)
+
+        legacy = data.get("contactFormat") != CONTACT_FORMAT_MAP
+
+        # Delta sync: only changes since the token are sent and returned
+        sync_token = data.get("syncToken")
+        if sync_token:
+            try:
+                added = _parse_contacts(data.get("added") or [])
+                removed = _parse_contacts(data.get("removed") or [])
+            except CONTACT_PARSE_ERRORS:
+                logger.warning("Failed to parse delta contacts data", exc_info=True)
+                return create_response(
+                    {"error": "Invalid contacts data format"}, 400
+                )
+
+            try:
+                result = apply_delta(sync_token, added, removed)
+            except SyncTokenError as e:
+                logger.info("Rejected sync token: %s", e)
+                return create_response(
+                    {
+                        "error": "Sync token expired, full sync required",
+                        "resyncRequired": True,
+                    },
+                    409,
+                )
+
+            return create_response(
+                {
+                    "registeredContacts": _format_contacts(result.registered, legacy),
+                    "unregisteredContacts": _format_contacts(result.unregistered, legacy),
+                    "syncToken": result.sync_token,
+                },
+                200,
+            )
+
+        # Check if "contacts" key exists in "data"
+        contacts_data = data.get("contacts")
+        if contacts_data is None:
+            logger.warning("Missing 'contacts' in request JSON data")
+            return create_response(
+                {"error": "Missing 'contacts' in request JSON data"}, 400
+            )
+
+        logger.info("Processing %d contacts", len(contacts_data))
+
+        # Parse JSON strings in contacts_data
+        try:
+            contacts = _parse_contacts(contacts_data)
+            logger.debug("Parsed %d contact models", len(contacts))
+        except CONTACT_PARSE_ERRORS:
+            logger.warning("Failed to parse contacts data", exc_info=True)
+            return create_response({"error": "Invalid contacts data format"}, 400)
+
+        # Full sync that also starts delta syncing for this client
+        if data.get("sync"):
+            result = start_sync(contacts)
+            return create_response(
+                {
+                    "registeredContacts": _format_contacts(result.registered, legacy),
+                    "syncToken": result.sync_token,
+                },
+                200,
+            )
+
+        # Get registered contacts
+        registered_contacts = get_registered_contacts(contacts)
+        if legacy:
+            registered_contacts = [
+                json.dumps(contact) for contact in registered_contacts
+            ]
+
+        response = create_response(
+            {
+                "registeredContacts": registered_contacts,
+            },
+            200,
+        )
+
+        logger.info(
+            "Returning response with %d registered contacts", len(registered_contacts)
+        )
+        return response
+
+    except Exception:
+        logger.exception("Unexpected error")
+        return create_response({"error": "Internal server error"}, 500)
@@ -0,0 +1,87 @@
+from typing import Any, Dict, Optional
+from src.core.models.phone_model import Phone
+from src.core.utils.phone_normalizer import format_suffix_key
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Denormalized fields kept on every user document so contact sync can query
+# candidate users instead of streaming the whole collection.
+PHONE_SUFFIX_FIELD = "phoneSuffix7"
+PHONE_NORMALIZED_FIELD = "phoneNormalized"
+
+# Firestore caps the number of values in a single `in` filter
+IN_QUERY_LIMIT = 30
+
+
+def phone_suffix(phone: Phone) -> Optional[str]:
+    """
+    Returns the last 7 digits of a phone's normalized number, or None if it
+    is too short.
+    """
+    if phone.suffix_key is None:
+        return None
+    return format_suffix_key(phone.suffix_key)
+
+
+def build_phone_keys(phone: Phone) -> Dict[str, Any]:
+    """
+    Builds the denormalized phone key fields for a user's phone.
+    """
+    return {
+        PHONE_SUFFIX_FIELD: phone_suffix(phone),
+        PHONE_NORMALIZED_FIELD: phone.normalized,
+    }
+
+
+def phone_keys_changes(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the phone key fields that differ from what is stored on a user
+    document, or an empty dict if the document is already up to date.
+    """
+    keys = build_phone_keys(Phone.from_map(data.get("phone", {})))
+    return {field: value for field, value in keys.items() if data.get(field) != value}
+
+
+def backfill_phone_keys(batch_size: int = 400) -> int:
+    """
+    Writes the phone key fields on every user document that is missing them
+    or has stale values. Returns the number of documents updated.
+    """
+    db = get_db()
+    batch = db.batch()
+    pending = 0
+    updated = 0
+
+    logger.info("Scanning users collection")
+
+    for user_doc in db.collection("users").stream():
+        changes = phone_keys_changes(user_doc.to_dict() or {})
+        if not changes:
+            continue
+
+        batch.update(user_doc.reference, changes)
+        pending += 1
+        updated += 1
+
+        if pending >= batch_size:
+            batch.commit()
+            logger.info("Committed %d updates so far", updated)
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    logger.info("Updated %d user documents", updated)
+    return updated
+
+
+if __name__ == "__main__":
+    # Run from the functions directory with application default credentials:
+    #   python -m src.contact.services.phone_keys
+    from firebase_admin import initialize_app
+
+    initialize_app()
+    backfill_phone_keys()
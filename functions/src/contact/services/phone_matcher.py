@@ -0,0 +1,111 @@
+import bisect
+from typing import Dict, Iterable, List, Optional
+from src.core.models.phone_model import Phone
+from src.core.models.user_model import UserModel
+
+
+class PhoneMatch:
+    """
+    Result of looking up a single contact phone number.
+    `user` is the matching user: an exact match on the normalized number if
+    there is one, otherwise the first user sharing the last 7 digits.
+    `candidates` holds every user sharing the matched key, so callers can see
+    when the 7-digit rule was ambiguous.
+    """
+
+    def __init__(self, user: UserModel, candidates: List[UserModel]):
+        self.user = user
+        self.candidates = candidates
+
+    @property
+    def is_ambiguous(self) -> bool:
+        return len(self.candidates) > 1
+
+
+class PhoneMatcher:
+    """
+    Indexes users by the precomputed full and 7-digit suffix keys of their
+    normalized phone numbers, so each contact phone can be resolved with a
+    dictionary lookup instead of a scan over every user.
+
+    Users can be added and removed while other threads match. Buckets are
+    replaced rather than changed in place, so a match sees either the old
+    or the new bucket.
+    """
+
+    def __init__(self, users: Iterable[UserModel]):
+        self._count = 0
+        self._exact: Dict[int, List[UserModel]] = {}
+        self._suffix: Dict[int, List[UserModel]] = {}
+
+        for user in users:
+            self.add(user)
+
+    def add(self, user: UserModel) -> None:
+        """
+        Adds a user to the index. Users with lower ids win ties, mirroring
+        the document id order in which the old scan visited them.
+        """
+        self._count += 1
+        phone = user.phone
+
+        if phone.full_key is not None:
+            _insert(self._exact, phone.full_key, user)
+        if phone.suffix_key is not None:
+            _insert(self._suffix, phone.suffix_key, user)
+
+    def remove(self, user: UserModel) -> None:
+        """
+        Removes a user added earlier: the same UserModel, found under the
+        keys of the phone it was added with. Other entries sharing its id
+        are kept.
+        """
+        self._count -= 1
+        phone = user.phone
+
+        if phone.full_key is not None:
+            _discard(self._exact, phone.full_key, user)
+        if phone.suffix_key is not None:
+            _discard(self._suffix, phone.suffix_key, user)
+
+    def match(self, phone: Phone) -> Optional[PhoneMatch]:
+        """
+        Returns the user matching `phone` directly or by its last 7 digits,
+        or None if no user matches.
+        """
+        exact = self._exact.get(phone.full_key)
+        if exact:
+            return PhoneMatch(user=exact[0], candidates=[exact[0]])
+
+        bucket = self._suffix.get(phone.suffix_key)
+        if bucket:
+            return PhoneMatch(user=bucket[0], candidates=bucket)
+        return None
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def _insert(index: Dict[int, List[UserModel]], key: int, user: UserModel) -> None:
+    bucket = index.get(key)
+    if bucket is None:
+        index[key] = [user]
+        return
+    position = bisect.bisect_right(bucket, user.id, key=lambda other: other.id)
+    index[key] = bucket[:position] + [user] + bucket[position:]
+
+
+def _discard(index: Dict[int, List[UserModel]], key: int, user: UserModel) -> None:
+    bucket = index.get(key)
+    if bucket is None:
+        return
+    for position, other in enumerate(bucket):
+        if other is user:
+            break
+    else:
+        return
+    remaining = bucket[:position] + bucket[position + 1 :]
+    if remaining:
+        index[key] = remaining
+    else:
+        del index[key]
@@ -0,0 +1,108 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.core.models.phone_model import Phone
+from src.core.utils.firestore_client import get_db
+from src.core.utils.tracing import record_reads
+from src.contact.services.phone_keys import PHONE_SUFFIX_FIELD, phone_suffix
+
+# Append-only log of phone suffixes being registered or unregistered, which
+# lets delta contact syncs find changes without rescanning users
+PHONE_REGISTRY_CHANGES = "phoneRegistryChanges"
+
+# Entries expire through a Firestore TTL policy on `expireAt`; sync tokens
+# older than this need a full sync
+REGISTRY_RETENTION = timedelta(days=30)
+
+def suffix_hash(suffix: str) -> str:
+    # 8 bytes keeps sync states small while collisions stay negligible per user
+    return hashlib.blake2b(suffix.encode(), digest_size=8).hexdigest()
+
+
+def _registry_entry(
+    user_id: str, data: Dict[str, Any], suffix: str, registered: bool
+) -> Dict[str, Any]:
+    return {
+        "userId": data.get("id") or user_id,
+        PHONE_SUFFIX_FIELD: suffix,
+        "registered": registered,
+        "phone": data.get("phone", {}),
+        "photo": data.get("photo"),
+        "changedAt": firestore.SERVER_TIMESTAMP,
+        "expireAt": datetime.now(timezone.utc) + REGISTRY_RETENTION,
+    }
+
+
+def _suffix_of(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not data:
+        return None
+    return phone_suffix(Phone.from_map(data.get("phone", {})))
+
+
+def registry_changes(
+    user_id: str,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Returns the registry entries implied by a user document write: the old
+    suffix is unregistered and the new one registered whenever they differ.
+    """
+    before_suffix = _suffix_of(before)
+    after_suffix = _suffix_of(after)
+    if before_suffix == after_suffix:
+        return []
+
+    changes = []
+    if before_suffix:
+        changes.append(_registry_entry(user_id, before, before_suffix, False))
+    if after_suffix:
+        changes.append(_registry_entry(user_id, after, after_suffix, True))
+    return changes
+
+
+def add_registry_changes(batch, changes: List[Dict[str, Any]]) -> None:
+    """
+    Adds registry entries to a write batch.
+    """
+    registry_ref = get_db().collection(PHONE_REGISTRY_CHANGES)
+    for change in changes:
+        batch.set(registry_ref.document(), change)
+
+
+def registry_changes_since(since: datetime):
+    """
+    Returns the registry entries written at or after `since`, oldest first.
+    """
+    changes = list(
+        get_db()
+        .collection(PHONE_REGISTRY_CHANGES)
+        .where(filter=FieldFilter("changedAt", ">=", since))
+        .order_by("changedAt")
+        .stream()
+    )
+    record_reads(max(1, len(changes)))
+    return changes
+
+
+def stream_registry_changes(since: datetime, limit: int):
+    """
+    Yields at most `limit` registry entries written after `since`, oldest
+    first, without holding them all in memory.
+    """
+    query = (
+        get_db()
+        .collection(PHONE_REGISTRY_CHANGES)
+        .where(filter=FieldFilter("changedAt", ">", since))
+        .order_by("changedAt")
+        .limit(limit)
+    )
+    count = 0
+    try:
+        for change_doc in query.stream():
+            count += 1
+            yield change_doc
+    finally:
+        record_reads(max(1, count))
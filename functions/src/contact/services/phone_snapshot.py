@@ -0,0 +1,205 @@
+"""
+Compact binary snapshot of registered users for contact matching.
+
+Layout, little-endian, every section aligned to its item size:
+
+    header      magic, version, created_at (epoch µs), record, exact and
+                suffix entry counts
+    exact keys  uint64[E]  sorted full match keys
+    exact refs  uint32[E]  record index of each exact key
+    suffix keys uint32[S]  sorted 7-digit suffix keys, repeated per user
+    suffix refs uint32[S]  record index of each suffix key
+    offsets     uint32[N+1] byte offsets of each record in the table
+    records     UTF-8 id, phone number, ISO code, dial code and photo,
+                separated by \\x1f
+
+Keys of one value keep record order, which is document id order, so ties
+resolve the way PhoneMatcher resolves them. Lookups binary search the
+memory-mapped key arrays and decode only the records they hit.
+"""
+
+import bisect
+import mmap
+import struct
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+from src.contact.services.phone_matcher import PhoneMatch
+from src.core.models.phone_model import Phone
+from src.core.models.user_model import UserModel
+
+SNAPSHOT_MAGIC = b"TBPS"
+SNAPSHOT_VERSION = 1
+
+# magic, version, created_at, records, exact entries, suffix entries, padding
+_HEADER = struct.Struct("<4sIqIII4x")
+_SEPARATOR = "\x1f"
+_MAX_EXACT_KEY = 2**64 - 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def build_snapshot(users: Iterable[UserModel], created_at: datetime) -> bytes:
+    """
+    Serializes users, in the order given, into a snapshot.
+    """
+    records: List[bytes] = []
+    exact = []
+    suffix = []
+    for user in users:
+        phone = user.phone
+        index = len(records)
+        records.append(
+            _SEPARATOR.join(
+                (
+                    user.id or "",
+                    phone.phone_number or "",
+                    phone.iso_code or "",
+                    phone.dial_code or "",
+                    user.photo or "",
+                )
+            ).encode("utf-8")
+        )
+        if phone.full_key is not None and phone.full_key <= _MAX_EXACT_KEY:
+            exact.append((phone.full_key, index))
+        if phone.suffix_key is not None:
+            suffix.append((phone.suffix_key, index))
+
+    exact.sort()
+    suffix.sort()
+
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    created_micros = (created_at - _EPOCH) // _MICROSECOND
+    return b"".join(
+        (
+            _HEADER.pack(
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                created_micros,
+                len(records),
+                len(exact),
+                len(suffix),
+            ),
+            struct.pack(f"<{len(exact)}Q", *(key for key, _ in exact)),
+            struct.pack(f"<{len(exact)}I", *(index for _, index in exact)),
+            struct.pack(f"<{len(suffix)}I", *(key for key, _ in suffix)),
+            struct.pack(f"<{len(suffix)}I", *(index for _, index in suffix)),
+            struct.pack(f"<{len(offsets)}I", *offsets),
+            *records,
+        )
+    )
+
+
+class PhoneSnapshot:
+    """
+    Read-only view of a snapshot file. The file is memory-mapped, so only
+    the key pages a lookup touches and the records it returns are paged in.
+    """
+
+    def __init__(self, buffer):
+        if sys.byteorder != "little":
+            # Key arrays are cast in native byte order
+            raise SnapshotError("Snapshots can only be read on little-endian hosts")
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size:
+            raise SnapshotError("Snapshot is truncated")
+        magic, version, created_micros, records, exact, suffix = _HEADER.unpack_from(
+            view
+        )
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot {magic!r} v{version}")
+
+        self.created_at = _EPOCH + created_micros * _MICROSECOND
+        self._count = records
+
+        position = _HEADER.size
+        sections = []
+        for count, size, code in (
+            (exact, 8, "Q"),
+            (exact, 4, "I"),
+            (suffix, 4, "I"),
+            (suffix, 4, "I"),
+            (records + 1, 4, "I"),
+        ):
+            end = position + count * size
+            if end > len(view):
+                raise SnapshotError("Snapshot is truncated")
+            sections.append(view[position:end].cast(code))
+            position = end
+        (
+            self._exact_keys,
+            self._exact_refs,
+            self._suffix_keys,
+            self._suffix_refs,
+            self._offsets,
+        ) = sections
+        self._records = view[position:]
+        if len(self._records) < self._offsets[-1]:
+            raise SnapshotError("Snapshot is truncated")
+
+    @classmethod
+    def open(cls, path: str) -> "PhoneSnapshot":
+        with open(path, "rb") as file:
+            return cls(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def user(self, index: int) -> UserModel:
+        """
+        Decodes one record into a UserModel with the id, phone and photo
+        that matched contacts carry. Tokens are not stored.
+        """
+        record = bytes(
+            self._records[self._offsets[index] : self._offsets[index + 1]]
+        ).decode("utf-8")
+        user_id, phone_number, iso_code, dial_code, photo = record.split(_SEPARATOR)
+        return UserModel(
+            id=user_id,
+            phone=Phone(
+                iso_code=iso_code, dial_code=dial_code, phone_number=phone_number
+            ),
+            photo=photo,
+            tokens=[],
+        )
+
+    def exact_indexes(self, key: Optional[int]) -> List[int]:
+        return _lookup(self._exact_keys, self._exact_refs, key, _MAX_EXACT_KEY)
+
+    def suffix_indexes(self, key: Optional[int]) -> List[int]:
+        return _lookup(self._suffix_keys, self._suffix_refs, key, 2**32 - 1)
+
+    def match(self, phone: Phone) -> Optional[PhoneMatch]:
+        """
+        Returns the user matching `phone` directly or by its last 7 digits,
+        or None, like PhoneMatcher.match.
+        """
+        exact = self.exact_indexes(phone.full_key)
+        if exact:
+            user = self.user(exact[0])
+            return PhoneMatch(user=user, candidates=[user])
+        candidates = [
+            self.user(index) for index in self.suffix_indexes(phone.suffix_key)
+        ]
+        if candidates:
+            return PhoneMatch(user=candidates[0], candidates=candidates)
+        return None
+
+
+def _lookup(keys, refs, key: Optional[int], max_key: int) -> List[int]:
+    if key is None or key < 0 or key > max_key:
+        return []
+    start = bisect.bisect_left(keys, key)
+    end = start
+    while end < len(keys) and keys[end] == key:
+        end += 1
+    return list(refs[start:end])
@@ -0,0 +1,51 @@
+from typing import Optional
+from firebase_functions.firestore_fn import DocumentSnapshot
+from src.contact.services.phone_keys import phone_keys_changes
+from src.contact.services.phone_registry import add_registry_changes, registry_changes
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_writes, traced
+
+logger = get_logger(__name__)
+
+
+def _data_of(snapshot: DocumentSnapshot):
+    if snapshot is None or not snapshot.exists:
+        return None
+    return snapshot.to_dict() or {}
+
+
+@traced("on_user_written")
+def process_user_written(
+    user_id: str,
+    before_snapshot: Optional[DocumentSnapshot],
+    after_snapshot: Optional[DocumentSnapshot],
+) -> None:
+    """
+    Keeps the denormalized phone key fields on a user document in sync with
+    the user's phone number, and records registered or unregistered phone
+    suffixes for delta contact syncs.
+    """
+    try:
+        before = _data_of(before_snapshot)
+        after = _data_of(after_snapshot)
+
+        changes = phone_keys_changes(after) if after is not None else {}
+        registry = registry_changes(user_id, before, after)
+        if not changes and not registry:
+            # Already up to date, including the write this function just made
+            return
+
+        batch = get_db().batch()
+        if changes:
+            logger.info("Updating phone keys for user %s: %s", user_id, changes)
+            batch.update(after_snapshot.reference, changes)
+        if registry:
+            logger.info("Recording %d registry changes for user %s", len(registry), user_id)
+            add_registry_changes(batch, registry)
+        writes = len(batch)
+        batch.commit()
+        record_writes(writes)
+
+    except Exception:
+        logger.exception("Error updating phone keys for user %s", user_id)
@@ -0,0 +1,309 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+from google.api_core.exceptions import NotFound
+from src.contact.services.phone_matcher import PhoneMatch, PhoneMatcher
+from src.contact.services.phone_registry import registry_changes_since
+from src.contact.services.phone_snapshot import PhoneSnapshot, build_snapshot
+from src.core.models.phone_model import Phone
+from src.core.models.user_model import UserModel
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads, stage, traced
+
+logger = get_logger(__name__)
+
+# Cloud Storage object the scheduled job writes and instances download;
+# the bucket defaults to the project's default bucket
+SNAPSHOT_BUCKET = os.environ.get("PHONE_SNAPSHOT_BUCKET") or None
+SNAPSHOT_OBJECT = os.environ.get(
+    "PHONE_SNAPSHOT_OBJECT", "snapshots/registered-phones.bin"
+)
+
+# Local copy, memory-mapped. /tmp is the only writable disk on an instance
+# and is in-memory, so the file counts against the function's memory once
+# (the mapping shares its pages): about 150 bytes per user with a Storage
+# photo URL, 150 MB per million users, twice that while a newer snapshot
+# is downloaded next to the one in use. The request function is sized for it.
+SNAPSHOT_DIR = tempfile.gettempdir()
+
+# How often an instance looks for a newer snapshot
+SNAPSHOT_CHECK_SECONDS = 15 * 60
+
+# Registrations after the snapshot are read from the registry log at most
+# this often
+OVERLAY_REFRESH_SECONDS = 60
+
+# Snapshots older than this are ignored, since the registry log that
+# covers the gap since then grows with their age
+SNAPSHOT_MAX_AGE = timedelta(days=2)
+
+# The snapshot claims to be this much older than the users read, so
+# registrations during the read are picked up from the registry log
+SNAPSHOT_CLOCK_MARGIN = timedelta(minutes=5)
+
+_bucket = None
+_bucket_lock = threading.Lock()
+
+
+def get_snapshot_bucket():
+    """Lazy lookup of the Cloud Storage bucket holding the snapshot"""
+    global _bucket
+    if _bucket is None:
+        with _bucket_lock:
+            if _bucket is None:
+                from firebase_admin import storage
+
+                _bucket = storage.bucket(SNAPSHOT_BUCKET)
+    return _bucket
+
+
+def set_snapshot_bucket(bucket) -> None:
+    """
+    Replaces the snapshot bucket, e.g. with a fake. Passing None restores
+    lazy lookup of the real bucket.
+    """
+    global _bucket
+    with _bucket_lock:
+        _bucket = bucket
+
+
+@traced("write_phone_snapshot")
+def write_phone_snapshot() -> int:
+    """
+    Reads the id, phone and photo of every user and uploads them as a
+    snapshot. Returns the number of users written.
+    """
+    created_at = datetime.now(timezone.utc) - SNAPSHOT_CLOCK_MARGIN
+    with stage("user_fetch"):
+        user_docs = list(
+            get_db().collection("users").select(["id", "phone", "photo"]).stream()
+        )
+        record_reads(max(1, len(user_docs)))
+
+    # Document id order, so ties resolve as they do in the user directory
+    user_docs.sort(key=lambda user_doc: user_doc.id)
+    users = []
+    for user_doc in user_docs:
+        data = user_doc.to_dict() or {}
+        users.append(
+            UserModel(
+                id=data.get("id", ""),
+                phone=Phone.from_map(data.get("phone", {})),
+                photo=data.get("photo", ""),
+                tokens=[],
+            )
+        )
+
+    with stage("serialize"):
+        snapshot = build_snapshot(users, created_at)
+    with stage("upload"):
+        get_snapshot_bucket().blob(SNAPSHOT_OBJECT).upload_from_string(
+            snapshot, content_type="application/octet-stream"
+        )
+    logger.info("Wrote phone snapshot of %d users, %d bytes", len(users), len(snapshot))
+    return len(users)
+
+
+class SnapshotMatcher:
+    """
+    Matches against a snapshot plus the users whose phone changed since it
+    was taken. Snapshot records of those users are skipped, since their
+    current phone, if any, is in `recent`.
+    """
+
+    def __init__(
+        self, snapshot: PhoneSnapshot, recent: PhoneMatcher, changed: Set[str]
+    ):
+        self.snapshot = snapshot
+        self.recent = recent
+        self.changed = changed
+
+    def __len__(self) -> int:
+        return len(self.snapshot) + len(self.recent)
+
+    def _users(self, indexes):
+        users = (self.snapshot.user(index) for index in indexes)
+        return [user for user in users if user.id not in self.changed]
+
+    def match(self, phone: Phone) -> Optional[PhoneMatch]:
+        recent = self.recent.match(phone)
+        if recent is not None and recent.user.phone.full_key == phone.full_key:
+            return recent
+
+        exact = self._users(self.snapshot.exact_indexes(phone.full_key))
+        if exact:
+            return PhoneMatch(user=exact[0], candidates=[exact[0]])
+
+        candidates = self._users(self.snapshot.suffix_indexes(phone.suffix_key))
+        if recent is not None:
+            candidates.extend(recent.candidates)
+        if candidates:
+            return PhoneMatch(user=candidates[0], candidates=candidates)
+        return None
+
+
+class RegisteredSnapshot:
+    """
+    The latest phone snapshot, memory-mapped from local disk, kept current
+    with registry entries written after it. A cold instance can match
+    contacts as soon as the file is downloaded, reading from Firestore only
+    the registrations made since the snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[PhoneSnapshot] = None
+        self._generation: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._recent: Dict[str, UserModel] = {}
+        self._changed: Set[str] = set()
+        self._recent_since: Optional[datetime] = None
+        self._recent_checked_at = 0.0
+        self._matcher: Optional[SnapshotMatcher] = None
+
+    def get_matcher(self) -> Optional[SnapshotMatcher]:
+        """
+        Returns a matcher over the snapshot and later registrations, or None
+        if there is no usable snapshot. Downloads and registry reads run
+        outside the lock, by one request at a time, while the others keep
+        using the current matcher.
+        """
+        now = time.monotonic()
+        with self._lock:
+            load = (
+                self._checked_at is None
+                or now - self._checked_at > SNAPSHOT_CHECK_SECONDS
+            )
+            if load:
+                self._checked_at = now
+            refresh = (
+                not load
+                and self._snapshot is not None
+                and now - self._recent_checked_at > OVERLAY_REFRESH_SECONDS
+            )
+            if refresh:
+                self._recent_checked_at = now
+            generation = self._generation
+            since = self._recent_since
+
+        if load:
+            try:
+                self._load_latest(generation)
+            except Exception:
+                logger.exception("Could not load phone snapshot")
+        elif refresh:
+            try:
+                changes = registry_changes_since(since)
+            except Exception:
+                logger.exception("Could not read registry changes")
+                changes = []
+            with self._lock:
+                # A newer snapshot swapped in meanwhile has its own overlay
+                if changes and self._generation == generation:
+                    self._recent_since = _fold_changes(
+                        changes, self._recent, self._changed, self._recent_since
+                    )
+                    self._matcher = None
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return None
+            if snapshot.created_at < datetime.now(timezone.utc) - SNAPSHOT_MAX_AGE:
+                logger.warning("Phone snapshot from %s is too old", snapshot.created_at)
+                return None
+
+            if self._matcher is None:
+                recent = PhoneMatcher(
+                    self._recent[user_id] for user_id in sorted(self._recent)
+                )
+                self._matcher = SnapshotMatcher(snapshot, recent, set(self._changed))
+            return self._matcher
+
+    def _load_latest(self, current_generation: Optional[int]) -> None:
+        """
+        Downloads and maps a newer snapshot, with the registrations made
+        since it was written, then swaps it in.
+        """
+        blob = get_snapshot_bucket().blob(SNAPSHOT_OBJECT)
+        try:
+            blob.reload()
+        except NotFound:
+            logger.info("No phone snapshot at %s", SNAPSHOT_OBJECT)
+            return
+        if blob.generation == current_generation:
+            return
+
+        path = os.path.join(SNAPSHOT_DIR, f"registered-phones-{blob.generation}.bin")
+        partial = f"{path}.partial"
+        blob.download_to_filename(partial)
+        os.replace(partial, path)
+        snapshot = PhoneSnapshot.open(path)
+
+        recent: Dict[str, UserModel] = {}
+        changed: Set[str] = set()
+        since = _fold_changes(
+            registry_changes_since(snapshot.created_at),
+            recent,
+            changed,
+            snapshot.created_at,
+        )
+
+        with self._lock:
+            previous = self._generation
+            self._snapshot = snapshot
+            self._generation = blob.generation
+            self._recent = recent
+            self._changed = changed
+            self._recent_since = since
+            self._recent_checked_at = time.monotonic()
+            self._matcher = None
+
+        if previous is not None and previous != blob.generation:
+            # Mappings of the old file stay valid after it is unlinked
+            old_path = os.path.join(SNAPSHOT_DIR, f"registered-phones-{previous}.bin")
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+        logger.info(
+            "Loaded phone snapshot of %d users from %s",
+            len(snapshot),
+            snapshot.created_at,
+        )
+
+
+def _fold_changes(
+    changes, recent: Dict[str, UserModel], changed: Set[str], since: datetime
+) -> datetime:
+    """
+    Folds registry entries into the recent users and changed ids, and
+    returns the time to read later entries from. Entries at that boundary
+    are read again, which is harmless because applying an entry twice has
+    no further effect.
+    """
+    for change_doc in changes:
+        change = change_doc.to_dict()
+        user_id = change["userId"]
+        changed.add(user_id)
+        phone = Phone.from_map(change.get("phone", {}))
+        if change["registered"]:
+            recent[user_id] = UserModel(
+                id=user_id, phone=phone, photo=change.get("photo") or "", tokens=[]
+            )
+        else:
+            current = recent.get(user_id)
+            if current is not None and current.phone.suffix_key == phone.suffix_key:
+                del recent[user_id]
+        changed_at = change.get("changedAt")
+        if changed_at is not None and changed_at > since:
+            since = changed_at
+    return since
+
+
+# One snapshot per warm instance
+registered_snapshot = RegisteredSnapshot()
@@ -0,0 +1,88 @@
+import json
+from typing import Iterable, Iterator, List
+from src.contact.models.contact_model import ContactModel
+from src.contact.services.get_registered_contacts import get_registered_contacts
+from src.core.services.create_response import serialize
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import stage, trace
+
+logger = get_logger(__name__)
+
+# Contacts matched per round, which bounds memory regardless of body size
+STREAM_CHUNK_SIZE = 500
+
+# Errors a malformed contact raises while parsing, as opposed to bugs;
+# wrong-typed fields surface from ContactModel.from_map as TypeError/KeyError,
+# and bad values, including invalid UTF-8, as ValueError
+CONTACT_PARSE_ERRORS = (
+    json.JSONDecodeError,
+    AttributeError,
+    TypeError,
+    KeyError,
+    ValueError,
+)
+
+
+def _parse_contact(line) -> ContactModel:
+    # Bytes are decoded by json.loads, so invalid UTF-8 is a parse error too
+    contact = json.loads(line)
+    if isinstance(contact, str):
+        contact = json.loads(contact)
+    return ContactModel.from_map(contact)
+
+
+def stream_registered_contacts(
+    lines: Iterable, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Reads contacts from NDJSON lines, one contact map per line, matches them
+    in bounded chunks and yields each registered contact as an NDJSON line.
+    A malformed line ends the stream with a final `{"error": ...}` line,
+    after the matches of the contacts read before it.
+
+    The body is consumed after the request handler has returned, so the
+    stream runs in its own trace.
+    """
+    with trace("stream_registered_contacts"):
+        yield from _stream(lines, chunk_size)
+
+
+def _stream(lines: Iterable, chunk_size: int) -> Iterator[bytes]:
+    chunk: List[ContactModel] = []
+    received = 0
+    matched = 0
+
+    def flush() -> Iterator[bytes]:
+        nonlocal matched
+        for registered_contact in get_registered_contacts(chunk):
+            matched += 1
+            yield serialize(registered_contact) + b"\n"
+        chunk.clear()
+
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                with stage("parse"):
+                    chunk.append(_parse_contact(line))
+            except CONTACT_PARSE_ERRORS:
+                logger.warning("Failed to parse contact line %d", received + 1)
+                if chunk:
+                    yield from flush()
+                yield serialize({"error": "Invalid contacts data format"}) + b"\n"
+                return
+
+            received += 1
+            if len(chunk) >= chunk_size:
+                yield from flush()
+
+        if chunk:
+            yield from flush()
+
+        logger.info("Streamed %d registered contacts out of %d", matched, received)
+
+    except Exception:
+        logger.exception("Unexpected error while streaming contacts")
+        yield serialize({"error": "Internal server error"}) + b"\n"
@@ -0,0 +1,211 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from src.core.models.user_model import UserModel
+from src.contact.services.phone_matcher import PhoneMatcher
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads
+
+logger = get_logger(__name__)
+
+# Reload the directory from scratch at least this often, in case the listener
+# silently stopped delivering changes. The old directory keeps serving while
+# the new one loads.
+DIRECTORY_TTL_SECONDS = 12 * 60 * 60
+
+# Above this many users the directory stays off and contact sync falls back
+# to suffix queries, until a load after the TTL finds fewer
+DIRECTORY_MAX_USERS = 250_000
+
+# How long a background load waits for the listener's first snapshot
+INITIAL_LOAD_TIMEOUT_SECONDS = 120
+
+
+def _directory_user(doc_id: str, data: dict) -> UserModel:
+    return UserModel.from_map(
+        {
+            # Ties in the index are ordered by id, so every user needs one
+            "id": data.get("id") or doc_id,
+            "phone": data.get("phone", {}),
+            "photo": data.get("photo", ""),
+        }
+    )
+
+
+def _match_fields(user: UserModel) -> Tuple[str, str, str, str]:
+    phone = user.phone
+    return (phone.phone_number, phone.dial_code, phone.iso_code, user.photo)
+
+
+class _Listing:
+    """
+    Users and index kept current by one snapshot listener.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, UserModel] = {}
+        self.matcher = PhoneMatcher(())
+        self.ready = threading.Event()
+
+
+class UserDirectory:
+    """
+    In-process copy of the users collection, holding only id, phone and photo.
+    It is loaded in the background once per warm instance through a Firestore
+    snapshot listener, which then applies incremental changes to the index,
+    so steady-state contact syncs need no Firestore reads. Requests never
+    wait for a load; until the first one finishes they use the query path.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DIRECTORY_TTL_SECONDS,
+        max_users: int = DIRECTORY_MAX_USERS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+
+        self._lock = threading.Lock()
+        self._listing: Optional[_Listing] = None
+        self._watch = None
+        self._loaded_at = 0.0
+        self._loading: Optional[threading.Thread] = None
+        self._disabled_at: Optional[float] = None
+
+    def get_matcher(self) -> Optional[PhoneMatcher]:
+        """
+        Returns a matcher over every known user, or None if the directory is
+        disabled or not loaded yet. Starts a background load when there is
+        no directory or it has expired. A disabled directory is tried again
+        once the TTL has passed since it was disabled.
+        """
+        with self._lock:
+            if self._disabled_at is not None:
+                # The listener cannot unsubscribe itself from its own thread
+                self._stop()
+                if time.monotonic() - self._disabled_at <= self.ttl_seconds:
+                    return None
+                self._disabled_at = None
+            if self._loading is None and (self._listing is None or self._is_expired()):
+                self._loading = threading.Thread(
+                    target=self._load, name="user-directory-load", daemon=True
+                )
+                self._loading.start()
+            if self._listing is None:
+                return None
+            return self._listing.matcher
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for a background load to finish. Returns True if a directory is
+        being served.
+        """
+        with self._lock:
+            loading = self._loading
+        if loading is not None:
+            loading.join(timeout)
+        with self._lock:
+            return self._listing is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _is_expired(self) -> bool:
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def _load(self) -> None:
+        """
+        Starts a new listener and, once its first snapshot arrives, serves it
+        in place of the current one. Runs on its own thread.
+        """
+        watch = None
+        try:
+            users_ref = get_db().collection("users")
+            user_count = users_ref.count().get()[0][0].value
+            # A count is billed one read per 1000 index entries
+            record_reads(max(1, -(-user_count // 1000)))
+            if user_count > self.max_users:
+                logger.warning(
+                    "%d users exceeds limit of %d, directory disabled",
+                    user_count,
+                    self.max_users,
+                )
+                with self._lock:
+                    self._disabled_at = time.monotonic()
+                return
+
+            logger.info("Loading %d users", user_count)
+            listing = _Listing()
+            watch = users_ref.on_snapshot(
+                lambda docs, changes, read_time: self._on_snapshot(listing, changes)
+            )
+            # The listener's initial snapshot reads every user document
+            record_reads(user_count)
+            if not listing.ready.wait(INITIAL_LOAD_TIMEOUT_SECONDS):
+                logger.warning("Initial load timed out")
+                return
+
+            with self._lock:
+                if self._disabled_at is not None:
+                    return
+                previous = self._watch
+                self._listing = listing
+                self._watch, watch = watch, None
+                self._loaded_at = time.monotonic()
+            if previous is not None:
+                previous.unsubscribe()
+            logger.info("Loaded %d users", len(listing.matcher))
+        except Exception:
+            logger.exception("Could not load user directory")
+        finally:
+            if watch is not None:
+                watch.unsubscribe()
+            with self._lock:
+                self._loading = None
+
+    def _stop(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._listing = None
+
+    def _on_snapshot(self, listing: _Listing, changes) -> None:
+        """
+        Applies changes to the listing's index. Writes that leave a user's
+        phone and photo as they were, such as token updates, are skipped.
+        """
+        users = listing.users
+        matcher = listing.matcher
+        for change in changes:
+            doc = change.document
+            previous = users.get(doc.id)
+            if change.type.name == "REMOVED":
+                if previous is not None:
+                    matcher.remove(previous)
+                    del users[doc.id]
+                continue
+
+            user = _directory_user(doc.id, doc.to_dict() or {})
+            if previous is not None:
+                if _match_fields(previous) == _match_fields(user):
+                    continue
+                matcher.remove(previous)
+            users[doc.id] = user
+            matcher.add(user)
+
+        if len(users) > self.max_users:
+            logger.warning("Directory grew past %d users, disabling", self.max_users)
+            with self._lock:
+                self._disabled_at = time.monotonic()
+                if self._listing is listing:
+                    self._listing = None
+            listing.users = {}
+            listing.matcher = PhoneMatcher(())
+
+        listing.ready.set()
+
+
+# One directory per warm instance
+user_directory = UserDirectory()
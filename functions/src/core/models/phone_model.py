@@ -1,12 +1,27 @@
 import json
 from typing import Optional
+from src.core.utils.phone_normalizer import match_keys
 
 class Phone:
+    __slots__ = (
+        "iso_code",
+        "dial_code",
+        "phone_number",
+        "normalized",
+        "full_key",
+        "suffix_key",
+    )
+
     def __init__(self, iso_code: str, dial_code: str, phone_number: str):
         self.iso_code = iso_code
         self.dial_code = dial_code
         self.phone_number = phone_number
 
+        # Normalized once here so matching compares precomputed integer keys
+        self.normalized, self.full_key, self.suffix_key = match_keys(
+            phone_number, dial_code
+        )
+
     def copy_with(
         self,
         iso_code: Optional[str] = None,
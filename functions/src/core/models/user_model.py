@@ -4,6 +4,8 @@ from src.core.models.phone_model import Phone
 
 
 class UserModel:
+    __slots__ = ("id", "phone", "photo", "tokens")
+
     def __init__(
         self,
         id: str,
@@ -1,5 +1,40 @@
 from firebase_functions import https_fn
 import json
+from src.core.utils.logger import get_logger, log_payload
+from src.core.utils.tracing import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = get_logger(__name__)
+
+
+def _default_serializer(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, default=str).encode("utf-8")
+
+
+_serializer = _default_serializer
+
+
+def set_serializer(serializer) -> None:
+    """
+    Replaces the JSON serializer used for responses. It must take any
+    JSON-compatible value and return UTF-8 bytes. Passing None restores the
+    default, which uses orjson when it is installed.
+    """
+    global _serializer
+    _serializer = serializer or _default_serializer
+
+
+def serialize(data) -> bytes:
+    """
+    Serializes a value to JSON bytes with the configured serializer.
+    """
+    return _serializer(data)
 
 
 def create_response(data, status_code, error=False):
@@ -12,19 +47,16 @@ def create_response(data, status_code, error=False):
     Returns:
         https_fn.Response: A formatted HTTP response.
     """
-    print(f"[CREATE_RESPONSE] Creating response with status {status_code}")
-
-    # Log the input parameters
-    print(f"[CREATE_RESPONSE] Input data: {data}")
-    print(f"[CREATE_RESPONSE] Error flag: {error}")
-
     # Prepare the response data
     response_data = {"error": data} if error else {"data": data}
-    print(f"[CREATE_RESPONSE] Response payload: {response_data}")
+    log_payload(logger, "Response payload", response_data)
+
+    with stage("serialize"):
+        body = serialize(response_data)
 
     # Create the response
     response = https_fn.Response(
-        json.dumps(response_data),
+        body,
         status=status_code,
         headers={
             "Content-Type": "application/json",
@@ -32,5 +64,24 @@ def create_response(data, status_code, error=False):
         },
     )
 
-    print(f"[CREATE_RESPONSE] Response created successfully with status {status_code}")
+    logger.debug("Response created with status %d", status_code)
     return response
+
+
+def create_stream_response(lines, status_code=200):
+    """
+    Create a streaming NDJSON response.
+    Args:
+        lines (Iterable[bytes]): Newline-terminated JSON lines, produced lazily.
+        status_code (int): The HTTP status code of the response.
+    Returns:
+        https_fn.Response: A streaming HTTP response.
+    """
+    return https_fn.Response(
+        lines,
+        status=status_code,
+        headers={
+            "Content-Type": "application/x-ndjson",
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
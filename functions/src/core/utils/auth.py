@@ -0,0 +1,25 @@
+from typing import Optional
+from firebase_admin import auth, exceptions
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_BEARER_PREFIX = "Bearer "
+
+
+def verify_request_user(req) -> Optional[str]:
+    """
+    Returns the uid from the Firebase ID token in a request's
+    `Authorization: Bearer` header, or None if it is missing or cannot be
+    verified: malformed, expired or revoked tokens, disabled users, and
+    failures to fetch Google's signing certificates.
+    """
+    header = req.headers.get("Authorization", "")
+    if not header.startswith(_BEARER_PREFIX):
+        return None
+
+    try:
+        return auth.verify_id_token(header[len(_BEARER_PREFIX) :])["uid"]
+    except (ValueError, exceptions.FirebaseError) as e:
+        logger.warning("Rejected ID token: %s: %s", type(e).__name__, e)
+        return None
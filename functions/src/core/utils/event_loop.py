@@ -0,0 +1,44 @@
+import asyncio
+import contextvars
+import threading
+from typing import Any, Coroutine, Optional
+
+# One event loop per instance, kept running on a daemon thread so async
+# clients bound to it keep their connections between invocations
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Lazy start of the shared background event loop"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="tubonge-loop", daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
+async def _in_context(context: contextvars.Context, coro: Coroutine) -> Any:
+    return await asyncio.get_running_loop().create_task(coro, context=context)
+
+
+def run_coroutine(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Runs a coroutine on the shared event loop from synchronous code and
+    returns its result. The coroutine sees the caller's context variables,
+    such as the current trace. On timeout it is cancelled and TimeoutError
+    is raised.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        _in_context(contextvars.copy_context(), coro), get_event_loop()
+    )
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
@@ -0,0 +1,31 @@
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Firestore and FCM calls are I/O bound, so a small pool is enough to overlap
+# the independent stages of a single invocation
+MAX_WORKERS = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Lazy initialization of the shared thread pool"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS, thread_name_prefix="tubonge"
+                )
+    return _executor
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """
+    Runs `fn` on the shared thread pool and returns its future. `fn` sees
+    the caller's context variables, such as the current trace.
+    """
+    context = contextvars.copy_context()
+    return get_executor().submit(context.run, fn, *args, **kwargs)
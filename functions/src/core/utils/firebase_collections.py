@@ -1,15 +1,5 @@
 from google.cloud import firestore
-
-# Use lazy initialization to avoid deployment timeouts
-_db = None
-
-
-def get_db():
-    """Lazy initialization of Firestore client"""
-    global _db
-    if _db is None:
-        _db = firestore.Client()
-    return _db
+from src.core.utils.firestore_client import get_db
 
 
 class FirebaseCollections:
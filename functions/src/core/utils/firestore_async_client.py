@@ -0,0 +1,26 @@
+import threading
+from firebase_admin import firestore_async
+
+# One async Firestore client per instance, used only on the shared event loop
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_async_db():
+    """Thread-safe lazy initialization of the shared async Firestore client"""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = firestore_async.client()
+    return _db
+
+
+def set_async_db(client) -> None:
+    """
+    Replaces the shared async Firestore client, e.g. with a fake. Passing
+    None restores lazy initialization of the real client.
+    """
+    global _db
+    with _db_lock:
+        _db = client
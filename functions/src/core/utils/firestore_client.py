@@ -0,0 +1,27 @@
+import threading
+from firebase_admin import firestore
+
+# One Firestore client, and so one gRPC channel, per instance
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """Thread-safe lazy initialization of the shared Firestore client"""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                # Honors FIRESTORE_EMULATOR_HOST when running against the emulator
+                _db = firestore.client()
+    return _db
+
+
+def set_db(client) -> None:
+    """
+    Replaces the shared Firestore client, e.g. with a fake or emulator client.
+    Passing None restores lazy initialization of the real client.
+    """
+    global _db
+    with _db_lock:
+        _db = client
@@ -0,0 +1,30 @@
+import importlib
+import sys
+import time
+from types import ModuleType
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def timed_import(module_name: str) -> ModuleType:
+    """
+    Imports a module and logs how long it took, or returns it straight away
+    if it is already loaded. Function entry points use it to defer their
+    handler's dependencies to the first invocation.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None and not getattr(module.__spec__, "_initializing", False):
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    logger.info(
+        "Imported %s in %.1f ms",
+        module_name,
+        elapsed_ms,
+        extra={"fields": {"module": module_name, "importMs": round(elapsed_ms, 1)}},
+    )
+    return module
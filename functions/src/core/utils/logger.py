@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+
+# Production runs at INFO; set LOG_LEVEL=DEBUG to get payload dumps
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Longest rendered payload, in characters, before it is cut off
+PAYLOAD_LOG_LIMIT = int(os.environ.get("LOG_PAYLOAD_LIMIT", "2000"))
+
+# Fraction of debug-level payload dumps that are actually emitted
+DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+_ROOT_LOGGER = "tubonge"
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _StructuredFormatter(logging.Formatter):
+    """
+    Renders records as single-line JSON, which Cloud Logging parses into
+    structured entries with the right severity.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "severity": record.levelname,
+            "message": record.getMessage(),
+            "logger": record.name,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _configure() -> None:
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_StructuredFormatter())
+        root = logging.getLogger(_ROOT_LOGGER)
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns a structured logger for a module. Use %-style arguments so
+    messages are only formatted when the level is enabled.
+    """
+    if not _configured:
+        _configure()
+    return logging.getLogger(f"{_ROOT_LOGGER}.{name}")
+
+
+class Payload:
+    """
+    Defers serializing a payload until a log record is actually emitted,
+    and caps the rendered size.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit: int = PAYLOAD_LOG_LIMIT):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = (
+            self.value
+            if isinstance(self.value, str)
+            else json.dumps(self.value, default=str)
+        )
+        if len(text) > self.limit:
+            return f"{text[: self.limit]}... ({len(text)} chars)"
+        return text
+
+
+def log_payload(logger: logging.Logger, message: str, payload) -> None:
+    """
+    Logs a payload dump at debug level, subject to sampling. Nothing is
+    serialized unless debug logging is enabled and the dump is sampled.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if DEBUG_SAMPLE_RATE < 1.0 and random.random() >= DEBUG_SAMPLE_RATE:
+        return
+    logger.debug("%s: %s", message, Payload(payload))
@@ -0,0 +1,24 @@
+import threading
+from firebase_admin import messaging
+
+# The firebase_admin messaging module unless a fake has been installed
+_messaging = messaging
+_messaging_lock = threading.Lock()
+
+
+def get_messaging():
+    """
+    Returns the FCM client used to send notifications. It only has to provide
+    `send_each_for_multicast`.
+    """
+    return _messaging
+
+
+def set_messaging(client) -> None:
+    """
+    Replaces the FCM client, e.g. with a fake. Passing None restores the
+    firebase_admin messaging module.
+    """
+    global _messaging
+    with _messaging_lock:
+        _messaging = client or messaging
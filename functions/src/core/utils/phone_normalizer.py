@@ -0,0 +1,92 @@
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+SUFFIX_LENGTH = 7
+
+# E.164 allows at most 15 digits; national numbers are at least 8 digits
+# once the country code is stripped
+_MIN_NATIONAL_LENGTH = 8
+_MAX_E164_LENGTH = 15
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+@lru_cache(maxsize=100_000)
+def normalize_phone_number(phone_number: str, dial_code: str = "") -> str:
+    """
+    Converts a phone number to canonical E.164 digits, without the leading
+    "+". Spaces, dashes and other punctuation are dropped, "00" international
+    prefixes are removed, and national numbers, with or without a leading
+    "0" trunk prefix, get the dial code prepended. Without a dial code the
+    digits are returned as they are. Numbers that end up longer than E.164
+    allows normalize to "", so they never match.
+    """
+    normalized = _normalize(phone_number, dial_code)
+    if len(normalized) > _MAX_E164_LENGTH:
+        return ""
+    return normalized
+
+
+def _normalize(phone_number: str, dial_code: str) -> str:
+    raw = (phone_number or "").strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if not digits:
+        return ""
+
+    if raw.startswith("+"):
+        return digits
+    if digits.startswith("00"):
+        return digits[2:]
+
+    country_code = _NON_DIGITS.sub("", dial_code or "")
+    if not country_code:
+        return digits
+
+    if digits.startswith("0"):
+        return country_code + digits[1:]
+    if (
+        digits.startswith(country_code)
+        and len(digits) >= len(country_code) + _MIN_NATIONAL_LENGTH
+    ):
+        # Already international, just missing the "+"
+        return digits
+    return country_code + digits
+
+
+def full_key(normalized: str) -> Optional[int]:
+    """
+    Returns the integer match key for a whole normalized number.
+    """
+    if not normalized:
+        return None
+    # The leading 1 keeps leading zeros significant
+    return int("1" + normalized)
+
+
+def suffix_key(normalized: str) -> Optional[int]:
+    """
+    Returns the integer match key for the last 7 digits of a normalized
+    number, or None if it is too short.
+    """
+    if len(normalized) < SUFFIX_LENGTH:
+        return None
+    return int(normalized[-SUFFIX_LENGTH:])
+
+
+def format_suffix_key(key: int) -> str:
+    """
+    Renders a suffix key back as its 7 digits.
+    """
+    return f"{key:0{SUFFIX_LENGTH}d}"
+
+
+@lru_cache(maxsize=100_000)
+def match_keys(
+    phone_number: str, dial_code: str = ""
+) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Returns (normalized, full key, suffix key) for a phone number.
+    """
+    normalized = normalize_phone_number(phone_number, dial_code)
+    return normalized, full_key(normalized), suffix_key(normalized)
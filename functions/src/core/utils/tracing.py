@@ -0,0 +1,224 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Set TRACE_HISTOGRAMS=1 to keep per-stage latency histograms in process
+HISTOGRAMS_ENABLED = os.environ.get("TRACE_HISTOGRAMS", "") == "1"
+
+# With histograms on, every Nth summary record also carries a snapshot
+HISTOGRAM_LOG_EVERY = int(os.environ.get("TRACE_HISTOGRAM_LOG_EVERY", "100"))
+
+# Upper bounds of the histogram buckets, in milliseconds
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Stage name under which histograms record a whole invocation
+TOTAL_STAGE = "total"
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("tubonge_trace", default=None)
+
+
+class Trace:
+    """
+    Stage timings and Firestore operation counts of one invocation. Stages
+    that run more than once, or on several threads, add up.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+
+    def add_ops(self, reads: int = 0, writes: int = 0) -> None:
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "trace": self.name,
+                "durationMs": round(self.elapsed_ms(), 1),
+                "stagesMs": {
+                    stage: round(elapsed_ms, 1)
+                    for stage, elapsed_ms in self.stages.items()
+                },
+                "firestoreReads": self.reads,
+                "firestoreWrites": self.writes,
+            }
+
+
+class _Histogram:
+    __slots__ = ("counts", "total_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.total_ms = 0.0
+
+    def add(self, elapsed_ms: float) -> None:
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+        self.total_ms += elapsed_ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Returns the upper bound of the bucket holding the given percentile,
+        or None if it falls in the overflow bucket.
+        """
+        rank = fraction * sum(self.counts)
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, object]:
+        count = sum(self.counts)
+        return {
+            "count": count,
+            "meanMs": round(self.total_ms / count, 1) if count else None,
+            "p50Ms": self.percentile(0.5),
+            "p95Ms": self.percentile(0.95),
+            "p99Ms": self.percentile(0.99),
+            "buckets": dict(
+                zip(
+                    [str(bound) for bound in HISTOGRAM_BOUNDS_MS] + ["+Inf"],
+                    self.counts,
+                )
+            ),
+        }
+
+
+_histograms: Dict[str, Dict[str, _Histogram]] = {}
+_histograms_lock = threading.Lock()
+_traces_since_snapshot = 0
+
+
+def _record_histograms(trace: Trace, total_ms: float) -> bool:
+    """
+    Adds a finished trace to the histograms. Returns True when its summary
+    should carry a snapshot.
+    """
+    global _traces_since_snapshot
+    with _histograms_lock:
+        stages = _histograms.setdefault(trace.name, {})
+        for stage, elapsed_ms in list(trace.stages.items()) + [(TOTAL_STAGE, total_ms)]:
+            histogram = stages.get(stage)
+            if histogram is None:
+                histogram = stages[stage] = _Histogram()
+            histogram.add(elapsed_ms)
+        _traces_since_snapshot += 1
+        if _traces_since_snapshot >= HISTOGRAM_LOG_EVERY:
+            _traces_since_snapshot = 0
+            return True
+        return False
+
+
+def histogram_snapshot(reset: bool = False) -> Dict[str, Dict[str, object]]:
+    """
+    Returns the latency histograms of every trace and stage seen by this
+    instance, optionally starting new ones.
+    """
+    with _histograms_lock:
+        snapshot = {
+            name: {stage: histogram.snapshot() for stage, histogram in stages.items()}
+            for name, stages in _histograms.items()
+        }
+        if reset:
+            _histograms.clear()
+        return snapshot
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def trace(name: str):
+    """
+    Traces an invocation and logs one structured summary record when it
+    ends, with its duration, stage timings and Firestore read/write counts.
+    """
+    current = Trace(name)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+        summary = current.summary()
+        if HISTOGRAMS_ENABLED and _record_histograms(current, summary["durationMs"]):
+            summary["histograms"] = histogram_snapshot()
+        logger.info(
+            "Trace %s took %.1f ms",
+            name,
+            summary["durationMs"],
+            extra={"fields": summary},
+        )
+
+
+def traced(name: str):
+    """
+    Decorates an entry point so each call runs in its own trace.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a named stage of the current trace. Does nothing outside a trace.
+    """
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add_stage(name, (time.perf_counter() - started) * 1000)
+
+
+def record_reads(count: int = 1) -> None:
+    """
+    Counts billed Firestore document reads against the current trace. A
+    query that returns nothing is still billed one read.
+    """
+    current = _current.get()
+    if current is not None:
+        current.add_ops(reads=count)
+
+
+def record_writes(count: int = 1) -> None:
+    """
+    Counts Firestore document writes against the current trace.
+    """
+    current = _current.get()
+    if current is not None:
+        current.add_ops(writes=count)
@@ -0,0 +1,19 @@
+from firebase_functions import tasks_fn
+from firebase_functions.options import RateLimits, RetryConfig
+from src.core.utils.import_timing import timed_import
+
+# Loaded on the first task, so a cold start only pays for the decorator
+_HANDLER_MODULE = "src.message.services.notification_queue"
+
+
+@tasks_fn.on_task_dispatched(
+    retry_config=RetryConfig(max_attempts=3, min_backoff_seconds=5),
+    rate_limits=RateLimits(max_concurrent_dispatches=100),
+)
+def flush_notifications(req: tasks_fn.CallableRequest) -> None:
+    """
+    Sends the coalesced notification for a (sender, receiver) queue once its
+    window has passed. Enqueued by the message that opened the window.
+    """
+    handler = timed_import(_HANDLER_MODULE)
+    handler.flush_notification_queue(req.data["queueId"])
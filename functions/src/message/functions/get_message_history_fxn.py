@@ -0,0 +1,17 @@
+from firebase_functions import https_fn
+from src.core.utils.import_timing import timed_import
+
+# Loaded on the first request, so a cold start only pays for the decorator
+_HANDLER_MODULE = "src.message.services.handle_message_history_request"
+
+
+@https_fn.on_request()
+def get_message_history(req: https_fn.Request) -> https_fn.Response:
+    """
+    HTTP function for paging back through a chat. Takes a bearer ID token
+    and `{"data": {"chatId", "pageSize"?, "cursor"?}}`, and returns up to
+    `pageSize` messages, newest first, with the `nextCursor` to pass for
+    the older page. `nextCursor` is null on the last page.
+    """
+    handler = timed_import(_HANDLER_MODULE)
+    return handler.handle_message_history_request(req)
@@ -0,0 +1,17 @@
+from firebase_functions import https_fn
+from src.core.utils.import_timing import timed_import
+
+# Loaded on the first request, so a cold start only pays for the decorator
+_HANDLER_MODULE = "src.message.services.handle_message_receipts_request"
+
+
+@https_fn.on_request()
+def update_message_receipts(req: https_fn.Request) -> https_fn.Response:
+    """
+    HTTP function for bulk delivered/seen receipts. Takes a bearer ID token
+    and `{"data": {"chatId", "status", "upTo" | "messageIds"}}`, and updates
+    both copies of each message in batched writes. `more: true` in the
+    response means the request hit the per-call cap and should be repeated.
+    """
+    handler = timed_import(_HANDLER_MODULE)
+    return handler.handle_message_receipts_request(req)
@@ -16,10 +16,14 @@ class MessageType(Enum):
 
     @staticmethod
     def to_type(string):
-        try:
-            return MessageType[string]
-        except KeyError as e:
-            raise ValueError(f"Unknown MessageType: {string}") from e
+        message_type = _MESSAGE_TYPES.get(string)
+        if message_type is None:
+            raise ValueError(f"Unknown MessageType: {string}")
+        return message_type
+
+
+# Precomputed name lookups, cheaper than Enum[...] with a try/except
+_MESSAGE_TYPES = {message_type.name: message_type for message_type in MessageType}
 
 
 class MessageStatus(Enum):
@@ -37,13 +41,20 @@ class MessageStatus(Enum):
 
     @staticmethod
     def to_type(string):
-        try:
-            return MessageStatus[string]
-        except KeyError as e:
-            raise ValueError(f"Unknown MessageStatus: {string}") from e
+        message_status = _MESSAGE_STATUSES.get(string)
+        if message_status is None:
+            raise ValueError(f"Unknown MessageStatus: {string}")
+        return message_status
+
+
+_MESSAGE_STATUSES = {
+    message_status.name: message_status for message_status in MessageStatus
+}
 
 
 class Message(ABC):
+    __slots__ = ("id", "sender", "receiver", "type", "status", "time_sent")
+
     def __init__(self, id, sender, receiver, type, status, time_sent):
         self.id = id
         self.sender = sender
@@ -79,6 +90,8 @@ class Message(ABC):
 
 
 class TextMessage(Message):
+    __slots__ = ("text",)
+
     def __init__(self, text, id, sender, receiver, status, time_sent):
         super().__init__(id, sender, receiver, MessageType.text, status, time_sent)
         self.text = text
@@ -0,0 +1,182 @@
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+from google.cloud.firestore_v1.base_query import FieldFilter
+from src.message.models.message import MessageStatus
+from src.message.services.chat_summary import add_unread_reset
+from src.core.utils.firebase_collections import FirebaseCollections
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads, record_writes
+
+logger = get_logger(__name__)
+
+# Firestore commits at most this many writes in one batch
+MAX_BATCH_WRITES = 500
+
+# Most messages one receipt updates; clients send another for the rest
+MAX_RECEIPT_MESSAGES = 2000
+
+# Receipts only ever move a message forward through these statuses
+_STATUS_RANKS = {
+    MessageStatus.none: 0,
+    MessageStatus.sent: 1,
+    MessageStatus.delivered: 2,
+    MessageStatus.seen: 3,
+}
+
+RECEIPT_STATUSES = (MessageStatus.delivered, MessageStatus.seen)
+
+
+class ReceiptResult:
+    def __init__(self, updated: int, commits: int, has_more: bool):
+        self.updated = updated
+        self.commits = commits
+        self.has_more = has_more
+
+
+def _rank(status_value: Optional[str]) -> int:
+    try:
+        return _STATUS_RANKS[MessageStatus.to_type(status_value)]
+    except ValueError:
+        return 0
+
+
+def _pending_up_to(
+    receiver: str, chat_id: str, status: MessageStatus, up_to: datetime
+) -> List:
+    """
+    Returns the receiver's copies of messages from `chat_id` sent at or
+    before `up_to` that are still below `status`, oldest first.
+    """
+    lower = [
+        s.value for s, rank in _STATUS_RANKS.items() if rank < _STATUS_RANKS[status]
+    ]
+    query = (
+        FirebaseCollections.messages(receiver, chat_id)
+        .where(filter=FieldFilter("sender", "==", chat_id))
+        .where(filter=FieldFilter("status", "in", lower))
+        .where(filter=FieldFilter("timeSent", "<=", up_to))
+        .order_by("timeSent")
+        .limit(MAX_RECEIPT_MESSAGES + 1)
+    )
+    snapshots = list(query.stream())
+    record_reads(max(1, len(snapshots)))
+    return snapshots
+
+
+def _pending_by_id(
+    receiver: str, chat_id: str, status: MessageStatus, message_ids: List[str]
+) -> List:
+    """
+    Returns the receiver's copies of the given messages from `chat_id` that
+    are still below `status`.
+    """
+    messages_ref = FirebaseCollections.messages(receiver, chat_id)
+    references = [
+        messages_ref.document(message_id)
+        for message_id in list(dict.fromkeys(message_ids))[: MAX_RECEIPT_MESSAGES + 1]
+    ]
+    snapshots = list(get_db().get_all(references, field_paths=["sender", "status"]))
+    record_reads(len(snapshots))
+    return [
+        snapshot
+        for snapshot in snapshots
+        if snapshot.exists
+        and (snapshot.to_dict() or {}).get("sender") == chat_id
+        and _rank(snapshot.to_dict().get("status")) < _STATUS_RANKS[status]
+    ]
+
+
+def commit_updates(
+    updates: List[Tuple[object, Dict]], add_final: Optional[Callable] = None
+) -> int:
+    """
+    Applies (reference, fields) updates in as few batches as the Firestore
+    batch limit allows. `add_final` adds one more write to the last batch.
+    Returns the number of commits.
+    """
+    chunks = [
+        updates[start : start + MAX_BATCH_WRITES]
+        for start in range(0, len(updates), MAX_BATCH_WRITES)
+    ]
+    if add_final is not None and (not chunks or len(chunks[-1]) == MAX_BATCH_WRITES):
+        chunks.append([])
+
+    for index, chunk in enumerate(chunks):
+        batch = get_db().batch()
+        for reference, fields in chunk:
+            batch.update(reference, fields)
+        if add_final is not None and index == len(chunks) - 1:
+            add_final(batch)
+        writes = len(batch)
+        batch.commit()
+        record_writes(writes)
+    return len(chunks)
+
+
+def apply_receipts(
+    receiver: str,
+    chat_id: str,
+    status: MessageStatus,
+    up_to: Optional[datetime] = None,
+    message_ids: Optional[List[str]] = None,
+) -> ReceiptResult:
+    """
+    Raises the status of messages `chat_id` sent to `receiver`, selected by
+    a `timeSent` high-water mark or by id, on both the receiver's and the
+    sender's copies. Statuses are never lowered, and copies the sender
+    deleted are skipped. A seen receipt also clears the receiver's unread
+    count for the chat.
+    """
+    if up_to is not None:
+        pending = _pending_up_to(receiver, chat_id, status, up_to)
+    else:
+        pending = _pending_by_id(receiver, chat_id, status, message_ids or [])
+
+    has_more = len(pending) > MAX_RECEIPT_MESSAGES
+    pending = pending[:MAX_RECEIPT_MESSAGES]
+
+    reset_unread = None
+    if status is MessageStatus.seen:
+        # Also sent when nothing is pending, so a drifted count heals itself
+        reset_unread = partial(add_unread_reset, user_id=receiver, chat_id=chat_id)
+    elif not pending:
+        return ReceiptResult(updated=0, commits=0, has_more=False)
+
+    # The sender's copies may have moved on, e.g. through older clients
+    sender_messages_ref = FirebaseCollections.messages(chat_id, receiver)
+    sender_copies = {}
+    if pending:
+        sender_copies = {
+            snapshot.id: snapshot
+            for snapshot in get_db().get_all(
+                [sender_messages_ref.document(snapshot.id) for snapshot in pending],
+                field_paths=["status"],
+            )
+        }
+        record_reads(len(sender_copies))
+
+    fields = {"status": status.value}
+    updates = []
+    for snapshot in pending:
+        updates.append((snapshot.reference, fields))
+        sender_copy = sender_copies.get(snapshot.id)
+        if (
+            sender_copy is not None
+            and sender_copy.exists
+            and _rank((sender_copy.to_dict() or {}).get("status"))
+            < _STATUS_RANKS[status]
+        ):
+            updates.append((sender_copy.reference, fields))
+
+    commits = commit_updates(updates, reset_unread)
+    logger.info(
+        "Marked %d messages from %s to %s as %s in %d commits",
+        len(pending),
+        chat_id,
+        receiver,
+        status.value,
+        commits,
+    )
+    return ReceiptResult(updated=len(pending), commits=commits, has_more=has_more)
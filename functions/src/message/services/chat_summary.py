@@ -0,0 +1,51 @@
+from google.cloud.firestore_v1 import transforms
+from src.message.models.message import TextMessage
+from src.core.utils.firebase_collections import FirebaseCollections
+
+# Longest message text kept in a chat summary; inboxes only show a line
+PREVIEW_MAX_CHARS = 100
+
+
+def _summary_ref(user_id: str, chat_id: str):
+    return FirebaseCollections.chats(user_id).document(chat_id)
+
+
+def add_summary_updates(batch, message: TextMessage) -> None:
+    """
+    Adds the chat summary updates for a new message to a write batch. Both
+    users' `users/{uid}/chats/{chatId}` documents get the message as their
+    last message, and the receiver's unread count goes up by one.
+    Summaries are merged blindly, so a trigger that runs late for an older
+    message can briefly show it as the last one until the next message.
+    """
+    last_message = {
+        "lastMessage": {
+            "id": message.id,
+            "sender": message.sender,
+            "text": message.text[:PREVIEW_MAX_CHARS],
+            "timeSent": message.time_sent,
+        },
+        "updatedAt": message.time_sent,
+    }
+    # The app builds chats from `chatId`, the other user's id
+    batch.set(
+        _summary_ref(message.sender, message.receiver),
+        {**last_message, "chatId": message.receiver},
+        merge=True,
+    )
+    batch.set(
+        _summary_ref(message.receiver, message.sender),
+        {
+            **last_message,
+            "chatId": message.sender,
+            "unreadCount": transforms.Increment(1),
+        },
+        merge=True,
+    )
+
+
+def add_unread_reset(batch, user_id: str, chat_id: str) -> None:
+    """
+    Adds the reset of a user's unread count for a chat to a write batch.
+    """
+    batch.set(_summary_ref(user_id, chat_id), {"unreadCount": 0}, merge=True)
@@ -1,5 +1,9 @@
-from firebase_admin import firestore
 from src.message.models.message import Message
+from src.message.services.deliver_message import add_copy_for_receiver
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def create_copy_for_receiver(message: Message) -> None:
@@ -7,31 +11,13 @@ def create_copy_for_receiver(message: Message) -> None:
     Creates a copy of a message for the receiver in their chat collection.
     """
     try:
-        print(f"[CREATE_COPY] Creating copy for receiver {message.receiver}")
-
-        db = firestore.client()
-
-        # Create the copy in receiver's chat
-        receiver_chat_ref = (
-            db.collection("users")
-            .document(message.receiver)
-            .collection("chats")
-            .document(message.sender)
-        )
-
-        # Add the message to the receiver's chat
-        receiver_chat_ref.collection("messages").document(message.id).set(
-            message.to_map()
-        )
+        logger.info("Creating copy for receiver %s", message.receiver)
 
-        print(
-            f"[CREATE_COPY] Successfully created copy for receiver {message.receiver}"
-        )
+        batch = get_db().batch()
+        add_copy_for_receiver(batch, message)
+        batch.commit()
 
-    except Exception as e:
-        print(
-            f"[CREATE_COPY] Error creating copy for receiver {message.receiver}: {str(e)}"
-        )
-        import traceback
+        logger.info("Successfully created copy for receiver %s", message.receiver)
 
-        print(f"[CREATE_COPY] Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("Error creating copy for receiver %s", message.receiver)
@@ -0,0 +1,84 @@
+from enum import Enum
+from typing import Optional
+from google.api_core.exceptions import AlreadyExists
+from src.message.models.message import Message, MessageStatus
+from src.message.services.chat_summary import add_summary_updates
+from src.message.services.processed_messages import add_processed_marker
+from src.core.utils.firebase_collections import FirebaseCollections
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_writes, stage
+
+logger = get_logger(__name__)
+
+
+class DeliveryResult(Enum):
+    delivered = "delivered"
+    duplicate = "duplicate"
+    failed = "failed"
+
+
+def add_copy_for_receiver(batch, message: Message) -> None:
+    """
+    Adds the receiver's copy of a message to a write batch.
+    """
+    receiver_message_ref = FirebaseCollections.messages(
+        message.receiver, message.sender
+    ).document(message.id)
+    batch.set(receiver_message_ref, message.to_map())
+
+
+def add_status_update(batch, message: Message, new_status: MessageStatus) -> None:
+    """
+    Adds a status update of the sender's copy of a message to a write batch.
+    """
+    sender_message_ref = FirebaseCollections.messages(
+        message.sender, message.receiver
+    ).document(message.id)
+    batch.update(sender_message_ref, {"status": new_status.value})
+
+
+def deliver_message(
+    message: Message,
+    new_status: MessageStatus,
+    marker_key: Optional[str] = None,
+    event_id: Optional[str] = None,
+) -> DeliveryResult:
+    """
+    Creates the receiver's copy of a message, updates the sender's copy to
+    `new_status` and updates both users' chat summaries in a single atomic
+    batch. With `marker_key`, the batch also creates the message's processed
+    marker, so it only commits once per message and a repeat reports a
+    duplicate.
+    """
+    try:
+        logger.info(
+            "Delivering message %s to %s with status %s",
+            message.id,
+            message.receiver,
+            new_status.value,
+        )
+
+        batch = get_db().batch()
+
+        add_copy_for_receiver(batch, message.copy_with(status=new_status))
+        add_status_update(batch, message, new_status)
+        add_summary_updates(batch, message)
+        if marker_key is not None:
+            add_processed_marker(batch, marker_key, event_id)
+
+        writes = len(batch)
+        with stage("deliver_write"):
+            batch.commit()
+        record_writes(writes)
+
+        logger.info("Successfully delivered message %s", message.id)
+        return DeliveryResult.delivered
+
+    except AlreadyExists:
+        logger.info("Message %s was already delivered", message.id)
+        return DeliveryResult.duplicate
+
+    except Exception:
+        logger.exception("Error delivering message %s", message.id)
+        return DeliveryResult.failed
@@ -1,5 +1,10 @@
-from firebase_admin import firestore
 from typing import Tuple, List, Optional
+from src.message.services.token_cache import cache_tokens, get_cached_tokens
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads, stage
+
+logger = get_logger(__name__)
 
 
 def get_tokens(user_id: str) -> Tuple[List[str], Optional[str], Optional[str]]:
@@ -8,13 +13,20 @@ def get_tokens(user_id: str) -> Tuple[List[str], Optional[str], Optional[str]]:
     Returns a tuple of (tokens, phone_number, photo).
     """
     try:
-        print(f"[GET_TOKENS] Fetching tokens for user: {user_id}")
+        cached = get_cached_tokens(user_id)
+        if cached is not None:
+            logger.debug("Using cached tokens for user: %s", user_id)
+            return cached
+
+        logger.info("Fetching tokens for user: %s", user_id)
 
-        db = firestore.client()
-        user_doc = db.collection("users").document(user_id).get()
+        db = get_db()
+        with stage("token_read"):
+            user_doc = db.collection("users").document(user_id).get()
+        record_reads()
 
         if not user_doc.exists:
-            print(f"[GET_TOKENS] User document not found for user: {user_id}")
+            logger.warning("User document not found for user: %s", user_id)
             return [], None, None
 
         user_data = user_doc.to_dict()
@@ -23,14 +35,12 @@ def get_tokens(user_id: str) -> Tuple[List[str], Optional[str], Optional[str]]:
         phone_number = phone_data.get("phoneNumber") if phone_data else None
         photo = user_data.get("photo")
 
-        print(f"[GET_TOKENS] Found {len(tokens)} tokens for user {user_id}")
-        print(f"[GET_TOKENS] Phone number: {phone_number}, Photo: {photo}")
+        logger.info("Found %d tokens for user %s", len(tokens), user_id)
+        logger.debug("Phone number: %s, Photo: %s", phone_number, photo)
 
+        cache_tokens(user_id, (tokens, phone_number, photo))
         return tokens, phone_number, photo
 
-    except Exception as e:
-        print(f"[GET_TOKENS] Error fetching tokens for user {user_id}: {str(e)}")
-        import traceback
-
-        print(f"[GET_TOKENS] Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("Error fetching tokens for user %s", user_id)
         return [], None, None
@@ -0,0 +1,65 @@
+from firebase_functions import https_fn
+
+from src.message.services.message_history import (
+    DEFAULT_PAGE_SIZE,
+    CursorError,
+    get_message_history,
+)
+from src.core.services.create_response import create_response
+from src.core.utils.auth import verify_request_user
+from src.core.utils.logger import get_logger, log_payload
+from src.core.utils.tracing import traced
+
+logger = get_logger(__name__)
+
+
+@traced("get_message_history")
+def handle_message_history_request(req: https_fn.Request) -> https_fn.Response:
+    """
+    Returns a page of the signed-in user's messages in a chat, newest
+    first, with a `nextCursor` for the page before it.
+    """
+    try:
+        if req.method != "POST":
+            logger.warning("Invalid request method: %s. Expected POST", req.method)
+            return create_response(
+                {"error": f"Invalid request method: {req.method}. Expected POST"}, 405
+            )
+
+        user_id = verify_request_user(req)
+        if user_id is None:
+            return create_response({"error": "Unauthorized"}, 401)
+
+        request_json = req.get_json(silent=True) or {}
+        data = request_json.get("data")
+        if not isinstance(data, dict):
+            logger.warning("Missing 'data' in request JSON")
+            return create_response({"error": "Missing 'data' in request JSON"}, 400)
+
+        log_payload(logger, "History request data", data)
+
+        chat_id = data.get("chatId")
+        if not isinstance(chat_id, str) or not chat_id:
+            return create_response({"error": "Invalid 'chatId'"}, 400)
+
+        page_size = data.get("pageSize", DEFAULT_PAGE_SIZE)
+        if isinstance(page_size, bool) or not isinstance(page_size, int):
+            return create_response({"error": "Invalid 'pageSize'"}, 400)
+
+        cursor = data.get("cursor")
+        if cursor is not None and not isinstance(cursor, str):
+            return create_response({"error": "Invalid 'cursor'"}, 400)
+
+        try:
+            page = get_message_history(user_id, chat_id, page_size, cursor)
+        except CursorError:
+            logger.info("Rejected history cursor", exc_info=True)
+            return create_response({"error": "Invalid 'cursor'"}, 400)
+
+        return create_response(
+            {"messages": page.messages, "nextCursor": page.next_cursor}, 200
+        )
+
+    except Exception:
+        logger.exception("Unexpected error")
+        return create_response({"error": "Internal server error"}, 500)
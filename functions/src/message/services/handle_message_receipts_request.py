@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from typing import Optional
+from firebase_functions import https_fn
+
+from src.message.models.message import MessageStatus
+from src.message.services.apply_receipts import (
+    MAX_RECEIPT_MESSAGES,
+    RECEIPT_STATUSES,
+    apply_receipts,
+)
+from src.core.services.create_response import create_response
+from src.core.utils.auth import verify_request_user
+from src.core.utils.logger import get_logger, log_payload
+from src.core.utils.tracing import traced
+
+logger = get_logger(__name__)
+
+
+def _parse_up_to(value) -> Optional[datetime]:
+    """
+    Parses a `timeSent` high-water mark given as epoch milliseconds or an
+    ISO 8601 string. Naive times are taken as UTC.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid upTo: {value}")
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+    raise ValueError(f"Invalid upTo: {value}")
+
+
+@traced("update_message_receipts")
+def handle_message_receipts_request(req: https_fn.Request) -> https_fn.Response:
+    """
+    Marks the messages a chat partner sent to the signed-in user as
+    delivered or seen, either everything sent up to `upTo` or the listed
+    `messageIds`, on both users' copies.
+    """
+    try:
+        if req.method != "POST":
+            logger.warning("Invalid request method: %s. Expected POST", req.method)
+            return create_response(
+                {"error": f"Invalid request method: {req.method}. Expected POST"}, 405
+            )
+
+        receiver = verify_request_user(req)
+        if receiver is None:
+            return create_response({"error": "Unauthorized"}, 401)
+
+        request_json = req.get_json(silent=True) or {}
+        data = request_json.get("data")
+        if not isinstance(data, dict):
+            logger.warning("Missing 'data' in request JSON")
+            return create_response({"error": "Missing 'data' in request JSON"}, 400)
+
+        log_payload(logger, "Receipt request data", data)
+
+        chat_id = data.get("chatId")
+        if not isinstance(chat_id, str) or not chat_id or chat_id == receiver:
+            return create_response({"error": "Invalid 'chatId'"}, 400)
+
+        try:
+            status = MessageStatus.to_type(data.get("status"))
+        except ValueError:
+            status = None
+        if status not in RECEIPT_STATUSES:
+            return create_response(
+                {"error": "'status' must be 'delivered' or 'seen'"}, 400
+            )
+
+        up_to = None
+        message_ids = data.get("messageIds")
+        if data.get("upTo") is not None:
+            try:
+                up_to = _parse_up_to(data["upTo"])
+            except ValueError:
+                return create_response({"error": "Invalid 'upTo'"}, 400)
+        elif not isinstance(message_ids, list) or not all(
+            isinstance(message_id, str) and message_id for message_id in message_ids
+        ):
+            return create_response(
+                {"error": "Expected 'upTo' or a list of 'messageIds'"}, 400
+            )
+        elif len(message_ids) > MAX_RECEIPT_MESSAGES:
+            return create_response(
+                {"error": f"At most {MAX_RECEIPT_MESSAGES} 'messageIds' per request"},
+                400,
+            )
+
+        result = apply_receipts(
+            receiver, chat_id, status, up_to=up_to, message_ids=message_ids
+        )
+        return create_response(
+            {"updated": result.updated, "more": result.has_more}, 200
+        )
+
+    except Exception:
+        logger.exception("Unexpected error")
+        return create_response({"error": "Internal server error"}, 500)
@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from google.cloud.firestore_v1 import Query
+from google.cloud.firestore_v1.field_path import FieldPath
+from src.core.utils.firebase_collections import FirebaseCollections
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads
+
+logger = get_logger(__name__)
+
+# Messages per page when the client does not ask for a size, and the most
+# it may ask for; each page costs this many reads at most
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Fields returned for each message; anything else stays in Firestore
+HISTORY_FIELDS = ["id", "sender", "receiver", "type", "status", "text", "timeSent"]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class CursorError(ValueError):
+    pass
+
+
+class HistoryPage:
+    def __init__(self, messages: List[Dict], next_cursor: Optional[str]):
+        self.messages = messages
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(time_sent: datetime, message_id: str) -> str:
+    """
+    Builds an opaque cursor pointing just past a message. Firestore keeps
+    timestamps to the microsecond, so they round-trip exactly.
+    """
+    payload = {"t": (time_sent - _EPOCH) // _MICROSECOND, "id": message_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        time_sent = _EPOCH + payload["t"] * _MICROSECOND
+        message_id = payload["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(message_id, str) or not message_id:
+        raise CursorError(f"Invalid cursor: {cursor!r}")
+    return time_sent, message_id
+
+
+def _to_response(data: Dict) -> Dict:
+    message = dict(data)
+    time_sent = message.get("timeSent")
+    if isinstance(time_sent, datetime):
+        message["timeSent"] = time_sent.isoformat()
+    return message
+
+
+def get_message_history(
+    user_id: str,
+    chat_id: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> HistoryPage:
+    """
+    Returns one page of a user's messages in a chat, newest first, starting
+    after `cursor` if given. Ties in `timeSent` are broken by message id, so
+    pages never skip or repeat messages. Reads at most `page_size` messages,
+    however long the chat is.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    query = (
+        FirebaseCollections.messages(user_id, chat_id)
+        .order_by("timeSent", direction=Query.DESCENDING)
+        .order_by(FieldPath.document_id(), direction=Query.DESCENDING)
+        .select(HISTORY_FIELDS)
+        .limit(page_size)
+    )
+    if cursor is not None:
+        time_sent, message_id = decode_cursor(cursor)
+        query = query.start_after(
+            {"timeSent": time_sent, FieldPath.document_id(): message_id}
+        )
+
+    snapshots = list(query.stream())
+    record_reads(max(1, len(snapshots)))
+    messages = [_to_response(snapshot.to_dict()) for snapshot in snapshots]
+
+    # A full page may have more behind it; a short one is the last
+    next_cursor = None
+    if len(snapshots) == page_size:
+        last = snapshots[-1]
+        next_cursor = encode_cursor(last.get("timeSent"), last.id)
+
+    logger.info(
+        "Returning %d messages of chat %s for %s", len(messages), chat_id, user_id
+    )
+    return HistoryPage(messages, next_cursor)
@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta, timezone
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from firebase_admin import firestore
+from src.message.models.message import TextMessage
+from src.message.services.notification_scheduler import get_scheduler
+from src.message.services.notify_receiver import notify_receiver
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_reads, record_writes, traced
+
+logger = get_logger(__name__)
+
+# Pending notifications, one document per (sender, receiver) pair
+NOTIFICATION_QUEUE = "notificationQueue"
+
+# Seconds to collect messages before sending one notification for them.
+# 0 sends a notification per message.
+COALESCE_WINDOW_SECONDS = float(os.environ.get("NOTIFICATION_COALESCE_SECONDS", "0"))
+
+# Queue documents left behind by a lost flush are removed by a TTL policy
+QUEUE_RETENTION = timedelta(days=1)
+
+# Reads and writes race with new messages, so both sides retry a few times
+MAX_ATTEMPTS = 5
+
+
+def coalescing_enabled() -> bool:
+    return COALESCE_WINDOW_SECONDS > 0
+
+
+def queue_id(sender: str, receiver: str) -> str:
+    return f"{sender}_{receiver}"
+
+
+def enqueue_notification(message: TextMessage) -> None:
+    """
+    Adds a message to its (sender, receiver) queue document. The message
+    that creates the document schedules the flush; later ones in the same
+    window only bump the count and the latest message.
+    """
+    queue_ref = (
+        get_db()
+        .collection(NOTIFICATION_QUEUE)
+        .document(queue_id(message.sender, message.receiver))
+    )
+    latest = {
+        "sender": message.sender,
+        "receiver": message.receiver,
+        "latestMessageId": message.id,
+        "latestText": message.text,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }
+
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            queue_ref.create(
+                {
+                    **latest,
+                    "count": 1,
+                    "expireAt": datetime.now(timezone.utc) + QUEUE_RETENTION,
+                }
+            )
+            record_writes()
+        except AlreadyExists:
+            try:
+                queue_ref.update({**latest, "count": firestore.Increment(1)})
+                record_writes()
+                logger.info("Coalesced message %s into %s", message.id, queue_ref.id)
+                return
+            except NotFound:
+                # Flushed in between; start a new window
+                continue
+
+        logger.info("Queued message %s, flushing %s", message.id, queue_ref.id)
+        try:
+            get_scheduler().schedule(queue_ref.id, COALESCE_WINDOW_SECONDS)
+        except Exception:
+            logger.exception(
+                "Could not schedule flush of %s, flushing now", queue_ref.id
+            )
+            flush_notification_queue(queue_ref.id)
+        return
+
+    logger.warning("Gave up queueing message %s, notifying directly", message.id)
+    notify_receiver(message.sender, message.receiver, message.id, message.text)
+
+
+@traced("flush_notifications")
+def flush_notification_queue(queue_id: str) -> bool:
+    """
+    Removes a queue document and sends one notification for the messages it
+    collected. Returns True if a notification was due.
+    """
+    queue_ref = get_db().collection(NOTIFICATION_QUEUE).document(queue_id)
+
+    for _ in range(MAX_ATTEMPTS):
+        snapshot = queue_ref.get()
+        record_reads()
+        if not snapshot.exists:
+            logger.info("Nothing queued in %s", queue_id)
+            return False
+
+        try:
+            # Fails if a message was queued after the read, which is then
+            # picked up by reading again
+            queue_ref.delete(
+                option=get_db().write_option(last_update_time=snapshot.update_time)
+            )
+        except FailedPrecondition:
+            continue
+        record_writes()
+
+        queued = snapshot.to_dict()
+        logger.info("Flushing %d messages from %s", queued["count"], queue_id)
+        notify_receiver(
+            sender=queued["sender"],
+            receiver=queued["receiver"],
+            message_id=queued["latestMessageId"],
+            text=queued["latestText"],
+            count=queued["count"],
+        )
+        return True
+
+    logger.warning("Could not flush %s, queue kept changing; retrying later", queue_id)
+    get_scheduler().schedule(queue_id, COALESCE_WINDOW_SECONDS)
+    return False
@@ -0,0 +1,93 @@
+import math
+import threading
+from typing import Callable, Optional
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Task queue function that flushes coalesced notifications
+FLUSH_FUNCTION = "flush_notifications"
+
+
+class CloudTasksScheduler:
+    """
+    Schedules flushes as Cloud Tasks for the flush_notifications task queue
+    function, so a flush survives the instance that scheduled it.
+    """
+
+    def __init__(self, function_name: str = FLUSH_FUNCTION):
+        self.function_name = function_name
+        self._queue = None
+
+    def schedule(self, queue_id: str, delay_seconds: float) -> None:
+        from firebase_admin import functions
+
+        if self._queue is None:
+            self._queue = functions.task_queue(self.function_name)
+        # Rounded up, so a fractional window is never cut short
+        self._queue.enqueue(
+            {"queueId": queue_id},
+            functions.TaskOptions(
+                schedule_delay_seconds=max(math.ceil(delay_seconds), 0)
+            ),
+        )
+
+
+class LocalTimerScheduler:
+    """
+    Flushes in-process after the delay. Stands in for Cloud Tasks in the
+    emulator, benchmarks and load tests; pending flushes are lost if the
+    process exits.
+    """
+
+    def __init__(self, flush: Optional[Callable[[str], None]] = None):
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._timers = set()
+
+    def _run(self, timer: threading.Timer, queue_id: str) -> None:
+        with self._lock:
+            self._timers.discard(timer)
+        flush = self._flush
+        if flush is None:
+            from src.message.services.notification_queue import (
+                flush_notification_queue as flush,
+            )
+        flush(queue_id)
+
+    def schedule(self, queue_id: str, delay_seconds: float) -> None:
+        timer = threading.Timer(delay_seconds, lambda: self._run(timer, queue_id))
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+        timer.start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._timers)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Returns the scheduler for notification flushes, Cloud Tasks by default.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = CloudTasksScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler) -> None:
+    """
+    Replaces the flush scheduler, e.g. with a LocalTimerScheduler. Passing
+    None restores Cloud Tasks.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
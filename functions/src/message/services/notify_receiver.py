@@ -0,0 +1,44 @@
+from typing import Optional
+from src.message.services.get_tokens import get_tokens
+from src.message.services.send_notification import send_notifications
+from src.core.utils.logger import get_logger, log_payload
+
+logger = get_logger(__name__)
+
+
+def notify_receiver(
+    sender: str,
+    receiver: str,
+    message_id: str,
+    text: str,
+    count: Optional[int] = None,
+) -> None:
+    """
+    Sends a text message notification to every device of the receiver.
+    `count` is set for coalesced notifications, which stand for that many
+    messages, the latest being `message_id`.
+    """
+    # Get receiver tokens and send notifications
+    tokens, phoneNumber, photo = get_tokens(user_id=receiver)
+
+    if not tokens:
+        logger.info("No tokens found for receiver %s", receiver)
+        return
+
+    # Prepare payload for notifications
+    payload = {
+        "data": {
+            "sender_id": sender,
+            "receiver_id": receiver,
+            "sender_phoneNumber": phoneNumber or "",
+            "sender_photo": photo or "",
+            "message_id": message_id,
+            "message_text": text,
+            "type": "text",
+        },
+    }
+    if count is not None:
+        payload["data"]["message_count"] = str(count)
+    log_payload(logger, "Notification payload", payload)
+
+    send_notifications(tokens=tokens, payload=payload, user_id=receiver)
@@ -0,0 +1,122 @@
+from typing import Dict, Optional
+from src.message.models.message import Message, TextMessage, MessageStatus
+from src.message.services.notification_queue import (
+    coalescing_enabled,
+    enqueue_notification,
+)
+from src.message.services.notify_receiver import notify_receiver
+from src.message.services.deliver_message import DeliveryResult, deliver_message
+from src.message.services.get_tokens import get_tokens
+from src.message.services.processed_messages import (
+    message_key,
+    remember,
+    seen_recently,
+)
+from src.core.utils.executor import submit
+from src.core.utils.logger import get_logger, log_payload
+from src.core.utils.tracing import stage, traced
+
+logger = get_logger(__name__)
+
+
+@traced("on_message_created")
+def process_message_created(
+    params: Dict[str, str], doc_data: Optional[dict], event_id: Optional[str] = None
+) -> None:
+    """
+    Copies a newly created message to its receiver, marks it sent and
+    notifies the receiver's devices, right away or coalesced with the
+    sender's other recent messages. Redelivered events for a message that
+    was already processed stop after the delivery batch, or before any
+    Firestore call if this instance processed it.
+    """
+    try:
+        # Extract path parameters
+        user_id = params.get("user_id")
+        chat_id = params.get("chat_id")
+        message_id = params.get("message_id")
+
+        logger.info(
+            "Function triggered for message %s in chat %s by user %s",
+            message_id,
+            chat_id,
+            user_id,
+        )
+
+        if not doc_data:
+            logger.warning("No document data found for message %s", message_id)
+            return
+
+        log_payload(logger, "Document data", doc_data)
+
+        # Check if this is an original message (sender's copy) or a receiver's copy
+        # Original messages have status 'none', copies have status 'sent'
+        message_status = doc_data.get("status", "none")
+
+        if message_status != "none":
+            logger.info(
+                "Skipping message %s - status is '%s' (likely a copy)",
+                message_id,
+                message_status,
+            )
+            return
+
+        key = message_key(user_id, chat_id, message_id)
+        if seen_recently(key):
+            logger.info("Skipping message %s - already processed", message_id)
+            return
+
+        # Step 1: Create message object from document data
+        with stage("parse"):
+            message = Message.from_map(doc_data)
+        logger.info(
+            "Processing %s message from %s to %s",
+            message.type,
+            message.sender,
+            message.receiver,
+        )
+
+        # Step 2: Handle TextMessage
+        if isinstance(message, TextMessage):
+            # Create copy for receiver, mark the original as sent and record it
+            # as processed in one batch, in the background so the token lookup
+            # does not wait behind it
+            delivery = submit(
+                deliver_message,
+                message=message,
+                new_status=MessageStatus.sent,
+                marker_key=key,
+                event_id=event_id,
+            )
+
+            coalesce = coalescing_enabled()
+            if not coalesce:
+                # Warm the token cache while the batch commits
+                get_tokens(user_id=message.receiver)
+
+            # deliver_message handles its own errors, so this only waits for it
+            result = delivery.result()
+            if result is not DeliveryResult.failed:
+                remember(key)
+            if result is DeliveryResult.duplicate:
+                logger.info("Skipping message %s - duplicate event", message_id)
+                return
+
+            if coalesce:
+                # One notification per burst, sent when the window closes
+                with stage("notification_enqueue"):
+                    enqueue_notification(message)
+            else:
+                notify_receiver(
+                    message.sender, message.receiver, message.id, message.text
+                )
+
+            logger.info("Successfully processed message %s", message_id)
+        else:
+            logger.warning("Unsupported message type: %s", message.type)
+
+    except Exception:
+        logger.exception(
+            "Error processing message %s", params.get("message_id", "unknown")
+        )
+        return
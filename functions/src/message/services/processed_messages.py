@@ -0,0 +1,55 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from cachetools import LRUCache
+from firebase_admin import firestore
+from src.core.utils.firestore_client import get_db
+
+# One marker per processed original message, created in the delivery batch
+# so a redelivered trigger event fails the batch instead of repeating it
+PROCESSED_MESSAGES = "processedMessages"
+
+# Markers expire through a Firestore TTL policy on `expireAt`; events are not
+# redelivered after this long
+MARKER_RETENTION = timedelta(days=7)
+
+# Messages this instance processed recently, to reject duplicates without a
+# Firestore round trip
+RECENT_MESSAGES_MAX = 10_000
+
+_recent: LRUCache = LRUCache(maxsize=RECENT_MESSAGES_MAX)
+_lock = threading.Lock()
+
+
+def message_key(user_id: str, chat_id: str, message_id: str) -> str:
+    """
+    Identifies an original message by its document path, which stays the
+    same across redeliveries of its created event.
+    """
+    return f"{user_id}_{chat_id}_{message_id}"
+
+
+def seen_recently(key: str) -> bool:
+    with _lock:
+        return key in _recent
+
+
+def remember(key: str) -> None:
+    with _lock:
+        _recent[key] = True
+
+
+def add_processed_marker(batch, key: str, event_id: Optional[str] = None) -> None:
+    """
+    Adds the creation of a message's processed marker to a write batch. The
+    batch fails with AlreadyExists if the message was processed before.
+    """
+    marker_ref = get_db().collection(PROCESSED_MESSAGES).document(key)
+    batch.create(
+        marker_ref,
+        {
+            "eventId": event_id,
+            "processedAt": firestore.SERVER_TIMESTAMP,
+            "expireAt": datetime.now(timezone.utc) + MARKER_RETENTION,
+        },
+    )
@@ -0,0 +1,30 @@
+from typing import List
+from firebase_admin import firestore
+from src.message.services.token_cache import evict_tokens
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+from src.core.utils.tracing import record_writes
+
+logger = get_logger(__name__)
+
+
+def prune_tokens(user_id: str, tokens: List[str]) -> None:
+    """
+    Removes dead FCM tokens from a user's document and from the token cache.
+    """
+    try:
+        logger.info("Removing %d dead tokens for user %s", len(tokens), user_id)
+
+        db = get_db()
+        db.collection("users").document(user_id).update(
+            {"tokens": firestore.ArrayRemove(tokens)}
+        )
+        record_writes()
+
+        # After the update, so a reload cannot cache the dead tokens again
+        evict_tokens(user_id, tokens)
+
+        logger.info("Successfully removed dead tokens for user %s", user_id)
+
+    except Exception:
+        logger.exception("Error removing tokens for user %s", user_id)
@@ -1,14 +1,166 @@
-from typing import List, Dict
-from firebase_admin import messaging
+import random
+import time
+from typing import Dict, List, Optional
+from firebase_admin import exceptions, messaging
+from src.message.services.prune_tokens import prune_tokens
+from src.core.utils.executor import submit
+from src.core.utils.messaging_client import get_messaging
+from src.core.utils.logger import get_logger, log_payload
+from src.core.utils.tracing import stage
 
+logger = get_logger(__name__)
 
-def send_notifications(tokens: List[str], payload: Dict[str, object]):
+# FCM accepts at most this many tokens per multicast message
+FCM_MAX_TOKENS = 500
+
+# Attempts per token, including the first, for UNAVAILABLE and INTERNAL errors
+MAX_SEND_ATTEMPTS = 4
+
+# Full-jitter exponential backoff between attempts, in seconds
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 4.0
+
+# No retry starts after this many seconds, so a slow FCM cannot stall the trigger
+SEND_DEADLINE_SECONDS = 15.0
+
+_RETRYABLE_ERRORS = (exceptions.UnavailableError, exceptions.InternalError)
+
+
+class TokenOutcome:
+    """
+    What happened to one device token: the FCM message id if it was
+    delivered, otherwise the last error, and how many attempts it took.
+    """
+
+    __slots__ = ("token", "message_id", "error", "attempts")
+
+    def __init__(self, token: str):
+        self.token = token
+        self.message_id: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.attempts = 0
+
+    @property
+    def delivered(self) -> bool:
+        return self.message_id is not None
+
+    @property
+    def retryable(self) -> bool:
+        return isinstance(self.error, _RETRYABLE_ERRORS)
+
+
+class SendOutcome:
+    """
+    Per-token results of sending one payload to a user's devices.
+    """
+
+    def __init__(self, outcomes: List[TokenOutcome]):
+        self.outcomes = outcomes
+
+    @property
+    def success_count(self) -> int:
+        return sum(1 for outcome in self.outcomes if outcome.delivered)
+
+    @property
+    def failure_count(self) -> int:
+        return len(self.outcomes) - self.success_count
+
+    @property
+    def dead_tokens(self) -> List[str]:
+        """
+        Tokens FCM rejected as unregistered or invalid.
+        """
+        invalid = [
+            outcome.token
+            for outcome in self.outcomes
+            if isinstance(outcome.error, exceptions.InvalidArgumentError)
+        ]
+        # INVALID_ARGUMENT on every token points at the payload, not the tokens
+        if invalid and len(invalid) == len(self.outcomes):
+            invalid = []
+        unregistered = [
+            outcome.token
+            for outcome in self.outcomes
+            if isinstance(outcome.error, messaging.UnregisteredError)
+        ]
+        return unregistered + invalid
+
+    @property
+    def undelivered_tokens(self) -> List[str]:
+        """
+        Tokens that failed for another reason, or ran out of retries.
+        """
+        dead = set(self.dead_tokens)
+        return [
+            outcome.token
+            for outcome in self.outcomes
+            if not outcome.delivered and outcome.token not in dead
+        ]
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+def _send_chunk(outcomes: List[TokenOutcome], data: Dict[str, str]) -> None:
+    """
+    Sends one multicast per attempt to the tokens still pending, retrying
+    only those that failed with a retryable error.
+    """
+    deadline = time.monotonic() + SEND_DEADLINE_SECONDS
+    pending = outcomes
+
+    for attempt in range(MAX_SEND_ATTEMPTS):
+        if attempt:
+            delay = _backoff(attempt)
+            if time.monotonic() + delay > deadline:
+                break
+            time.sleep(delay)
+
+        for outcome in pending:
+            outcome.attempts += 1
+
+        message = messaging.MulticastMessage(
+            tokens=[outcome.token for outcome in pending], data=data
+        )
+        try:
+            # Use send_each_for_multicast instead of deprecated send_multicast
+            response = get_messaging().send_each_for_multicast(message)
+        except Exception as e:
+            # The whole request failed; every pending token shares the error
+            for outcome in pending:
+                outcome.error = e
+        else:
+            for outcome, send_response in zip(pending, response.responses):
+                if send_response.success:
+                    outcome.message_id = send_response.message_id
+                    outcome.error = None
+                else:
+                    outcome.error = send_response.exception
+
+        pending = [outcome for outcome in pending if outcome.retryable]
+        if not pending:
+            return
+        logger.info(
+            "Retrying %d tokens after attempt %d: %s",
+            len(pending),
+            attempt + 1,
+            pending[0].error,
+        )
+
+
+def send_notifications(
+    tokens: List[str], payload: Dict[str, object], user_id: Optional[str] = None
+) -> SendOutcome:
     """
     Sends a message to multiple device tokens using Firebase Cloud Messaging (FCM).
+    Tokens are sent in concurrent chunks of at most 500, and UNAVAILABLE or
+    INTERNAL failures are retried with jittered exponential backoff.
+    If `user_id` is given, tokens FCM reports as dead are removed from that user.
     """
+    outcome = SendOutcome([TokenOutcome(token) for token in tokens])
     try:
-        # Actual FCM sending logic for production
-        print(f"[SEND_NOTIFICATION] Sending FCM notifications to {len(tokens)} tokens")
+        logger.info("Sending FCM notifications to %d tokens", len(tokens))
 
         # Convert all payload values to strings, handle None values
         string_payload = {}
@@ -17,27 +169,36 @@ def send_notifications(tokens: List[str], payload: Dict[str, object]):
                 string_payload[k] = ""  # Empty string for None values
             else:
                 string_payload[k] = str(v)
+        log_payload(logger, "FCM message data", string_payload)
 
-        message = messaging.MulticastMessage(tokens=tokens, data=string_payload)
-        print(f"[SEND_NOTIFICATION] FCM message created: {message}")
-
-        # Use send_each_for_multicast instead of deprecated send_multicast
-        response = messaging.send_each_for_multicast(message)
+        chunks = [
+            outcome.outcomes[start : start + FCM_MAX_TOKENS]
+            for start in range(0, len(tokens), FCM_MAX_TOKENS)
+        ]
+        with stage("fcm_send"):
+            # The calling thread sends the first chunk while the pool sends the rest
+            futures = [
+                submit(_send_chunk, chunk, string_payload) for chunk in chunks[1:]
+            ]
+            if chunks:
+                _send_chunk(chunks[0], string_payload)
+            for future in futures:
+                future.result()
 
-        print(
-            f"[SEND_NOTIFICATION] FCM notification sent successfully. Success: {response.success_count}, Failures: {response.failure_count}"
+        logger.info(
+            "FCM notification sent. Success: %d, Failures: %d",
+            outcome.success_count,
+            outcome.failure_count,
         )
 
-        if response.failure_count > 0:
-            print(
-                f"[SEND_NOTIFICATION] {response.failure_count} notifications failed to send"
-            )
+        if outcome.failure_count > 0:
+            logger.warning("%d notifications failed to send", outcome.failure_count)
 
-        return response
+            dead_tokens = outcome.dead_tokens
+            if dead_tokens and user_id:
+                prune_tokens(user_id, dead_tokens)
 
-    except Exception as e:
-        print(f"[SEND_NOTIFICATION] Error sending notifications: {str(e)}")
-        import traceback
+    except Exception:
+        logger.exception("Error sending notifications")
 
-        print(f"[SEND_NOTIFICATION] Traceback: {traceback.format_exc()}")
-        return None
+    return outcome
@@ -0,0 +1,39 @@
+import threading
+from typing import List, Optional, Tuple
+from cachetools import TTLCache
+
+# Entries are short-lived so token changes made by the app show up quickly
+TOKEN_CACHE_TTL_SECONDS = 5 * 60
+TOKEN_CACHE_MAX_USERS = 10_000
+
+TokenInfo = Tuple[List[str], Optional[str], Optional[str]]
+
+_cache: TTLCache = TTLCache(
+    maxsize=TOKEN_CACHE_MAX_USERS, ttl=TOKEN_CACHE_TTL_SECONDS
+)
+_lock = threading.Lock()
+
+
+def get_cached_tokens(user_id: str) -> Optional[TokenInfo]:
+    """
+    Returns the cached (tokens, phone_number, photo) for a user, if any.
+    """
+    with _lock:
+        return _cache.get(user_id)
+
+
+def cache_tokens(user_id: str, token_info: TokenInfo) -> None:
+    with _lock:
+        _cache[user_id] = token_info
+
+
+def evict_tokens(user_id: str, tokens: List[str]) -> None:
+    """
+    Drops a user's cached entry once any of its tokens turns out to be dead,
+    so the next send reloads the user's tokens from Firestore. Rewriting the
+    entry instead would restart its TTL.
+    """
+    with _lock:
+        cached = _cache.get(user_id)
+        if cached is not None and any(token in cached[0] for token in tokens):
+            _cache.pop(user_id, None)
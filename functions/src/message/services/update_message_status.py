@@ -1,5 +1,9 @@
-from firebase_admin import firestore
 from src.message.models.message import Message, MessageStatus
+from src.message.services.deliver_message import add_status_update
+from src.core.utils.firestore_client import get_db
+from src.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def update_message_status(message: Message, new_status: MessageStatus) -> None:
@@ -7,30 +11,17 @@ def update_message_status(message: Message, new_status: MessageStatus) -> None:
     Updates the status of a message in Firestore.
     """
     try:
-        print(
-            f"[UPDATE_STATUS] Updating message {message.id} status to {new_status.value}"
-        )
-
-        db = firestore.client()
+        logger.info("Updating message %s status to %s", message.id, new_status.value)
 
-        # Update the message status in sender's chat
-        message_ref = (
-            db.collection("users")
-            .document(message.sender)
-            .collection("chats")
-            .document(message.receiver)
-            .collection("messages")
-            .document(message.id)
-        )
-
-        message_ref.update({"status": new_status.value})
+        batch = get_db().batch()
+        add_status_update(batch, message, new_status)
+        batch.commit()
 
-        print(
-            f"[UPDATE_STATUS] Successfully updated message {message.id} status to {new_status.value}"
+        logger.info(
+            "Successfully updated message %s status to %s",
+            message.id,
+            new_status.value,
         )
 
-    except Exception as e:
-        print(f"[UPDATE_STATUS] Error updating message {message.id} status: {str(e)}")
-        import traceback
-
-        print(f"[UPDATE_STATUS] Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("Error updating message %s status", message.id)
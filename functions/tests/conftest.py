@@ -0,0 +1,35 @@
+import pytest
+from flask import Flask
+from src.contact.services import get_registered_contacts as registered_contacts
+from src.message.services.processed_messages import _recent as recent_messages
+from src.message.services.token_cache import _cache as token_cache
+from tests.fakes.fake_backend import install_fake_backend
+
+
+@pytest.fixture
+def backend():
+    """
+    In-memory Firestore, FCM and Cloud Storage, installed for one test.
+    """
+    token_cache.clear()
+    recent_messages.clear()
+    backend = install_fake_backend()
+    yield backend
+    backend.uninstall()
+
+
+@pytest.fixture
+def query_path(monkeypatch):
+    """
+    Matches contacts with candidate queries only, bypassing the phone
+    snapshot and the user directory.
+    """
+    monkeypatch.setattr(
+        registered_contacts.registered_snapshot, "get_matcher", lambda: None
+    )
+    monkeypatch.setattr(registered_contacts.user_directory, "get_matcher", lambda: None)
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
@@ -0,0 +1,59 @@
+from typing import Dict, Optional, Union
+
+from src.contact.services.registered_snapshot import set_snapshot_bucket
+from src.core.utils.firestore_async_client import set_async_db
+from src.core.utils.firestore_client import set_db
+from src.core.utils.messaging_client import set_messaging
+from tests.fakes.fake_firestore import FakeFirestore
+from tests.fakes.fake_firestore_async import FakeAsyncFirestore
+from tests.fakes.fake_messaging import FakeMessaging
+from tests.fakes.fake_storage import FakeBucket
+from tests.fakes.fault_injector import FaultInjector
+from tests.fakes.op_counter import OpCounter
+
+
+class FakeBackend:
+    """
+    Fake Firestore (sync and async), FCM and Cloud Storage clients sharing
+    one OpCounter, and the FaultInjector of the Firestore and FCM fakes.
+    """
+
+    def __init__(self, faults: Optional[FaultInjector] = None):
+        self.counter = OpCounter()
+        self.faults = faults or FaultInjector()
+        self.firestore = FakeFirestore(counter=self.counter, faults=self.faults)
+        self.messaging = FakeMessaging(counter=self.counter, faults=self.faults)
+        self.storage = FakeBucket(counter=self.counter)
+
+    def uninstall(self) -> None:
+        """
+        Restores the real Firestore, FCM and Cloud Storage clients.
+        """
+        set_db(None)
+        set_async_db(None)
+        set_messaging(None)
+        set_snapshot_bucket(None)
+
+
+def install_fake_backend(
+    latency: Union[float, Dict[str, float]] = 0.0,
+    jitter: float = 0.0,
+    error_rates: Optional[Dict[str, float]] = None,
+    seed: Optional[int] = None,
+) -> FakeBackend:
+    """
+    Routes every service, including FirebaseCollections, to a new in-memory
+    backend. See FaultInjector for the latency and error options; operation
+    names are "get", "get_all", "query", "count", "write" (single-document
+    writes), "commit", "send" and "send_token".
+    """
+    backend = FakeBackend(
+        FaultInjector(
+            latency=latency, jitter=jitter, error_rates=error_rates, seed=seed
+        )
+    )
+    set_db(backend.firestore)
+    set_async_db(FakeAsyncFirestore(backend.firestore))
+    set_messaging(backend.messaging)
+    set_snapshot_bucket(backend.storage)
+    return backend
@@ -0,0 +1,847 @@
+"""
+In-memory stand-in for the subset of the Firestore client the services use:
+documents, collections, `where`/`order_by`/`limit` queries, `count()`,
+snapshot listeners, write batches, field transforms and last-update-time
+preconditions. Every call goes through a FaultInjector and is tallied in an
+OpCounter the way Firestore bills it, so tests can assert on reads and
+writes per invocation.
+"""
+
+import copy
+import itertools
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.aggregation import AggregationResult
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+
+from tests.fakes.fault_injector import FaultInjector
+from tests.fakes.op_counter import OpCounter
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+# Field path that orders and cursors use for the document id
+DOCUMENT_ID = "__name__"
+
+# Index entries covered by one billed read of a count() aggregation
+COUNT_ENTRIES_PER_READ = 1000
+
+_RANGE_OPS = ("<", "<=", ">", ">=")
+_auto_ids = itertools.count()
+
+
+def _injected_error(operation: str) -> Exception:
+    return exceptions.ServiceUnavailable(f"Injected failure in {operation}")
+
+
+def _type_rank(value) -> int:
+    # Firestore orders values of different types by type first
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, list):
+        return 8
+    return 9
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 8:
+        return rank, [_sort_key(item) for item in value]
+    if rank == 9:
+        return rank, sorted((key, _sort_key(item)) for key, item in value.items())
+    return rank, value
+
+
+def _equal(left, right) -> bool:
+    return _type_rank(left) == _type_rank(right) and left == right
+
+
+_MISSING = object()
+
+
+def _order_value(document_id: str, stored: "_StoredDocument", field_path: str):
+    if field_path == DOCUMENT_ID:
+        return _sort_key(document_id)
+    return _sort_key(_get_field(stored.data, field_path))
+
+
+def _get_field(data: Dict[str, Any], field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _matches_filter(data: Dict[str, Any], field_path: str, op: str, expected) -> bool:
+    value = _get_field(data, field_path)
+    if value is _MISSING:
+        return False
+    if op == "==":
+        return _equal(value, expected)
+    if op == "!=":
+        return value is not None and not _equal(value, expected)
+    if op == "in":
+        return any(_equal(value, item) for item in expected)
+    if op == "not-in":
+        return value is not None and not any(_equal(value, item) for item in expected)
+    if op == "array_contains":
+        return isinstance(value, list) and any(_equal(item, expected) for item in value)
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(
+            _equal(item, candidate) for item in value for candidate in expected
+        )
+    if op in _RANGE_OPS:
+        if _type_rank(value) != _type_rank(expected):
+            return False
+        if op == "<":
+            return value < expected
+        if op == "<=":
+            return value <= expected
+        if op == ">":
+            return value > expected
+        return value >= expected
+    raise NotImplementedError(f"Unsupported filter operator: {op}")
+
+
+def _transform(target: Dict[str, Any], key: str, value, now: datetime) -> None:
+    """
+    Writes one field, resolving transforms against its current value.
+    """
+    if value is transforms.DELETE_FIELD:
+        target.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        target[key] = now
+    elif isinstance(value, transforms.ArrayRemove):
+        current = target.get(key)
+        current = current if isinstance(current, list) else []
+        target[key] = [item for item in current if item not in value.values]
+    elif isinstance(value, transforms.ArrayUnion):
+        current = target.get(key)
+        current = list(current) if isinstance(current, list) else []
+        target[key] = current + [item for item in value.values if item not in current]
+    elif isinstance(value, transforms.Increment):
+        current = target.get(key)
+        current = current if isinstance(current, (int, float)) else 0
+        target[key] = current + value.value
+    elif isinstance(value, transforms.Maximum):
+        current = target.get(key)
+        target[key] = (
+            value.value
+            if not isinstance(current, (int, float))
+            else max(current, value.value)
+        )
+    elif isinstance(value, transforms.Minimum):
+        current = target.get(key)
+        target[key] = (
+            value.value
+            if not isinstance(current, (int, float))
+            else min(current, value.value)
+        )
+    elif isinstance(value, dict):
+        nested: Dict[str, Any] = {}
+        for nested_key, nested_value in value.items():
+            _transform(nested, nested_key, nested_value, now)
+        target[key] = nested
+    else:
+        target[key] = copy.deepcopy(value)
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any], now: datetime) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        else:
+            _transform(target, key, value, now)
+
+
+def _update(target: Dict[str, Any], field_path: str, value, now: datetime) -> None:
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        if not isinstance(target.get(part), dict):
+            target[part] = {}
+        target = target[part]
+    _transform(target, parts[-1], value, now)
+
+
+class _StoredDocument:
+    __slots__ = ("data", "create_time", "update_time")
+
+    def __init__(
+        self, data: Dict[str, Any], create_time: datetime, update_time: datetime
+    ):
+        self.data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+
+class FakeDocumentSnapshot:
+    def __init__(
+        self,
+        reference: "FakeDocumentReference",
+        stored: Optional[_StoredDocument],
+        read_time: datetime,
+        field_paths: Optional[List[str]] = None,
+    ):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = stored is not None
+        self.create_time = stored.create_time if stored else None
+        self.update_time = stored.update_time if stored else None
+        self.read_time = read_time
+
+        data = stored.data if stored else None
+        if data is not None and field_paths is not None:
+            projected: Dict[str, Any] = {}
+            for field_path in field_paths:
+                value = _get_field(data, field_path)
+                if value is not _MISSING:
+                    _update(projected, field_path, value, read_time)
+            data = projected
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        if self._data is None:
+            return None
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(f"'{field_path}' is not contained in the data")
+        return copy.deepcopy(value)
+
+
+class _WriteResult:
+    def __init__(self, update_time: datetime):
+        self.update_time = update_time
+
+
+class _Precondition:
+    def __init__(
+        self, last_update_time: Optional[datetime] = None, exists: Optional[bool] = None
+    ):
+        self.last_update_time = last_update_time
+        self.exists = exists
+
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestore", path: Tuple[str, ...]):
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+
+    @property
+    def path(self) -> str:
+        return "/".join(self._path)
+
+    @property
+    def parent(self) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, self._path[:-1])
+
+    def collection(self, name: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, self._path + (name,))
+
+    def get(self, field_paths: Optional[List[str]] = None) -> FakeDocumentSnapshot:
+        client = self._client
+        client.faults.before("get", _injected_error)
+        with client._lock:
+            stored = client._documents(self._path[:-1]).get(self.id)
+            snapshot = FakeDocumentSnapshot(self, stored, client._now(), field_paths)
+        client.counter.add("gets")
+        client.counter.add("reads")
+        return snapshot
+
+    def _write(
+        self, kind: str, data=None, merge: bool = False, option=None
+    ) -> _WriteResult:
+        batch = FakeWriteBatch(self._client, operation="write")
+        batch._add(kind, self, data, merge, option)
+        return batch.commit()[0]
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> _WriteResult:
+        return self._write("set", document_data, merge=merge)
+
+    def create(self, document_data: Dict[str, Any]) -> _WriteResult:
+        return self._write("create", document_data)
+
+    def update(
+        self, field_updates: Dict[str, Any], option: Optional[_Precondition] = None
+    ) -> _WriteResult:
+        return self._write("update", field_updates, option=option)
+
+    def delete(self, option: Optional[_Precondition] = None) -> _WriteResult:
+        return self._write("delete", option=option)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FakeDocumentReference) and other._path == self._path
+
+    def __hash__(self) -> int:
+        return hash(self._path)
+
+
+class _CountQuery:
+    def __init__(self, query: "FakeQuery", alias: Optional[str]):
+        self._query = query
+        self._alias = alias or "field_1"
+
+    def get(self):
+        client = self._query._client
+        client.faults.before("count", _injected_error)
+        with client._lock:
+            count = len(self._query._results())
+            read_time = client._now()
+        client.counter.add("aggregations")
+        client.counter.add("reads", max(1, -(-count // COUNT_ENTRIES_PER_READ)))
+        return [
+            [AggregationResult(alias=self._alias, value=count, read_time=read_time)]
+        ]
+
+
+class FakeQuery:
+    def __init__(
+        self,
+        client: "FakeFirestore",
+        path: Tuple[str, ...],
+        filters: Tuple = (),
+        orders: Tuple = (),
+        limit: Optional[int] = None,
+        start_after=None,
+        projection: Optional[Tuple[str, ...]] = None,
+    ):
+        self._client = client
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._start_after = start_after
+        self._projection = projection
+
+    def _copy(self, **changes) -> "FakeQuery":
+        values = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "start_after": self._start_after,
+            "projection": self._projection,
+        }
+        values.update(changes)
+        return FakeQuery(self._client, self._path, **values)
+
+    def where(
+        self,
+        field_path: Optional[str] = None,
+        op_string: Optional[str] = None,
+        value=None,
+        *,
+        filter=None,
+    ) -> "FakeQuery":
+        if filter is not None:
+            field_path, op_string, value = (
+                filter.field_path,
+                filter.op_string,
+                filter.value,
+            )
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "FakeQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot) -> "FakeQuery":
+        """
+        Starts after a snapshot, or a dict of the ordered fields' values
+        where `__name__` may be a document id or reference.
+        """
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def select(self, field_paths: List[str]) -> "FakeQuery":
+        return self._copy(projection=tuple(field_paths))
+
+    def count(self, alias: Optional[str] = None) -> _CountQuery:
+        return _CountQuery(self, alias)
+
+    def _matches(self, data: Dict[str, Any]) -> bool:
+        return all(
+            _matches_filter(data, field_path, op, value)
+            for field_path, op, value in self._filters
+        )
+
+    def _effective_orders(self) -> List[Tuple[str, str]]:
+        # Firestore orders by inequality fields first when not told otherwise
+        orders = list(self._orders)
+        ordered_fields = {field_path for field_path, _ in orders}
+        for field_path, op, _ in self._filters:
+            if op in _RANGE_OPS + ("!=", "not-in") and field_path not in ordered_fields:
+                orders.append((field_path, ASCENDING))
+                ordered_fields.add(field_path)
+        return orders
+
+    def _candidate_ids(self, documents: Dict[str, _StoredDocument]) -> List[str]:
+        """
+        Narrows the scan with a field index when there is an equality or
+        `in` filter, as Firestore's single-field indexes do.
+        """
+        for field_path, op, value in self._filters:
+            if op in ("==", "in"):
+                index = self._client._field_index(self._path, field_path)
+                values = value if op == "in" else [value]
+                ids = set()
+                for item in values:
+                    if isinstance(item, (str, int, float, bool, type(None))):
+                        ids.update(index.get(_sort_key(item), ()))
+                    else:
+                        return list(documents)
+                return list(ids)
+        return list(documents)
+
+    def _cursor_values(self, orders: List[Tuple[str, str]]) -> List:
+        cursor = self._start_after
+        if isinstance(cursor, FakeDocumentSnapshot):
+            cursor = {**(cursor.to_dict() or {}), DOCUMENT_ID: cursor.id}
+        values = []
+        for field_path, _ in orders:
+            value = _get_field(cursor, field_path)
+            if value is _MISSING:
+                break
+            if field_path == DOCUMENT_ID:
+                value = getattr(value, "id", value)
+            values.append(_sort_key(value))
+        return values
+
+    def _is_after(self, document_id, stored, orders, cursor_values) -> bool:
+        for (field_path, direction), cursor_value in zip(orders, cursor_values):
+            value = _order_value(document_id, stored, field_path)
+            if value != cursor_value:
+                return (value > cursor_value) != (direction == DESCENDING)
+        return False
+
+    def _results(self) -> List[Tuple[str, _StoredDocument]]:
+        """
+        Returns the matching (id, document) pairs in query order. Callers
+        hold the client lock.
+        """
+        documents = self._client._documents(self._path)
+        matched = []
+        for document_id in self._candidate_ids(documents):
+            stored = documents.get(document_id)
+            if stored is not None and self._matches(stored.data):
+                matched.append((document_id, stored))
+
+        orders = self._effective_orders()
+        # Documents missing an ordered field are left out of the results
+        matched = [
+            (document_id, stored)
+            for document_id, stored in matched
+            if all(
+                field == DOCUMENT_ID or _get_field(stored.data, field) is not _MISSING
+                for field, _ in orders
+            )
+        ]
+
+        last_direction = orders[-1][1] if orders else ASCENDING
+        matched.sort(key=lambda item: item[0], reverse=last_direction == DESCENDING)
+        for field_path, direction in reversed(orders):
+            matched.sort(
+                key=lambda item: _order_value(item[0], item[1], field_path),
+                reverse=direction == DESCENDING,
+            )
+
+        if self._start_after is not None:
+            # Firestore breaks ties in cursors by document id, like the sort
+            if DOCUMENT_ID not in {field_path for field_path, _ in orders}:
+                orders = orders + [(DOCUMENT_ID, last_direction)]
+            cursor_values = self._cursor_values(orders)
+            matched = [
+                (document_id, stored)
+                for document_id, stored in matched
+                if self._is_after(document_id, stored, orders, cursor_values)
+            ]
+
+        if self._limit is not None:
+            matched = matched[: self._limit]
+        return matched
+
+    def _snapshots(self, results, read_time: datetime) -> List[FakeDocumentSnapshot]:
+        return [
+            FakeDocumentSnapshot(
+                FakeDocumentReference(self._client, self._path + (document_id,)),
+                stored,
+                read_time,
+                self._projection,
+            )
+            for document_id, stored in results
+        ]
+
+    def get(self) -> List[FakeDocumentSnapshot]:
+        client = self._client
+        client.faults.before("query", _injected_error)
+        with client._lock:
+            snapshots = self._snapshots(self._results(), client._now())
+        client.counter.add("queries")
+        # A query that matches nothing is still billed one read
+        client.counter.add("reads", max(1, len(snapshots)))
+        return snapshots
+
+    def stream(self):
+        return iter(self.get())
+
+    def on_snapshot(self, callback: Callable) -> "FakeWatch":
+        """
+        Calls `callback(docs, changes, read_time)` on a separate thread with
+        the initial results and then after every write that changes them.
+        """
+        return FakeWatch(self, callback)
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: "FakeFirestore", path: Tuple[str, ...]):
+        super().__init__(client, path)
+        self.id = path[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        if document_id is None:
+            document_id = f"fake{next(_auto_ids):016d}"
+        return FakeDocumentReference(self._client, self._path + (document_id,))
+
+
+class FakeWatch:
+    """
+    Snapshot listener. Callbacks run in order on the watch's own thread, as
+    with the real client, so they may take locks held by the code that
+    started the listener.
+    """
+
+    def __init__(self, query: FakeQuery, callback: Callable):
+        self._query = query
+        self._callback = callback
+        self._events: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+        client = query._client
+        client.counter.add("listens")
+        with client._lock:
+            results = query._results()
+            read_time = client._now()
+            client._watches.append(self)
+            self._ids = {document_id for document_id, _ in results}
+            snapshots = query._snapshots(results, read_time)
+        client.counter.add("reads", max(1, len(snapshots)))
+
+        changes = [
+            DocumentChange(ChangeType.ADDED, snapshot, -1, index)
+            for index, snapshot in enumerate(snapshots)
+        ]
+        self._events.put((snapshots, changes, read_time))
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            self._callback(*event)
+
+    def _on_write(self, path: Tuple[str, ...], read_time: datetime) -> None:
+        """
+        Queues a change event if a write moved a document into, within or
+        out of the results. Called with the client lock held.
+        """
+        query = self._query
+        if path[:-1] != query._path:
+            return
+
+        document_id = path[-1]
+        results = query._results()
+        ids = {result_id for result_id, _ in results}
+        was_in, is_in = document_id in self._ids, document_id in ids
+        if not was_in and not is_in:
+            return
+        self._ids = ids
+
+        snapshots = query._snapshots(results, read_time)
+        reference = FakeDocumentReference(query._client, path)
+        if is_in:
+            stored = query._client._documents(query._path)[document_id]
+            change_type = ChangeType.MODIFIED if was_in else ChangeType.ADDED
+            changed = FakeDocumentSnapshot(reference, stored, read_time)
+        else:
+            change_type = ChangeType.REMOVED
+            changed = FakeDocumentSnapshot(reference, None, read_time)
+
+        query._client.counter.add("reads")
+        self._events.put(
+            (snapshots, [DocumentChange(change_type, changed, -1, -1)], read_time)
+        )
+
+    def unsubscribe(self) -> None:
+        client = self._query._client
+        with client._lock:
+            if self in client._watches:
+                client._watches.remove(self)
+        self._events.put(None)
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestore", operation: str = "commit"):
+        self._client = client
+        self._operation = operation
+        self._writes: List[Tuple] = []
+
+    def _add(
+        self, kind: str, reference: FakeDocumentReference, data, merge: bool, option
+    ) -> None:
+        self._writes.append((kind, reference, data, merge, option))
+
+    def set(
+        self,
+        reference: FakeDocumentReference,
+        document_data: Dict[str, Any],
+        merge: bool = False,
+    ) -> None:
+        self._add("set", reference, document_data, merge, None)
+
+    def create(
+        self, reference: FakeDocumentReference, document_data: Dict[str, Any]
+    ) -> None:
+        self._add("create", reference, document_data, False, None)
+
+    def update(
+        self,
+        reference: FakeDocumentReference,
+        field_updates: Dict[str, Any],
+        option: Optional[_Precondition] = None,
+    ) -> None:
+        self._add("update", reference, field_updates, False, option)
+
+    def delete(
+        self, reference: FakeDocumentReference, option: Optional[_Precondition] = None
+    ) -> None:
+        self._add("delete", reference, None, False, option)
+
+    def _check(
+        self, kind: str, reference: FakeDocumentReference, stored, option
+    ) -> None:
+        if kind == "create" and stored is not None:
+            raise exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+        if kind == "update" and stored is None:
+            raise exceptions.NotFound(f"No document to update: {reference.path}")
+        if option is None:
+            return
+        if option.exists is not None and option.exists != (stored is not None):
+            raise exceptions.FailedPrecondition(
+                f"Existence precondition failed: {reference.path}"
+            )
+        if option.last_update_time is not None and (
+            stored is None or stored.update_time != option.last_update_time
+        ):
+            raise exceptions.FailedPrecondition(
+                f"Document was updated since it was read: {reference.path}"
+            )
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def commit(self) -> List[_WriteResult]:
+        """
+        Applies every write atomically: if any precondition fails, nothing
+        is written.
+        """
+        client = self._client
+        writes, self._writes = self._writes, []
+        client.faults.before(self._operation, _injected_error)
+
+        with client._lock:
+            # Validate against the state each write would see in order
+            pending: Dict[Tuple[str, ...], Optional[_StoredDocument]] = {}
+            for kind, reference, _, _, option in writes:
+                path = reference._path
+                stored = (
+                    pending[path]
+                    if path in pending
+                    else client._documents(path[:-1]).get(reference.id)
+                )
+                try:
+                    self._check(kind, reference, stored, option)
+                except exceptions.GoogleAPICallError:
+                    client.counter.add("failed_commits")
+                    raise
+                pending[path] = (
+                    None
+                    if kind == "delete"
+                    else (stored or _StoredDocument({}, None, None))
+                )
+
+            now = client._now()
+            for kind, reference, data, merge, _ in writes:
+                documents = client._documents(reference._path[:-1])
+                stored = documents.get(reference.id)
+
+                if kind == "delete":
+                    documents.pop(reference.id, None)
+                else:
+                    if kind == "update":
+                        document = copy.deepcopy(stored.data)
+                        for field_path, value in data.items():
+                            _update(document, field_path, value, now)
+                    elif kind == "set" and merge and stored is not None:
+                        document = copy.deepcopy(stored.data)
+                        _merge(document, data, now)
+                    else:
+                        document = {}
+                        _merge(document, data, now)
+                    create_time = stored.create_time if stored is not None else now
+                    documents[reference.id] = _StoredDocument(
+                        document, create_time, now
+                    )
+
+                client._indexes.pop(reference._path[:-1], None)
+                for watch in list(client._watches):
+                    watch._on_write(reference._path, now)
+
+        deletes = sum(1 for kind, *_ in writes if kind == "delete")
+        client.counter.add("commits")
+        client.counter.add("writes", len(writes) - deletes)
+        if deletes:
+            client.counter.add("deletes", deletes)
+        return [_WriteResult(now) for _ in writes]
+
+
+class FakeFirestore:
+    """
+    Firestore client stand-in. Install it with
+    `src.core.utils.firestore_client.set_db`, or together with the FCM fake
+    through `tests.fakes.fake_backend.install_fake_backend`.
+    """
+
+    def __init__(
+        self,
+        counter: Optional[OpCounter] = None,
+        faults: Optional[FaultInjector] = None,
+    ):
+        self.counter = counter or OpCounter()
+        self.faults = faults or FaultInjector()
+
+        self._lock = threading.RLock()
+        self._last_time = datetime.now(timezone.utc)
+        # Documents keyed by their collection path, then by document id
+        self._collections: Dict[Tuple[str, ...], Dict[str, _StoredDocument]] = {}
+        # Lazily built field indexes per collection, dropped on any write to it
+        self._indexes: Dict[Tuple[str, ...], Dict[str, Dict[Any, List[str]]]] = {}
+        self._watches: List[FakeWatch] = []
+
+    def _now(self) -> datetime:
+        # Strictly increasing, so update times work as preconditions
+        now = datetime.now(timezone.utc)
+        self._last_time = max(now, self._last_time + timedelta(microseconds=1))
+        return self._last_time
+
+    def _documents(
+        self, collection_path: Tuple[str, ...]
+    ) -> Dict[str, _StoredDocument]:
+        return self._collections.setdefault(collection_path, {})
+
+    def _field_index(
+        self, collection_path: Tuple[str, ...], field_path: str
+    ) -> Dict[Any, List[str]]:
+        indexes = self._indexes.setdefault(collection_path, {})
+        index = indexes.get(field_path)
+        if index is None:
+            index = {}
+            for document_id, stored in self._documents(collection_path).items():
+                value = _get_field(stored.data, field_path)
+                if isinstance(value, (str, int, float, bool, type(None))):
+                    index.setdefault(_sort_key(value), []).append(document_id)
+            indexes[field_path] = index
+        return index
+
+    def collection(self, collection_path: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, tuple(collection_path.split("/")))
+
+    def document(self, document_path: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self, tuple(document_path.split("/")))
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def get_all(
+        self,
+        references: List[FakeDocumentReference],
+        field_paths: Optional[List[str]] = None,
+    ):
+        """
+        Reads several documents in one call, billed one read each.
+        """
+        references = list(references)
+        self.faults.before("get_all", _injected_error)
+        with self._lock:
+            read_time = self._now()
+            snapshots = [
+                FakeDocumentSnapshot(
+                    reference,
+                    self._documents(reference._path[:-1]).get(reference.id),
+                    read_time,
+                    field_paths,
+                )
+                for reference in references
+            ]
+        self.counter.add("gets")
+        self.counter.add("reads", len(snapshots))
+        return iter(snapshots)
+
+    @staticmethod
+    def write_option(
+        last_update_time: Optional[datetime] = None, exists: Optional[bool] = None
+    ) -> _Precondition:
+        return _Precondition(last_update_time=last_update_time, exists=exists)
+
+    def put(self, document_path: str, data: Dict[str, Any]) -> None:
+        """
+        Seeds a document without latency, injected errors or counting.
+        """
+        path = tuple(document_path.split("/"))
+        with self._lock:
+            now = self._now()
+            document: Dict[str, Any] = {}
+            _merge(document, data, now)
+            self._documents(path[:-1])[path[-1]] = _StoredDocument(document, now, now)
+            self._indexes.pop(path[:-1], None)
+
+    def clear(self, collection_path: str) -> None:
+        """
+        Drops every document in a collection without counting deletes.
+        """
+        path = tuple(collection_path.split("/"))
+        with self._lock:
+            self._collections.pop(path, None)
+            self._indexes.pop(path, None)
+
+    def dump(self, collection_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns a copy of every document in a collection, keyed by id,
+        without counting reads.
+        """
+        with self._lock:
+            documents = self._documents(tuple(collection_path.split("/")))
+            return {
+                document_id: copy.deepcopy(stored.data)
+                for document_id, stored in documents.items()
+            }
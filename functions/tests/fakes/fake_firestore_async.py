@@ -0,0 +1,46 @@
+"""
+Async facade over FakeFirestore for the query paths that use the async
+Firestore client. Each call runs the synchronous fake on a worker thread,
+so injected latency overlaps across concurrent queries as it would with
+real round trips, and shares the fake's data, faults and OpCounter.
+"""
+
+import asyncio
+from typing import List
+
+from tests.fakes.fake_firestore import FakeFirestore, FakeQuery
+
+
+class FakeAsyncQuery:
+    def __init__(self, query: FakeQuery):
+        self._query = query
+
+    def where(self, *args, **kwargs) -> "FakeAsyncQuery":
+        return FakeAsyncQuery(self._query.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs) -> "FakeAsyncQuery":
+        return FakeAsyncQuery(self._query.order_by(*args, **kwargs))
+
+    def limit(self, count: int) -> "FakeAsyncQuery":
+        return FakeAsyncQuery(self._query.limit(count))
+
+    def select(self, field_paths: List[str]) -> "FakeAsyncQuery":
+        return FakeAsyncQuery(self._query.select(field_paths))
+
+    def start_after(self, document_fields_or_snapshot) -> "FakeAsyncQuery":
+        return FakeAsyncQuery(self._query.start_after(document_fields_or_snapshot))
+
+    async def get(self):
+        return await asyncio.to_thread(self._query.get)
+
+    async def stream(self):
+        for snapshot in await self.get():
+            yield snapshot
+
+
+class FakeAsyncFirestore:
+    def __init__(self, firestore: FakeFirestore):
+        self.firestore = firestore
+
+    def collection(self, collection_path: str) -> FakeAsyncQuery:
+        return FakeAsyncQuery(self.firestore.collection(collection_path))
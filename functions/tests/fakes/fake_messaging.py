@@ -0,0 +1,92 @@
+import itertools
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from firebase_admin import exceptions, messaging
+
+from tests.fakes.fault_injector import FaultInjector
+from tests.fakes.op_counter import OpCounter
+
+
+def _injected_error(operation: str) -> Exception:
+    return exceptions.UnavailableError(f"Injected failure in {operation}")
+
+
+class FakeMessaging:
+    """
+    FCM stand-in providing `send_each_for_multicast` and `send_each`.
+    Tokens passed to `unregister` fail with UnregisteredError, as tokens of
+    uninstalled apps do, and `fail_token` queues errors for single tokens.
+    The "send" fault applies to a whole call, and the "send_token" error
+    rate fails single tokens with UnavailableError.
+    Delivered (token, data) pairs are kept in `sent`.
+    """
+
+    def __init__(
+        self,
+        counter: Optional[OpCounter] = None,
+        faults: Optional[FaultInjector] = None,
+        unregistered_tokens: Iterable[str] = (),
+    ):
+        self.counter = counter or OpCounter()
+        self.faults = faults or FaultInjector()
+        self.sent: List[Tuple[str, Dict[str, str]]] = []
+
+        self._lock = threading.Lock()
+        self._unregistered = set(unregistered_tokens)
+        self._token_errors: Dict[str, Deque[Exception]] = {}
+        self._message_ids = itertools.count(1)
+
+    def unregister(self, *tokens: str) -> None:
+        with self._lock:
+            self._unregistered.update(tokens)
+
+    def fail_token(self, token: str, error: Exception, times: int = 1) -> None:
+        """
+        Makes the next `times` sends to `token` fail with `error`.
+        """
+        with self._lock:
+            self._token_errors.setdefault(token, deque()).extend([error] * times)
+
+    def _send_one(self, token: str, data: Dict[str, str]) -> messaging.SendResponse:
+        with self._lock:
+            unregistered = token in self._unregistered
+            queued = self._token_errors.get(token)
+            queued_error = queued.popleft() if queued else None
+        if unregistered:
+            error = messaging.UnregisteredError("Requested entity was not found.")
+            return messaging.SendResponse(None, error)
+        if queued_error is not None:
+            return messaging.SendResponse(None, queued_error)
+        if self.faults.should_fail("send_token"):
+            return messaging.SendResponse(None, _injected_error("send_token"))
+
+        with self._lock:
+            self.sent.append((token, dict(data or {})))
+            message_id = next(self._message_ids)
+        return messaging.SendResponse(
+            {"name": f"projects/fake/messages/{message_id}"}, None
+        )
+
+    def _send(
+        self, targets: List[Tuple[str, Dict[str, str]]]
+    ) -> messaging.BatchResponse:
+        self.faults.before("send", _injected_error)
+        self.counter.add("fcm_sends")
+        self.counter.add("fcm_messages", len(targets))
+        return messaging.BatchResponse(
+            [self._send_one(token, data) for token, data in targets]
+        )
+
+    def send_each_for_multicast(
+        self, multicast_message: messaging.MulticastMessage, dry_run: bool = False
+    ) -> messaging.BatchResponse:
+        return self._send(
+            [(token, multicast_message.data) for token in multicast_message.tokens]
+        )
+
+    def send_each(
+        self, messages: List[messaging.Message], dry_run: bool = False
+    ) -> messaging.BatchResponse:
+        return self._send([(message.token, message.data) for message in messages])
@@ -0,0 +1,61 @@
+import itertools
+import threading
+from typing import Dict, Optional, Tuple
+
+from google.api_core import exceptions
+
+from tests.fakes.op_counter import OpCounter
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.generation: Optional[int] = None
+        self.size: Optional[int] = None
+
+    def reload(self) -> None:
+        generation, data = self.bucket._object(self.name)
+        self.generation = generation
+        self.size = len(data)
+
+    def upload_from_string(self, data: bytes, content_type: Optional[str] = None):
+        self.generation = self.bucket._put(self.name, bytes(data))
+        self.size = len(data)
+
+    def download_to_filename(self, filename: str) -> None:
+        generation, data = self.bucket._object(self.name)
+        with open(filename, "wb") as file:
+            file.write(data)
+        self.generation = generation
+        self.bucket.counter.add("storage_bytes_downloaded", len(data))
+
+
+class FakeBucket:
+    """
+    Cloud Storage bucket stand-in with object generations, for the phone
+    snapshot. Downloads are tallied as `storage_bytes_downloaded`.
+    """
+
+    def __init__(self, name: str = "fake-bucket", counter: Optional[OpCounter] = None):
+        self.name = name
+        self.counter = counter or OpCounter()
+        self._lock = threading.Lock()
+        self._objects: Dict[str, Tuple[int, bytes]] = {}
+        self._generations = itertools.count(1)
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+    def _object(self, name: str) -> Tuple[int, bytes]:
+        with self._lock:
+            stored = self._objects.get(name)
+        if stored is None:
+            raise exceptions.NotFound(f"No such object: {self.name}/{name}")
+        return stored
+
+    def _put(self, name: str, data: bytes) -> int:
+        with self._lock:
+            generation = next(self._generations)
+            self._objects[name] = (generation, data)
+        return generation
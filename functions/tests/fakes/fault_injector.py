@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Union
+
+# Builds the exception raised for an injected failure of an operation
+ErrorFactory = Callable[[str], Exception]
+
+
+class FaultInjector:
+    """
+    Adds latency and failures to fake backend calls.
+
+    `latency` is the delay in seconds before each call, either one value for
+    every operation or a dict keyed by operation name with an optional "*"
+    default. `jitter` spreads each delay uniformly by that fraction.
+    `error_rates` maps operation names (or "*") to the probability that a
+    call fails. Failures can also be queued for the next call of an
+    operation with `fail_next`, which makes tests deterministic.
+    """
+
+    def __init__(
+        self,
+        latency: Union[float, Dict[str, float]] = 0.0,
+        jitter: float = 0.0,
+        error_rates: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rates = error_rates or {}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._queued: Dict[str, Deque[Exception]] = {}
+
+    def _lookup(self, values: Union[float, Dict[str, float]], operation: str) -> float:
+        if isinstance(values, dict):
+            return values.get(operation, values.get("*", 0.0))
+        return values
+
+    def fail_next(self, operation: str, error: Exception, times: int = 1) -> None:
+        """
+        Makes the next `times` calls of `operation` raise `error`.
+        """
+        with self._lock:
+            self._queued.setdefault(operation, deque()).extend([error] * times)
+
+    def should_fail(self, operation: str) -> bool:
+        """
+        Rolls the configured error rate for one call of `operation`.
+        """
+        rate = self._lookup(self.error_rates, operation)
+        if not rate:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def before(self, operation: str, error_factory: ErrorFactory) -> None:
+        """
+        Called by the fakes before each operation: sleeps for the configured
+        latency, then raises a queued or randomly injected error.
+        """
+        delay = self._lookup(self.latency, operation)
+        if delay:
+            if self.jitter:
+                with self._lock:
+                    delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(max(delay, 0.0))
+
+        with self._lock:
+            queued = self._queued.get(operation)
+            error = queued.popleft() if queued else None
+        if error is not None:
+            raise error
+        if self.should_fail(operation):
+            raise error_factory(operation)
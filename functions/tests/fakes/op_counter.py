@@ -0,0 +1,40 @@
+import threading
+from collections import Counter
+from typing import Dict
+
+
+class OpCounter:
+    """
+    Thread-safe tally of backend operations, e.g. `reads` and `writes` as
+    Firestore bills them, or `fcm_messages` sent. Shared by the fake
+    Firestore and FCM clients so a test can assert on both.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def __getitem__(self, name: str) -> int:
+        with self._lock:
+            return self._counts[name]
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns a copy of every count so far.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> Dict[str, int]:
+        """
+        Clears the counts and returns what they were, so each invocation
+        can be measured on its own.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            self._counts.clear()
+            return counts
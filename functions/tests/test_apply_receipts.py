@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from src.message.models.message import MessageStatus
+from src.message.services.apply_receipts import apply_receipts
+
+_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _seed(backend, count: int, status: str = "sent") -> None:
+    """
+    Seeds `count` messages from alice to bob, one second apart, on both
+    users' copies, and bob's chat summary with them all unread.
+    """
+    for index in range(count):
+        message_id = f"m{index}"
+        data = {
+            "text": f"Message {index}",
+            "id": message_id,
+            "sender": "alice",
+            "receiver": "bob",
+            "status": status,
+            "timeSent": _START + timedelta(seconds=index),
+            "type": "text",
+        }
+        backend.firestore.put(f"users/alice/chats/bob/messages/{message_id}", data)
+        backend.firestore.put(f"users/bob/chats/alice/messages/{message_id}", data)
+    backend.firestore.put(
+        "users/bob/chats/alice", {"chatId": "alice", "unreadCount": count}
+    )
+
+
+def _statuses(backend, user_id: str, chat_id: str) -> dict:
+    messages = backend.firestore.dump(f"users/{user_id}/chats/{chat_id}/messages")
+    return {message_id: data["status"] for message_id, data in messages.items()}
+
+
+def test_receipt_up_to_a_time_updates_both_copies(backend):
+    _seed(backend, 3)
+
+    result = apply_receipts(
+        "bob", "alice", MessageStatus.delivered, up_to=_START + timedelta(seconds=1)
+    )
+
+    assert result.updated == 2
+    expected = {"m0": "delivered", "m1": "delivered", "m2": "sent"}
+    assert _statuses(backend, "bob", "alice") == expected
+    assert _statuses(backend, "alice", "bob") == expected
+
+
+def test_seen_receipt_resets_unread_count(backend):
+    _seed(backend, 3)
+
+    apply_receipts("bob", "alice", MessageStatus.seen, message_ids=["m0", "m2"])
+
+    assert _statuses(backend, "bob", "alice") == {
+        "m0": "seen",
+        "m1": "sent",
+        "m2": "seen",
+    }
+    assert backend.firestore.dump("users/bob/chats")["alice"]["unreadCount"] == 0
+
+
+def test_seen_receipt_resets_unread_count_with_nothing_pending(backend):
+    _seed(backend, 2, status="seen")
+    backend.firestore.put("users/bob/chats/alice", {"unreadCount": 5})
+
+    result = apply_receipts("bob", "alice", MessageStatus.seen, message_ids=["m0"])
+
+    assert result.updated == 0
+    assert backend.firestore.dump("users/bob/chats")["alice"]["unreadCount"] == 0
+
+
+def test_status_is_never_lowered(backend):
+    _seed(backend, 2, status="seen")
+
+    result = apply_receipts(
+        "bob", "alice", MessageStatus.delivered, up_to=_START + timedelta(hours=1)
+    )
+
+    assert result.updated == 0
+    assert result.commits == 0
+    assert set(_statuses(backend, "bob", "alice").values()) == {"seen"}
+
+
+def test_deleted_sender_copy_is_not_recreated(backend):
+    _seed(backend, 2)
+    backend.firestore.document("users/alice/chats/bob/messages/m0").delete()
+
+    apply_receipts("bob", "alice", MessageStatus.delivered, message_ids=["m0", "m1"])
+
+    assert _statuses(backend, "alice", "bob") == {"m1": "delivered"}
+    assert _statuses(backend, "bob", "alice") == {"m0": "delivered", "m1": "delivered"}
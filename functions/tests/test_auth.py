@@ -0,0 +1,63 @@
+import pytest
+from firebase_admin import auth
+from flask import request
+from src.core.utils import auth as request_auth
+from src.core.utils.auth import verify_request_user
+from src.message.services.handle_message_history_request import (
+    handle_message_history_request,
+)
+
+BEARER = {"Authorization": "Bearer id-token"}
+
+
+def _reject_with(monkeypatch, error: Exception) -> None:
+    def verify_id_token(token):
+        raise error
+
+    monkeypatch.setattr(request_auth.auth, "verify_id_token", verify_id_token)
+
+
+def test_valid_token_returns_its_uid(app, monkeypatch):
+    monkeypatch.setattr(
+        request_auth.auth, "verify_id_token", lambda token: {"uid": "alice"}
+    )
+
+    with app.test_request_context("/", method="POST", headers=BEARER):
+        assert verify_request_user(request) == "alice"
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Basic abc"}])
+def test_missing_bearer_token_is_rejected(app, headers):
+    with app.test_request_context("/", method="POST", headers=headers):
+        assert verify_request_user(request) is None
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ValueError("Illegal ID token provided"),
+        auth.InvalidIdTokenError("Wrong number of segments"),
+        auth.ExpiredIdTokenError("Token expired", cause=None),
+        auth.RevokedIdTokenError("Token has been revoked"),
+        auth.UserDisabledError("User has been disabled"),
+        auth.CertificateFetchError("Could not fetch certificates", cause=None),
+    ],
+    ids=type,
+)
+def test_unverifiable_tokens_are_rejected(app, monkeypatch, caplog, error):
+    _reject_with(monkeypatch, error)
+
+    with app.test_request_context("/", method="POST", headers=BEARER):
+        assert verify_request_user(request) is None
+
+    assert type(error).__name__ in caplog.text
+
+
+def test_revoked_token_gets_a_401(app, backend, monkeypatch):
+    _reject_with(monkeypatch, auth.RevokedIdTokenError("Token has been revoked"))
+    body = {"data": {"chatId": "bob"}}
+
+    with app.test_request_context("/", method="POST", json=body, headers=BEARER):
+        response = handle_message_history_request(request)
+
+    assert response.status_code == 401
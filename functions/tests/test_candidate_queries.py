@@ -0,0 +1,222 @@
+import asyncio
+import threading
+import time
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+from src.contact.models.contact_model import ContactModel
+from src.contact.services import get_registered_contacts as registered_contacts
+from src.contact.services.get_registered_contacts import (
+    candidate_queries,
+    fetch_candidate_users,
+    find_registered_contacts,
+    query_candidate_users,
+)
+from src.contact.services.phone_keys import (
+    IN_QUERY_LIMIT,
+    PHONE_NORMALIZED_FIELD,
+    PHONE_SUFFIX_FIELD,
+)
+from src.contact.services.process_user_written import process_user_written
+from src.core.utils.firestore_client import get_db
+from tests.fakes.fake_firestore_async import FakeAsyncQuery
+
+
+def _phone(number: str) -> dict:
+    return {"isoCode": "KE", "dialCode": "+254", "phoneNumber": number}
+
+
+def _contacts(numbers) -> list:
+    return [
+        ContactModel.from_map({"name": f"Contact {index}", "phoneNumbers": [_phone(n)]})
+        for index, n in enumerate(numbers)
+    ]
+
+
+def _numbers(count: int) -> list:
+    return [f"07{index:08d}" for index in range(count)]
+
+
+def _write_user(backend, user_id: str, number: str) -> None:
+    """
+    Seeds a user and runs its trigger, which adds the phone key fields the
+    candidate queries filter on.
+    """
+    backend.firestore.put(
+        f"users/{user_id}", {"id": user_id, "phone": _phone(number), "photo": ""}
+    )
+    reference = get_db().collection("users").document(user_id)
+    process_user_written(user_id, None, reference.get())
+
+
+@pytest.mark.parametrize(
+    "count, sizes",
+    [
+        (1, [1]),
+        (IN_QUERY_LIMIT, [IN_QUERY_LIMIT]),
+        (IN_QUERY_LIMIT + 1, [IN_QUERY_LIMIT, 1]),
+        (2 * IN_QUERY_LIMIT + 1, [IN_QUERY_LIMIT, IN_QUERY_LIMIT, 1]),
+    ],
+)
+def test_suffixes_are_chunked_at_the_in_limit(count, sizes):
+    queries = candidate_queries(_contacts(_numbers(count)))
+
+    assert [field for field, _ in queries] == [PHONE_SUFFIX_FIELD] * len(sizes)
+    assert [len(chunk) for _, chunk in queries] == sizes
+    values = [value for _, chunk in queries for value in chunk]
+    assert values == sorted(set(values))
+
+
+def test_numbers_sharing_a_suffix_are_queried_once():
+    queries = candidate_queries(
+        _contacts(["0712345678", "+254 712 345 678", "+1 412 345 678"])
+    )
+
+    assert queries == [(PHONE_SUFFIX_FIELD, ["2345678"])]
+
+
+def test_short_numbers_are_queried_by_normalized_number():
+    queries = candidate_queries(_contacts(["0712345678", "+1 234", "not a number"]))
+
+    assert queries == [
+        (PHONE_SUFFIX_FIELD, ["2345678"]),
+        (PHONE_NORMALIZED_FIELD, ["1234"]),
+    ]
+
+
+def test_no_queries_without_usable_numbers():
+    assert candidate_queries(_contacts(["", "not a number"])) == []
+
+
+def test_candidate_users_span_every_chunk(backend):
+    numbers = _numbers(2 * IN_QUERY_LIMIT + 1)
+    for index, number in enumerate(numbers):
+        _write_user(backend, f"u{index:03d}", number)
+    _write_user(backend, "stranger", "0799999999")
+    backend.counter.reset()
+
+    users = query_candidate_users(_contacts(numbers))
+
+    assert [user.id for user in users] == [f"u{index:03d}" for index in range(61)]
+    assert backend.counter["queries"] == 3
+
+
+@pytest.mark.usefixtures("query_path")
+def test_contacts_match_across_chunks(backend):
+    numbers = _numbers(IN_QUERY_LIMIT + 5)
+    for index in (0, IN_QUERY_LIMIT - 1, IN_QUERY_LIMIT + 4):
+        _write_user(backend, f"u{index:03d}", numbers[index])
+
+    matched = find_registered_contacts(_contacts(numbers))
+
+    assert sorted(contact.name for contact in matched) == [
+        "Contact 0",
+        "Contact 29",
+        "Contact 34",
+    ]
+
+
+@pytest.fixture
+def async_queries(monkeypatch):
+    """
+    Tracks async candidate queries: how many ran and the most in flight at
+    once. Setting `error` or `delay` makes every async query fail or hang.
+    """
+
+    class Tracker:
+        count = 0
+        in_flight = 0
+        peak = 0
+        error = None
+        delay = 0.0
+
+    tracker = Tracker()
+    lock = threading.Lock()
+    get = FakeAsyncQuery.get
+
+    async def tracking_get(self):
+        with lock:
+            tracker.count += 1
+            tracker.in_flight += 1
+            tracker.peak = max(tracker.peak, tracker.in_flight)
+        try:
+            if tracker.delay:
+                await asyncio.sleep(tracker.delay)
+            if tracker.error is not None:
+                raise tracker.error
+            return await get(self)
+        finally:
+            with lock:
+                tracker.in_flight -= 1
+
+    monkeypatch.setattr(FakeAsyncQuery, "get", tracking_get)
+    return tracker
+
+
+def _seed_chunks(backend, chunk_count: int) -> list:
+    """
+    Seeds one user per chunk of contact numbers and returns the numbers.
+    """
+    numbers = _numbers(chunk_count * IN_QUERY_LIMIT)
+    for index in range(0, len(numbers), IN_QUERY_LIMIT):
+        _write_user(backend, f"u{index:03d}", numbers[index])
+    return numbers
+
+
+def test_async_queries_are_bounded_by_the_semaphore(
+    backend, async_queries, monkeypatch
+):
+    monkeypatch.setattr(registered_contacts, "CANDIDATE_QUERY_CONCURRENCY", 2)
+    backend.faults.latency = {"query": 0.02}
+    numbers = _seed_chunks(backend, 5)
+
+    users = fetch_candidate_users(_contacts(numbers))
+
+    assert [user.id for user in users] == [f"u{i:03d}" for i in range(0, 150, 30)]
+    assert async_queries.count == 5
+    assert async_queries.peak == 2
+
+
+def test_async_queries_overlap(backend, async_queries):
+    backend.faults.latency = {"query": 0.1}
+    numbers = _seed_chunks(backend, 5)
+
+    fetch_candidate_users(_contacts(numbers))
+
+    assert async_queries.peak == 5
+
+
+def test_single_query_uses_the_sync_path(backend, async_queries):
+    numbers = _seed_chunks(backend, 1)
+
+    users = fetch_candidate_users(_contacts(numbers))
+
+    assert [user.id for user in users] == ["u000"]
+    assert async_queries.count == 0
+
+
+def test_failed_async_query_falls_back_to_the_sync_path(backend, async_queries, caplog):
+    async_queries.error = ServiceUnavailable("Firestore unavailable")
+    numbers = _seed_chunks(backend, 3)
+    backend.counter.reset()
+
+    users = fetch_candidate_users(_contacts(numbers))
+
+    assert [user.id for user in users] == ["u000", "u030", "u060"]
+    assert "querying in turn" in caplog.text
+    # The sync path runs every query again
+    assert backend.counter["queries"] == 3
+
+
+def test_timed_out_async_query_falls_back_to_the_sync_path(
+    backend, async_queries, monkeypatch
+):
+    monkeypatch.setattr(registered_contacts, "CANDIDATE_QUERY_TIMEOUT_SECONDS", 0.05)
+    async_queries.delay = 5.0
+    numbers = _seed_chunks(backend, 3)
+
+    started = time.monotonic()
+    users = fetch_candidate_users(_contacts(numbers))
+
+    assert [user.id for user in users] == ["u000", "u030", "u060"]
+    assert time.monotonic() - started < 1.0
+    assert async_queries.in_flight == 0
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from flask import request
+from src.contact.models.contact_model import ContactModel
+from src.contact.services import contact_sync
+from src.contact.services.contact_sync import (
+    CONTACT_SYNC_STATES,
+    SyncTokenError,
+    apply_delta,
+    start_sync,
+)
+from src.contact.services.handle_registered_contacts_request import (
+    handle_registered_contacts_request,
+)
+from src.contact.services.process_user_written import process_user_written
+from src.core.utils.firestore_client import get_db
+
+pytestmark = pytest.mark.usefixtures("backend", "query_path")
+
+
+def _phone(number: str) -> dict:
+    return {"isoCode": "KE", "dialCode": "+254", "phoneNumber": number}
+
+
+def _contact(name: str, number: str) -> ContactModel:
+    return ContactModel.from_map({"name": name, "phoneNumbers": [_phone(number)]})
+
+
+def _write_user(backend, user_id: str, number: str) -> None:
+    """
+    Writes a user document and runs its trigger, which records the registry
+    entries delta syncs read.
+    """
+    reference = get_db().collection("users").document(user_id)
+    before = reference.get()
+    backend.firestore.put(
+        f"users/{user_id}", {"id": user_id, "phone": _phone(number), "photo": ""}
+    )
+    process_user_written(user_id, before, reference.get())
+
+
+def _ids(contacts) -> list:
+    return [contact.id for contact in contacts]
+
+
+def test_delta_reports_registrations_and_unregistrations(backend):
+    result = start_sync(
+        [_contact("Amina", "0712345678"), _contact("Baraka", "0722000111")]
+    )
+    assert result.registered == []
+
+    _write_user(backend, "u1", "+254712345678")
+    _write_user(backend, "other", "+254733000000")
+
+    delta = apply_delta(result.sync_token, [], [])
+    assert _ids(delta.registered) == ["u1"]
+    assert delta.unregistered == []
+    assert delta.sync_token != result.sync_token
+
+    _write_user(backend, "u1", "+254799999999")
+
+    delta = apply_delta(delta.sync_token, [], [])
+    assert delta.registered == []
+    assert _ids(delta.unregistered) == ["u1"]
+
+
+def test_delta_matches_added_contacts_and_forgets_removed_ones(backend):
+    _write_user(backend, "u1", "+254712345678")
+    _write_user(backend, "u2", "+254722000111")
+    amina = _contact("Amina", "0712345678")
+
+    result = start_sync([amina])
+    assert _ids(result.registered) == ["u1"]
+
+    delta = apply_delta(result.sync_token, [_contact("Baraka", "0722000111")], [amina])
+    assert _ids(delta.registered) == ["u2"]
+
+    # No longer in the address book, so its changes are not reported
+    _write_user(backend, "u1", "+254799999999")
+    delta = apply_delta(delta.sync_token, [], [])
+    assert delta.registered == []
+    assert delta.unregistered == []
+
+
+def test_delta_reads_one_query_of_changes_since_the_token(backend):
+    result = start_sync([_contact("Amina", "0712345678")])
+    for index in range(20):
+        _write_user(backend, f"other{index}", f"+25473300{index:04d}")
+
+    backend.counter.reset()
+    apply_delta(result.sync_token, [], [])
+
+    counts = backend.counter.snapshot()
+    assert counts["queries"] == 1
+    # The state document plus the 20 entries, however large the address book
+    assert counts["reads"] == 21
+
+
+def test_token_with_too_many_changes_needs_a_full_sync(backend, monkeypatch):
+    monkeypatch.setattr(contact_sync, "MAX_DELTA_CHANGES", 5)
+    result = start_sync([_contact("Amina", "0712345678")])
+    for index in range(6):
+        _write_user(backend, f"other{index}", f"+25473300{index:04d}")
+
+    backend.counter.reset()
+    with pytest.raises(SyncTokenError):
+        apply_delta(result.sync_token, [], [])
+
+    assert backend.counter.snapshot()["reads"] == 7
+
+
+def test_reused_token_is_rejected_with_409(app):
+    result = start_sync([_contact("Amina", "0712345678")])
+    body = {"data": {"syncToken": result.sync_token, "added": [], "removed": []}}
+
+    with app.test_request_context("/", method="POST", json=body):
+        first = handle_registered_contacts_request(request)
+    with app.test_request_context("/", method="POST", json=body):
+        reused = handle_registered_contacts_request(request)
+
+    assert first.status_code == 200
+    assert reused.status_code == 409
+    assert reused.get_json()["data"]["resyncRequired"] is True
+
+
+def test_expired_state_is_rejected():
+    result = start_sync([_contact("Amina", "0712345678")])
+    state_id = result.sync_token.rsplit(".", 1)[0]
+    get_db().collection(CONTACT_SYNC_STATES).document(state_id).update(
+        {"expireAt": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+
+    with pytest.raises(SyncTokenError):
+        apply_delta(result.sync_token, [], [])
+
+
+def test_state_without_expiry_is_rejected():
+    result = start_sync([_contact("Amina", "0712345678")])
+    state_id = result.sync_token.rsplit(".", 1)[0]
+    state_ref = get_db().collection(CONTACT_SYNC_STATES).document(state_id)
+    state = state_ref.get().to_dict()
+    del state["expireAt"]
+    state_ref.set(state)
+
+    with pytest.raises(SyncTokenError):
+        apply_delta(result.sync_token, [], [])
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import pytest
+from src.core.utils.event_loop import get_event_loop, run_coroutine
+from src.core.utils.tracing import current_trace, record_reads, trace
+
+
+def test_returns_the_coroutine_result():
+    async def add(a, b):
+        await asyncio.sleep(0)
+        return a + b
+
+    assert run_coroutine(add(1, 2)) == 3
+
+
+def test_exceptions_reach_the_caller():
+    async def fail():
+        raise ValueError("bad value")
+
+    with pytest.raises(ValueError, match="bad value"):
+        run_coroutine(fail())
+
+
+def test_coroutine_sees_the_callers_trace():
+    async def work():
+        record_reads(4)
+        return current_trace()
+
+    with trace("sync") as current:
+        assert run_coroutine(work()) is current
+
+    assert current.reads == 4
+
+
+def test_timeout_cancels_the_coroutine():
+    cancelled = threading.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        run_coroutine(hang(), timeout=0.05)
+
+    assert cancelled.wait(2.0)
+
+
+def test_loop_is_shared_and_keeps_running_after_a_timeout():
+    async def hang():
+        await asyncio.sleep(10)
+
+    with pytest.raises(TimeoutError):
+        run_coroutine(hang(), timeout=0.01)
+
+    async def loop():
+        return asyncio.get_running_loop()
+
+    assert run_coroutine(loop()) is get_event_loop()
+    assert get_event_loop().is_running()
+
+
+def test_callers_on_several_threads_run_concurrently():
+    started = []
+    release = asyncio.Event()
+    results = []
+
+    async def wait_for_all(index):
+        started.append(index)
+        if len(started) == 4:
+            release.set()
+        await release.wait()
+        return index
+
+    threads = [
+        threading.Thread(
+            target=lambda index=index: results.append(
+                run_coroutine(wait_for_all(index), timeout=2.0)
+            )
+        )
+        for index in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [0, 1, 2, 3]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from src.message.services.message_history import (
+    CursorError,
+    decode_cursor,
+    encode_cursor,
+    get_message_history,
+)
+
+_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _seed(backend, times) -> None:
+    for index, time_sent in enumerate(times):
+        backend.firestore.put(
+            f"users/alice/chats/bob/messages/m{index:03d}",
+            {
+                "text": f"Message {index}",
+                "id": f"m{index:03d}",
+                "sender": "alice",
+                "receiver": "bob",
+                "status": "sent",
+                "timeSent": time_sent,
+                "type": "text",
+            },
+        )
+
+
+def _all_pages(page_size: int) -> list:
+    pages = []
+    cursor = None
+    while True:
+        page = get_message_history("alice", "bob", page_size, cursor)
+        pages.append([message["id"] for message in page.messages])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_pages_split_equal_timestamps_without_gaps_or_repeats(backend):
+    # Ten messages, in groups of three sharing a timestamp
+    _seed(backend, [_START + timedelta(seconds=index // 3) for index in range(10)])
+
+    pages = _all_pages(page_size=4)
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    ids = [message_id for page in pages for message_id in page]
+    # Newest first, ties broken by descending id
+    assert ids == [f"m{index:03d}" for index in reversed(range(10))]
+
+
+def test_every_message_sharing_one_timestamp(backend):
+    _seed(backend, [_START] * 7)
+
+    pages = _all_pages(page_size=3)
+
+    ids = [message_id for page in pages for message_id in page]
+    assert ids == [f"m{index:03d}" for index in reversed(range(7))]
+
+
+def test_full_last_page_is_followed_by_an_empty_one(backend):
+    _seed(backend, [_START + timedelta(seconds=index) for index in range(4)])
+
+    assert _all_pages(page_size=2) == [["m003", "m002"], ["m001", "m000"], []]
+
+
+def test_cursor_round_trips_to_the_microsecond():
+    time_sent = _START + timedelta(microseconds=123457)
+
+    assert decode_cursor(encode_cursor(time_sent, "m001")) == (time_sent, "m001")
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", encode_cursor(_START, "")])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(CursorError):
+        decode_cursor(cursor)
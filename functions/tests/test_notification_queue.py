@@ -0,0 +1,176 @@
+import ast
+import threading
+import time
+import pytest
+from firebase_admin import functions
+from src.message.models.message import MessageStatus, TextMessage
+from src.message.services import notification_queue
+from src.message.services.notification_queue import (
+    NOTIFICATION_QUEUE,
+    enqueue_notification,
+    flush_notification_queue,
+)
+from src.message.services.notification_scheduler import (
+    CloudTasksScheduler,
+    LocalTimerScheduler,
+    set_scheduler,
+)
+
+
+class RecordingScheduler:
+    """
+    Records scheduled flushes instead of running them.
+    """
+
+    def __init__(self, error: Exception = None):
+        self.scheduled = []
+        self.error = error
+
+    def schedule(self, queue_id: str, delay_seconds: float) -> None:
+        if self.error is not None:
+            raise self.error
+        self.scheduled.append((queue_id, delay_seconds))
+
+
+@pytest.fixture
+def scheduler(backend, monkeypatch):
+    monkeypatch.setattr(notification_queue, "COALESCE_WINDOW_SECONDS", 2.5)
+    scheduler = RecordingScheduler()
+    set_scheduler(scheduler)
+    backend.firestore.put(
+        "users/alice", {"id": "alice", "phone": {"phoneNumber": "+254712345678"}}
+    )
+    backend.firestore.put("users/bob", {"id": "bob", "tokens": ["bob-token"]})
+    yield scheduler
+    set_scheduler(None)
+
+
+def _notification(sent) -> dict:
+    """
+    Decodes the fields notify_receiver nests under the "data" key, which
+    send_notifications passes to FCM as a string.
+    """
+    [(token, data)] = sent
+    assert token == "bob-token"
+    return ast.literal_eval(data["data"])
+
+
+def _message(message_id: str, text: str = "Habari") -> TextMessage:
+    return TextMessage(
+        text=text,
+        id=message_id,
+        sender="alice",
+        receiver="bob",
+        status=MessageStatus.sent,
+        time_sent=None,
+    )
+
+
+def test_messages_in_a_window_share_one_flush(backend, scheduler):
+    for index in range(3):
+        enqueue_notification(_message(f"m{index}", f"Message {index}"))
+
+    assert scheduler.scheduled == [("alice_bob", 2.5)]
+    queued = backend.firestore.dump(NOTIFICATION_QUEUE)["alice_bob"]
+    assert queued["count"] == 3
+    assert queued["latestMessageId"] == "m2"
+    assert queued["latestText"] == "Message 2"
+    assert "expireAt" in queued
+    assert backend.messaging.sent == []
+
+
+def test_flush_sends_one_notification_for_the_window(backend, scheduler):
+    for index in range(3):
+        enqueue_notification(_message(f"m{index}", f"Message {index}"))
+
+    assert flush_notification_queue("alice_bob")
+
+    assert backend.firestore.dump(NOTIFICATION_QUEUE) == {}
+    data = _notification(backend.messaging.sent)
+    assert data["message_count"] == "3"
+    assert data["message_id"] == "m2"
+    assert data["message_text"] == "Message 2"
+
+
+def test_flushing_an_empty_queue_sends_nothing(backend, scheduler):
+    enqueue_notification(_message("m0"))
+    assert flush_notification_queue("alice_bob")
+
+    assert not flush_notification_queue("alice_bob")
+    assert len(backend.messaging.sent) == 1
+
+
+def test_message_after_a_flush_starts_a_new_window(backend, scheduler):
+    enqueue_notification(_message("m0"))
+    flush_notification_queue("alice_bob")
+
+    enqueue_notification(_message("m1"))
+
+    assert scheduler.scheduled == [("alice_bob", 2.5), ("alice_bob", 2.5)]
+    assert backend.firestore.dump(NOTIFICATION_QUEUE)["alice_bob"]["count"] == 1
+
+
+def test_failed_schedule_flushes_immediately(backend, scheduler):
+    scheduler.error = RuntimeError("Cloud Tasks unavailable")
+
+    enqueue_notification(_message("m0"))
+
+    assert backend.firestore.dump(NOTIFICATION_QUEUE) == {}
+    data = _notification(backend.messaging.sent)
+    assert data["message_count"] == "1"
+
+
+class _RecordingTaskQueue:
+    def __init__(self):
+        self.tasks = []
+
+    def enqueue(self, task_data, opts=None):
+        self.tasks.append((task_data, opts))
+
+
+@pytest.mark.parametrize(
+    "delay_seconds, expected", [(2.5, 3), (0.2, 1), (5, 5), (0, 0), (-1.5, 0)]
+)
+def test_cloud_tasks_delay_rounds_up(monkeypatch, delay_seconds, expected):
+    task_queue = _RecordingTaskQueue()
+    monkeypatch.setattr(functions, "task_queue", lambda name: task_queue)
+
+    CloudTasksScheduler().schedule("alice_bob", delay_seconds)
+
+    [(task_data, opts)] = task_queue.tasks
+    assert task_data == {"queueId": "alice_bob"}
+    assert opts.schedule_delay_seconds == expected
+
+
+def test_local_timer_flushes_after_the_delay():
+    flushed = []
+    done = threading.Event()
+
+    def flush(queue_id):
+        flushed.append(queue_id)
+        done.set()
+
+    scheduler = LocalTimerScheduler(flush)
+    scheduler.schedule("alice_bob", 0.2)
+    assert scheduler.pending() == 1
+
+    assert done.wait(2.0)
+    assert flushed == ["alice_bob"]
+    assert scheduler.pending() == 0
+
+
+def test_local_timer_flushes_the_notification_queue(backend, scheduler, monkeypatch):
+    monkeypatch.setattr(notification_queue, "COALESCE_WINDOW_SECONDS", 0.05)
+    local = LocalTimerScheduler()
+    set_scheduler(local)
+
+    enqueue_notification(_message("m0"))
+    enqueue_notification(_message("m1"))
+    for _ in range(200):
+        if not local.pending() and backend.messaging.sent:
+            break
+        time.sleep(0.01)
+
+    data = _notification(backend.messaging.sent)
+    assert data["message_count"] == "2"
+    assert backend.firestore.dump(NOTIFICATION_QUEUE) == {}
@@ -0,0 +1,46 @@
+import pytest
+from src.core.models.phone_model import Phone
+from src.core.utils.phone_normalizer import match_keys, normalize_phone_number
+
+
+@pytest.mark.parametrize(
+    "phone_number, dial_code, expected",
+    [
+        ("0712 345-678", "+254", "254712345678"),
+        ("712345678", "+254", "254712345678"),
+        ("254712345678", "+254", "254712345678"),
+        ("+254 712 345 678", "+1", "254712345678"),
+        ("00254712345678", "+1", "254712345678"),
+        ("712345678", "", "712345678"),
+    ],
+)
+def test_normalizes_to_e164_digits(phone_number, dial_code, expected):
+    assert normalize_phone_number(phone_number, dial_code) == expected
+
+
+def test_fifteen_digits_is_the_longest_accepted():
+    assert normalize_phone_number("+123456789012345") == "123456789012345"
+    assert normalize_phone_number("+1234567890123456") == ""
+
+
+@pytest.mark.parametrize(
+    "phone_number, dial_code",
+    [
+        ("7" * 5000, "+254"),
+        ("+" + "9" * 16, ""),
+        ("71234567890123", "+254"),
+        ("", "+254"),
+        ("not a number", "+254"),
+        ("+-() ", ""),
+        (None, "+254"),
+    ],
+)
+def test_oversized_and_garbage_numbers_have_no_keys(phone_number, dial_code):
+    assert match_keys(phone_number, dial_code) == ("", None, None)
+
+
+def test_oversized_number_builds_a_phone_that_never_matches():
+    phone = Phone.from_map({"phoneNumber": "7" * 5000, "dialCode": "+254"})
+
+    assert phone.full_key is None
+    assert phone.suffix_key is None
@@ -0,0 +1,168 @@
+from datetime import datetime, timezone
+import pytest
+from src.contact.services.phone_matcher import PhoneMatcher
+from src.contact.services.phone_snapshot import (
+    PhoneSnapshot,
+    SnapshotError,
+    build_snapshot,
+)
+from src.contact.services.registered_snapshot import SnapshotMatcher
+from src.core.models.phone_model import Phone
+from src.core.models.user_model import UserModel
+
+CREATED_AT = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def _phone(number: str, dial_code: str = "+254") -> Phone:
+    return Phone(iso_code="KE", dial_code=dial_code, phone_number=number)
+
+
+def _user(user_id: str, number: str, photo: str = "") -> UserModel:
+    return UserModel(id=user_id, phone=_phone(number), photo=photo, tokens=[])
+
+
+def _snapshot(users) -> PhoneSnapshot:
+    return PhoneSnapshot(build_snapshot(users, CREATED_AT))
+
+
+def test_round_trips_users_and_creation_time():
+    snapshot = _snapshot(
+        [
+            _user("a", "+254712345678", "https://example.com/a.jpg"),
+            _user("b", "0722000111"),
+        ]
+    )
+
+    assert len(snapshot) == 2
+    assert snapshot.created_at == CREATED_AT
+
+    user = snapshot.user(0)
+    assert user.id == "a"
+    assert user.photo == "https://example.com/a.jpg"
+    assert user.tokens == []
+    assert user.phone.phone_number == "+254712345678"
+    assert user.phone.dial_code == "+254"
+    assert user.phone.iso_code == "KE"
+
+    match = snapshot.match(_phone("0722000111"))
+    assert match.user.id == "b"
+    assert not match.is_ambiguous
+
+
+def test_records_round_trip_through_a_mapped_file(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(build_snapshot([_user("a", "0712345678")], CREATED_AT))
+
+    snapshot = PhoneSnapshot.open(str(path))
+
+    assert snapshot.match(_phone("+254712345678")).user.id == "a"
+    assert snapshot.match(_phone("0799999999")) is None
+
+
+def test_ties_keep_document_id_order():
+    # Same last 7 digits under different country codes
+    users = [
+        _user("a", "+1 412 345 678"),
+        _user("b", "0712345678"),
+        _user("c", "+44 812 345 678"),
+    ]
+    snapshot = _snapshot(users)
+
+    match = snapshot.match(_phone("+33 912 345 678"))
+    assert [user.id for user in match.candidates] == ["a", "b", "c"]
+    assert match.user.id == "a"
+
+    # The snapshot resolves ties the way PhoneMatcher does
+    expected = PhoneMatcher(users).match(_phone("+33 912 345 678"))
+    assert match.user.id == expected.user.id
+
+
+def test_exact_match_wins_over_earlier_suffix_matches():
+    snapshot = _snapshot([_user("a", "+1 412 345 678"), _user("b", "0712345678")])
+
+    match = snapshot.match(_phone("+254712345678"))
+
+    assert match.user.id == "b"
+    assert [user.id for user in match.candidates] == ["b"]
+
+
+def test_users_without_a_usable_number_are_stored_but_never_match():
+    snapshot = _snapshot([_user("a", "not a number"), _user("b", "0712345678")])
+
+    assert len(snapshot) == 2
+    assert snapshot.user(0).id == "a"
+    assert snapshot.match(_phone("not a number")) is None
+
+
+def test_empty_snapshot_matches_nothing():
+    snapshot = _snapshot([])
+
+    assert len(snapshot) == 0
+    assert snapshot.match(_phone("0712345678")) is None
+
+
+@pytest.mark.parametrize("keep", [0, 10, 40, -1])
+def test_truncated_snapshot_is_rejected(keep):
+    data = build_snapshot(
+        [_user("a", "0712345678"), _user("b", "0722000111")], CREATED_AT
+    )
+
+    with pytest.raises(SnapshotError, match="truncated"):
+        PhoneSnapshot(data[:keep])
+
+
+def test_wrong_magic_is_rejected():
+    data = build_snapshot([_user("a", "0712345678")], CREATED_AT)
+
+    with pytest.raises(SnapshotError, match="Unsupported"):
+        PhoneSnapshot(b"XXXX" + data[4:])
+
+
+def test_snapshot_matcher_skips_users_changed_since_the_snapshot():
+    snapshot = _snapshot([_user("a", "0712345678"), _user("b", "0712345678")])
+
+    matcher = SnapshotMatcher(snapshot, PhoneMatcher([]), {"a"})
+
+    match = matcher.match(_phone("0712345678"))
+    assert match.user.id == "b"
+    assert [user.id for user in match.candidates] == ["b"]
+
+
+def test_snapshot_matcher_ignores_users_who_unregistered():
+    snapshot = _snapshot([_user("a", "0712345678")])
+
+    matcher = SnapshotMatcher(snapshot, PhoneMatcher([]), {"a"})
+
+    assert matcher.match(_phone("0712345678")) is None
+
+
+def test_snapshot_matcher_prefers_an_exact_match_in_the_recent_overlay():
+    snapshot = _snapshot([_user("a", "0712345678")])
+    recent = PhoneMatcher([_user("z", "+254712345678")])
+
+    matcher = SnapshotMatcher(snapshot, recent, {"z"})
+
+    match = matcher.match(_phone("0712345678"))
+    assert match.user.id == "z"
+    assert len(matcher) == 2
+
+
+def test_snapshot_matcher_finds_a_moved_user_under_the_new_number():
+    snapshot = _snapshot([_user("a", "0712345678")])
+    recent = PhoneMatcher([_user("a", "0799999999")])
+
+    matcher = SnapshotMatcher(snapshot, recent, {"a"})
+
+    assert matcher.match(_phone("0712345678")) is None
+    assert matcher.match(_phone("0799999999")).user.id == "a"
+
+
+def test_snapshot_matcher_merges_suffix_candidates_from_both():
+    snapshot = _snapshot([_user("a", "+1 412 345 678")])
+    recent = PhoneMatcher([_user("b", "+44 812 345 678")])
+
+    matcher = SnapshotMatcher(snapshot, recent, {"b"})
+
+    match = matcher.match(_phone("+33 912 345 678"))
+    assert match.user.id == "a"
+    assert [user.id for user in match.candidates] == ["a", "b"]
@@ -0,0 +1,67 @@
+from src.message.services.process_message_created import process_message_created
+from src.message.services.processed_messages import PROCESSED_MESSAGES
+from src.message.services.processed_messages import _recent as recent_messages
+
+
+def _send(backend, message_id: str = "m1") -> tuple:
+    """
+    Seeds two users and the sender's copy of a message, as it is when the
+    created trigger fires. Returns the trigger's params and document data.
+    """
+    for user_id in ("alice", "bob"):
+        backend.firestore.put(
+            f"users/{user_id}",
+            {"id": user_id, "phone": {}, "photo": "", "tokens": [f"{user_id}-token"]},
+        )
+    data = {
+        "text": "Habari",
+        "id": message_id,
+        "sender": "alice",
+        "receiver": "bob",
+        "status": "none",
+        "timeSent": None,
+        "type": "text",
+    }
+    backend.firestore.put(f"users/alice/chats/bob/messages/{message_id}", data)
+    params = {"user_id": "alice", "chat_id": "bob", "message_id": message_id}
+    return params, data
+
+
+def test_message_is_delivered_once(backend):
+    params, data = _send(backend)
+
+    process_message_created(params, dict(data), event_id="event-1")
+
+    receiver_copy = backend.firestore.dump("users/bob/chats/alice/messages")["m1"]
+    assert receiver_copy["status"] == "sent"
+    sender_copy = backend.firestore.dump("users/alice/chats/bob/messages")["m1"]
+    assert sender_copy["status"] == "sent"
+    assert list(backend.firestore.dump(PROCESSED_MESSAGES)) == ["alice_bob_m1"]
+    assert [token for token, _ in backend.messaging.sent] == ["bob-token"]
+    assert backend.firestore.dump("users/alice/chats")["bob"]["chatId"] == "bob"
+    assert backend.firestore.dump("users/bob/chats")["alice"]["chatId"] == "alice"
+
+
+def test_redelivered_event_on_same_instance_is_skipped(backend):
+    params, data = _send(backend)
+    process_message_created(params, dict(data), event_id="event-1")
+
+    backend.counter.reset()
+    process_message_created(params, dict(data), event_id="event-1")
+
+    # Rejected by the in-process record before any Firestore call
+    assert backend.counter.snapshot() == {}
+    assert len(backend.messaging.sent) == 1
+
+
+def test_redelivered_event_on_another_instance_is_skipped(backend):
+    params, data = _send(backend)
+    process_message_created(params, dict(data), event_id="event-1")
+
+    # A fresh instance has no in-process record, so the marker decides
+    recent_messages.clear()
+    process_message_created(params, dict(data), event_id="event-1")
+
+    assert len(backend.messaging.sent) == 1
+    summary = backend.firestore.dump("users/bob/chats")["alice"]
+    assert summary["unreadCount"] == 1
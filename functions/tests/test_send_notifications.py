@@ -0,0 +1,208 @@
+import pytest
+from firebase_admin import exceptions
+from src.message.services import send_notification
+from src.message.services.send_notification import (
+    FCM_MAX_TOKENS,
+    MAX_SEND_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    SEND_DEADLINE_SECONDS,
+    send_notifications,
+)
+from src.message.services.token_cache import cache_tokens, get_cached_tokens
+
+PAYLOAD = {"type": "message", "sender": "alice", "photo": None}
+
+
+class FakeClock:
+    """
+    Stands in for the time and random modules of send_notification: sleeps
+    advance the clock instead of waiting, and every backoff takes its full
+    jitter range, which is recorded.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self.jitter_ranges = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def uniform(self, low: float, high: float) -> float:
+        self.jitter_ranges.append((low, high))
+        return high
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(send_notification, "time", clock)
+    monkeypatch.setattr(send_notification, "random", clock)
+    return clock
+
+
+def _record_batches(backend, on_send=None) -> list:
+    """
+    Wraps the fake FCM client and returns the list of token lists sent in
+    each multicast call.
+    """
+    batches = []
+    send = backend.messaging.send_each_for_multicast
+
+    def recording_send(message, dry_run=False):
+        batches.append(list(message.tokens))
+        if on_send is not None:
+            on_send()
+        return send(message, dry_run)
+
+    backend.messaging.send_each_for_multicast = recording_send
+    return batches
+
+
+def _by_token(outcome) -> dict:
+    return {token_outcome.token: token_outcome for token_outcome in outcome.outcomes}
+
+
+def test_tokens_are_sent_in_chunks_of_at_most_500(backend, clock):
+    tokens = [f"token-{index}" for index in range(2 * FCM_MAX_TOKENS + 201)]
+    batches = _record_batches(backend)
+
+    outcome = send_notifications(tokens, PAYLOAD)
+
+    assert sorted(len(batch) for batch in batches) == [201, 500, 500]
+    assert sorted(token for batch in batches for token in batch) == sorted(tokens)
+    assert outcome.success_count == len(tokens)
+    assert [token_outcome.token for token_outcome in outcome.outcomes] == tokens
+    assert clock.sleeps == []
+
+
+def test_payload_values_are_sent_as_strings(backend, clock):
+    send_notifications(["t1"], {"count": 3, "photo": None})
+
+    assert backend.messaging.sent == [("t1", {"count": "3", "photo": ""})]
+
+
+def test_unavailable_tokens_are_retried_with_jittered_backoff(backend, clock):
+    backend.messaging.fail_token(
+        "t1", exceptions.UnavailableError("Unavailable"), times=2
+    )
+    batches = _record_batches(backend)
+
+    outcome = send_notifications(["t1", "t2"], PAYLOAD)
+
+    assert batches == [["t1", "t2"], ["t1"], ["t1"]]
+    outcomes = _by_token(outcome)
+    assert outcomes["t1"].delivered
+    assert outcomes["t1"].attempts == 3
+    assert outcomes["t2"].attempts == 1
+    assert outcome.failure_count == 0
+    assert clock.jitter_ranges == [
+        (0, RETRY_BASE_DELAY * 2),
+        (0, RETRY_BASE_DELAY * 4),
+    ]
+
+
+def test_failed_request_is_retried_for_every_token(backend, clock):
+    backend.faults.fail_next("send", exceptions.InternalError("Internal"))
+    batches = _record_batches(backend)
+
+    outcome = send_notifications(["t1", "t2"], PAYLOAD)
+
+    assert batches == [["t1", "t2"], ["t1", "t2"]]
+    assert outcome.success_count == 2
+    assert all(token_outcome.attempts == 2 for token_outcome in outcome.outcomes)
+
+
+def test_retries_stop_after_the_last_attempt(backend, clock):
+    backend.messaging.fail_token(
+        "t1", exceptions.UnavailableError("Unavailable"), times=10
+    )
+
+    outcome = send_notifications(["t1"], PAYLOAD, user_id="alice")
+
+    token_outcome = outcome.outcomes[0]
+    assert token_outcome.attempts == MAX_SEND_ATTEMPTS
+    assert token_outcome.retryable
+    assert outcome.undelivered_tokens == ["t1"]
+    assert outcome.dead_tokens == []
+    assert len(clock.sleeps) == MAX_SEND_ATTEMPTS - 1
+
+
+def test_no_retry_starts_after_the_deadline(backend, clock):
+    backend.messaging.fail_token(
+        "t1", exceptions.UnavailableError("Unavailable"), times=10
+    )
+
+    # Each call takes most of the deadline, so only the first retry fits
+    def slow_send():
+        clock.now += SEND_DEADLINE_SECONDS * 2 / 3
+
+    batches = _record_batches(backend, on_send=slow_send)
+
+    outcome = send_notifications(["t1"], PAYLOAD)
+
+    assert len(batches) == 2
+    assert outcome.outcomes[0].attempts == 2
+    assert outcome.undelivered_tokens == ["t1"]
+
+
+def test_non_retryable_errors_are_not_retried(backend, clock):
+    backend.messaging.fail_token(
+        "t1", exceptions.PermissionDeniedError("Sender id mismatch")
+    )
+    batches = _record_batches(backend)
+
+    outcome = send_notifications(["t1", "t2"], PAYLOAD, user_id="alice")
+
+    assert batches == [["t1", "t2"]]
+    outcomes = _by_token(outcome)
+    assert outcomes["t1"].attempts == 1
+    assert not outcomes["t1"].retryable
+    assert outcome.undelivered_tokens == ["t1"]
+    assert outcome.dead_tokens == []
+    assert clock.sleeps == []
+
+
+def test_dead_tokens_are_pruned_from_the_user(backend, clock):
+    backend.firestore.put("users/alice", {"id": "alice", "tokens": ["t1", "t2", "t3"]})
+    cache_tokens("alice", (["t1", "t2", "t3"], None, None))
+    backend.messaging.unregister("t1")
+    backend.messaging.fail_token(
+        "t2", exceptions.InvalidArgumentError("Invalid registration token")
+    )
+
+    outcome = send_notifications(["t1", "t2", "t3"], PAYLOAD, user_id="alice")
+
+    assert outcome.success_count == 1
+    assert outcome.dead_tokens == ["t1", "t2"]
+    assert outcome.undelivered_tokens == []
+    assert backend.firestore.dump("users")["alice"]["tokens"] == ["t3"]
+    assert get_cached_tokens("alice") is None
+
+
+def test_invalid_argument_on_every_token_prunes_nothing(backend, clock):
+    backend.firestore.put("users/alice", {"id": "alice", "tokens": ["t1", "t2"]})
+    for token in ("t1", "t2"):
+        backend.messaging.fail_token(
+            token, exceptions.InvalidArgumentError("Payload too large")
+        )
+
+    outcome = send_notifications(["t1", "t2"], PAYLOAD, user_id="alice")
+
+    assert outcome.dead_tokens == []
+    assert outcome.undelivered_tokens == ["t1", "t2"]
+    assert backend.firestore.dump("users")["alice"]["tokens"] == ["t1", "t2"]
+
+
+def test_dead_tokens_are_kept_without_a_user(backend, clock):
+    backend.firestore.put("users/alice", {"id": "alice", "tokens": ["t1"]})
+    backend.messaging.unregister("t1")
+
+    outcome = send_notifications(["t1"], PAYLOAD)
+
+    assert outcome.dead_tokens == ["t1"]
+    assert backend.firestore.dump("users")["alice"]["tokens"] == ["t1"]
@@ -0,0 +1,160 @@
+import json
+import pytest
+from flask import request
+from src.contact.services import stream_registered_contacts as streaming
+from src.contact.services.handle_registered_contacts_request import (
+    handle_registered_contacts_request,
+)
+from src.contact.services.process_user_written import process_user_written
+from src.contact.services.stream_registered_contacts import stream_registered_contacts
+from src.core.utils.firestore_client import get_db
+
+pytestmark = pytest.mark.usefixtures("backend", "query_path")
+
+FORMAT_ERROR = {"error": "Invalid contacts data format"}
+
+
+def _phone(number: str) -> dict:
+    return {"isoCode": "KE", "dialCode": "+254", "phoneNumber": number}
+
+
+def _line(name: str, number: str) -> bytes:
+    return json.dumps({"name": name, "phoneNumbers": [_phone(number)]}).encode()
+
+
+def _write_user(backend, user_id: str, number: str) -> None:
+    backend.firestore.put(
+        f"users/{user_id}", {"id": user_id, "phone": _phone(number), "photo": ""}
+    )
+    reference = get_db().collection("users").document(user_id)
+    process_user_written(user_id, None, reference.get())
+
+
+def _decode(output) -> list:
+    return [json.loads(line) for line in b"".join(output).splitlines()]
+
+
+@pytest.fixture
+def chunks(monkeypatch):
+    """
+    Records the size of every chunk matched by the stream.
+    """
+    sizes = []
+    match = streaming.get_registered_contacts
+
+    def recording_match(contacts):
+        sizes.append(len(contacts))
+        return match(contacts)
+
+    monkeypatch.setattr(streaming, "get_registered_contacts", recording_match)
+    return sizes
+
+
+def test_contacts_are_matched_in_chunks(backend, chunks):
+    _write_user(backend, "u1", "0712345678")
+    _write_user(backend, "u4", "0744000444")
+    lines = [
+        _line("Amina", "0712345678"),
+        _line("Baraka", "0722000222"),
+        _line("Chausiku", "0733000333"),
+        _line("Dalila", "0744000444"),
+        _line("Eshe", "0755000555"),
+    ]
+
+    output = _decode(stream_registered_contacts(lines, chunk_size=2))
+
+    assert chunks == [2, 2, 1]
+    assert [(contact["name"], contact["id"]) for contact in output] == [
+        ("Amina", "u1"),
+        ("Dalila", "u4"),
+    ]
+
+
+def test_matches_stream_before_the_body_is_read(backend):
+    _write_user(backend, "u1", "0712345678")
+    consumed = []
+
+    def body():
+        for index in range(10):
+            consumed.append(index)
+            yield _line(f"Contact {index}", f"07{12345678 + index}")
+
+    stream = stream_registered_contacts(body(), chunk_size=2)
+
+    assert json.loads(next(stream))["id"] == "u1"
+    assert consumed == [0, 1]
+
+
+def test_blank_lines_and_strings_of_json_are_accepted(backend, chunks):
+    _write_user(backend, "u1", "0712345678")
+    encoded = json.dumps(_line("Amina", "0712345678").decode())
+    lines = [b"\n", encoded.encode(), "   ", _line("Baraka", "0722000222").decode()]
+
+    output = _decode(stream_registered_contacts(lines))
+
+    assert chunks == [2]
+    assert [contact["id"] for contact in output] == ["u1"]
+
+
+@pytest.mark.parametrize(
+    "bad_line",
+    [
+        b"not json",
+        b'{"name": "Amina",',
+        b"[1, 2]",
+        b"42",
+        b'{"phoneNumbers": 5}',
+        b'{"phoneNumbers": [5]}',
+        b'"{broken"',
+        b'{"name": "\xff"}',
+    ],
+)
+def test_bad_line_ends_the_stream_after_earlier_matches(backend, chunks, bad_line):
+    _write_user(backend, "u1", "0712345678")
+    _write_user(backend, "u3", "0733000333")
+    lines = [
+        _line("Amina", "0712345678"),
+        _line("Baraka", "0722000222"),
+        _line("Chausiku", "0733000333"),
+        bad_line,
+        _line("Dalila", "0712345678"),
+    ]
+
+    output = _decode(stream_registered_contacts(lines, chunk_size=2))
+
+    assert [contact.get("id") for contact in output[:-1]] == ["u1", "u3"]
+    assert output[-1] == FORMAT_ERROR
+    assert chunks == [2, 1]
+
+
+def test_bad_first_line_returns_only_the_error(backend, chunks):
+    output = _decode(stream_registered_contacts([b"not json"]))
+
+    assert output == [FORMAT_ERROR]
+    assert chunks == []
+
+
+def test_unexpected_error_ends_the_stream(backend, monkeypatch):
+    def broken_match(contacts):
+        raise RuntimeError("Firestore is down")
+
+    monkeypatch.setattr(streaming, "get_registered_contacts", broken_match)
+
+    output = _decode(stream_registered_contacts([_line("Amina", "0712345678")]))
+
+    assert output == [{"error": "Internal server error"}]
+
+
+def test_ndjson_request_streams_matches(app, backend):
+    _write_user(backend, "u1", "0712345678")
+    body = b"\n".join([_line("Amina", "0712345678"), _line("Baraka", "0722000222")])
+
+    with app.test_request_context(
+        "/", method="POST", data=body, content_type="application/x-ndjson"
+    ):
+        response = handle_registered_contacts_request(request)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/x-ndjson"
+        output = _decode(response.response)
+
+    assert [(contact["name"], contact["id"]) for contact in output] == [("Amina", "u1")]
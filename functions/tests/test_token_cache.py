@@ -0,0 +1,93 @@
+import pytest
+from cachetools import TTLCache
+from src.message.services import token_cache
+from src.message.services.get_tokens import get_tokens
+from src.message.services.token_cache import (
+    TOKEN_CACHE_MAX_USERS,
+    TOKEN_CACHE_TTL_SECONDS,
+    cache_tokens,
+    evict_tokens,
+    get_cached_tokens,
+)
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def timer(monkeypatch):
+    timer = FakeTimer()
+    cache = TTLCache(
+        maxsize=TOKEN_CACHE_MAX_USERS, ttl=TOKEN_CACHE_TTL_SECONDS, timer=timer
+    )
+    monkeypatch.setattr(token_cache, "_cache", cache)
+    return timer
+
+
+def _set_tokens(backend, tokens) -> None:
+    backend.firestore.put(
+        "users/bob",
+        {"id": "bob", "tokens": tokens, "phone": {"phoneNumber": "+254712345678"}},
+    )
+
+
+def test_tokens_are_read_once_within_the_ttl(backend, timer):
+    _set_tokens(backend, ["t1"])
+
+    assert get_tokens("bob") == (["t1"], "+254712345678", None)
+    _set_tokens(backend, ["t2"])
+    timer.now = TOKEN_CACHE_TTL_SECONDS - 1
+
+    assert get_tokens("bob")[0] == ["t1"]
+    assert backend.counter["gets"] == 1
+
+
+def test_tokens_are_read_again_after_the_ttl(backend, timer):
+    _set_tokens(backend, ["t1"])
+    get_tokens("bob")
+    _set_tokens(backend, ["t2"])
+
+    timer.now = TOKEN_CACHE_TTL_SECONDS + 1
+
+    assert get_cached_tokens("bob") is None
+    assert get_tokens("bob")[0] == ["t2"]
+    assert backend.counter["gets"] == 2
+
+
+def test_missing_users_are_not_cached(backend, timer):
+    assert get_tokens("nobody") == ([], None, None)
+    assert get_cached_tokens("nobody") is None
+
+
+def test_dead_token_evicts_the_entry(timer):
+    cache_tokens("bob", (["t1", "t2"], None, None))
+
+    evict_tokens("bob", ["t2"])
+
+    assert get_cached_tokens("bob") is None
+
+
+def test_unrelated_tokens_keep_the_entry(timer):
+    cache_tokens("bob", (["t1"], None, None))
+    cache_tokens("alice", (["t2"], None, None))
+
+    evict_tokens("bob", ["t2"])
+    evict_tokens("carol", ["t1"])
+
+    assert get_cached_tokens("bob") == (["t1"], None, None)
+    assert get_cached_tokens("alice") == (["t2"], None, None)
+
+
+def test_eviction_check_does_not_extend_the_ttl(timer):
+    cache_tokens("bob", (["t1"], None, None))
+
+    timer.now = TOKEN_CACHE_TTL_SECONDS - 1
+    evict_tokens("bob", ["other"])
+    timer.now = TOKEN_CACHE_TTL_SECONDS + 1
+
+    assert get_cached_tokens("bob") is None
@@ -0,0 +1,203 @@
+import threading
+import pytest
+from src.core.utils import tracing
+from src.core.utils.executor import submit
+from src.core.utils.tracing import (
+    TOTAL_STAGE,
+    Trace,
+    current_trace,
+    histogram_snapshot,
+    record_reads,
+    record_writes,
+    stage,
+    trace,
+    traced,
+)
+
+
+@pytest.fixture
+def histograms(monkeypatch):
+    """
+    Enables histograms with a snapshot every third trace, starting empty.
+    """
+    monkeypatch.setattr(tracing, "HISTOGRAMS_ENABLED", True)
+    monkeypatch.setattr(tracing, "HISTOGRAM_LOG_EVERY", 3)
+    monkeypatch.setattr(tracing, "_traces_since_snapshot", 0)
+    histogram_snapshot(reset=True)
+    yield
+    histogram_snapshot(reset=True)
+
+
+def _summaries(caplog) -> list:
+    return [record.fields for record in caplog.records if hasattr(record, "fields")]
+
+
+def test_stages_and_operations_add_up(caplog):
+    with trace("sync") as current:
+        for _ in range(3):
+            with stage("fetch"):
+                record_reads(2)
+        record_writes()
+        assert current_trace() is current
+
+    assert current_trace() is None
+    assert current.reads == 6
+    assert current.writes == 1
+    assert list(current.stages) == ["fetch"]
+
+    [summary] = _summaries(caplog)
+    assert summary["trace"] == "sync"
+    assert summary["firestoreReads"] == 6
+    assert summary["firestoreWrites"] == 1
+    assert set(summary["stagesMs"]) == {"fetch"}
+
+
+def test_counts_outside_a_trace_are_ignored(caplog):
+    with stage("fetch"):
+        record_reads(5)
+    record_writes(5)
+
+    assert current_trace() is None
+    assert _summaries(caplog) == []
+
+
+def test_pool_tasks_count_against_the_submitting_trace():
+    def work():
+        with stage("query"):
+            record_reads(2)
+        return current_trace()
+
+    with trace("sync") as current:
+        futures = [submit(work) for _ in range(16)]
+        traces = [future.result() for future in futures]
+
+    assert all(task_trace is current for task_trace in traces)
+    assert current.reads == 32
+    assert "query" in current.stages
+
+
+def test_plain_threads_do_not_see_the_trace():
+    seen = []
+
+    def work():
+        seen.append(current_trace())
+        record_reads(10)
+
+    with trace("sync") as current:
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert seen == [None]
+    assert current.reads == 0
+
+
+def test_concurrent_additions_are_not_lost():
+    current = Trace("sync")
+    start = threading.Barrier(8)
+
+    def work():
+        start.wait()
+        for _ in range(1000):
+            current.add_stage("match", 0.5)
+            current.add_ops(reads=1, writes=2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert current.stages == {"match": 4000.0}
+    assert current.reads == 8000
+    assert current.writes == 16000
+
+
+def test_traced_runs_each_call_in_its_own_trace(caplog):
+    @traced("handler")
+    def handler(value):
+        """Handles a value."""
+        record_reads(value)
+        return current_trace()
+
+    first = handler(1)
+    second = handler(2)
+
+    assert first is not second
+    assert (first.reads, second.reads) == (1, 2)
+    assert handler.__doc__ == "Handles a value."
+    assert [summary["firestoreReads"] for summary in _summaries(caplog)] == [1, 2]
+
+
+def test_trace_is_logged_when_the_call_fails(caplog):
+    with pytest.raises(RuntimeError):
+        with trace("sync"):
+            record_reads(3)
+            raise RuntimeError("boom")
+
+    [summary] = _summaries(caplog)
+    assert summary["firestoreReads"] == 3
+
+
+def _finished(name: str, stages: dict, total_ms: float) -> bool:
+    current = Trace(name)
+    for stage_name, elapsed_ms in stages.items():
+        current.add_stage(stage_name, elapsed_ms)
+    return tracing._record_histograms(current, total_ms)
+
+
+@pytest.mark.usefixtures("histograms")
+def test_histograms_bucket_each_stage_and_the_total():
+    for elapsed_ms in (0.5, 3.0, 3.0, 40.0):
+        _finished("sync", {"fetch": elapsed_ms}, elapsed_ms + 1)
+    _finished("sync", {"fetch": 20_000.0}, 20_001.0)
+
+    snapshot = histogram_snapshot()
+
+    fetch = snapshot["sync"]["fetch"]
+    assert fetch["count"] == 5
+    assert fetch["buckets"]["1"] == 1
+    assert fetch["buckets"]["5"] == 2
+    assert fetch["buckets"]["50"] == 1
+    assert fetch["buckets"]["+Inf"] == 1
+    assert fetch["meanMs"] == round((0.5 + 3 + 3 + 40 + 20_000) / 5, 1)
+    assert fetch["p50Ms"] == 5
+    assert fetch["p95Ms"] is None
+    assert snapshot["sync"][TOTAL_STAGE]["count"] == 5
+
+
+@pytest.mark.usefixtures("histograms")
+def test_histograms_are_kept_per_trace_and_can_be_reset():
+    _finished("sync", {"fetch": 1.0}, 2.0)
+    _finished("flush", {"send": 1.0}, 2.0)
+
+    assert set(histogram_snapshot(reset=True)) == {"sync", "flush"}
+    assert histogram_snapshot() == {}
+
+
+@pytest.mark.usefixtures("histograms")
+def test_every_nth_summary_carries_a_snapshot(caplog):
+    for _ in range(4):
+        with trace("sync"):
+            with stage("fetch"):
+                pass
+
+    summaries = _summaries(caplog)
+    assert ["histograms" in summary for summary in summaries] == [
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert summaries[2]["histograms"]["sync"][TOTAL_STAGE]["count"] == 3
+
+
+def test_histograms_are_off_by_default(caplog, monkeypatch):
+    monkeypatch.setattr(tracing, "HISTOGRAMS_ENABLED", False)
+    histogram_snapshot(reset=True)
+
+    with trace("sync"):
+        pass
+
+    assert histogram_snapshot() == {}
+    assert "histograms" not in _summaries(caplog)[0]
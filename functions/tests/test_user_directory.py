@@ -0,0 +1,160 @@
+import time
+import pytest
+from src.contact.models.contact_model import ContactModel
+from src.contact.services import get_registered_contacts as registered_contacts
+from src.contact.services.get_registered_contacts import find_registered_contacts
+from src.contact.services.phone_matcher import PhoneMatcher
+from src.contact.services.process_user_written import process_user_written
+from src.contact.services.user_directory import UserDirectory
+from src.core.models.phone_model import Phone
+from src.core.models.user_model import UserModel
+from src.core.utils.firestore_client import get_db
+
+
+def _phone(number: str) -> dict:
+    return {"isoCode": "KE", "dialCode": "+254", "phoneNumber": number}
+
+
+def _write_user(user_id: str, number: str, **fields) -> None:
+    get_db().collection("users").document(user_id).set(
+        {"id": user_id, "phone": _phone(number), "photo": "", **fields}
+    )
+
+
+def _matched_id(matcher, number: str):
+    match = matcher.match(Phone.from_map(_phone(number)))
+    return match.user.id if match is not None else None
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    """
+    Waits for the listener thread to apply a change.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "listener did not apply the change"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def directory(backend):
+    directory = UserDirectory()
+    yield directory
+    directory.close()
+
+
+def _load(directory) -> PhoneMatcher:
+    directory.get_matcher()
+    assert directory.wait_until_loaded(timeout=2.0)
+    return directory.get_matcher()
+
+
+def test_listener_applies_added_modified_and_removed_users(backend, directory):
+    _write_user("u1", "0712345678")
+    matcher = _load(directory)
+    assert _matched_id(matcher, "0712345678") == "u1"
+
+    _write_user("u2", "0722000111")
+    _wait_for(lambda: _matched_id(matcher, "0722000111") == "u2")
+    assert len(matcher) == 2
+
+    _write_user("u1", "0733000222")
+    _wait_for(lambda: _matched_id(matcher, "0733000222") == "u1")
+    assert _matched_id(matcher, "0712345678") is None
+    assert len(matcher) == 2
+
+    get_db().collection("users").document("u2").delete()
+    _wait_for(lambda: _matched_id(matcher, "0722000111") is None)
+    assert len(matcher) == 1
+    assert directory.get_matcher() is matcher
+
+
+def test_token_updates_leave_the_index_untouched(backend, directory):
+    _write_user("u1", "0712345678")
+    matcher = _load(directory)
+    indexed = matcher.match(Phone.from_map(_phone("0712345678"))).user
+
+    get_db().collection("users").document("u1").update({"tokens": ["t1"]})
+    # A later write shows the token update has been processed
+    _write_user("u2", "0722000111")
+    _wait_for(lambda: _matched_id(matcher, "0722000111") == "u2")
+
+    assert matcher.match(Phone.from_map(_phone("0712345678"))).user is indexed
+
+
+def test_removing_a_user_keeps_others_with_the_same_id(backend, directory):
+    # Documents whose id field is shared, e.g. left over from a migration
+    _write_user("doc-a", "0712345678", id="shared")
+    _write_user("doc-b", "0712345678", id="shared")
+    matcher = _load(directory)
+    assert len(matcher) == 2
+
+    get_db().collection("users").document("doc-a").delete()
+    _wait_for(lambda: len(matcher) == 1)
+
+    assert _matched_id(matcher, "0712345678") == "shared"
+
+
+def test_phone_matcher_removes_only_the_given_entry():
+    first = UserModel.from_map({"id": "u1", "phone": _phone("0712345678")})
+    second = UserModel.from_map({"id": "u1", "phone": _phone("0712345678")})
+    matcher = PhoneMatcher([first, second])
+
+    matcher.remove(first)
+
+    match = matcher.match(Phone.from_map(_phone("0712345678")))
+    assert match.candidates == [second]
+    assert len(matcher) == 1
+
+
+def test_contacts_use_the_query_path_while_the_directory_loads(backend, monkeypatch):
+    monkeypatch.setattr(
+        registered_contacts.registered_snapshot, "get_matcher", lambda: None
+    )
+    directory = UserDirectory()
+    monkeypatch.setattr(registered_contacts, "user_directory", directory)
+    _write_user("u1", "0712345678")
+    # Adds the phone key fields candidate queries look up
+    reference = get_db().collection("users").document("u1")
+    process_user_written("u1", None, reference.get())
+    contacts = [
+        ContactModel.from_map({"name": "Amina", "phoneNumbers": [_phone("0712345678")]})
+    ]
+    backend.faults.latency = {"count": 0.2}
+
+    try:
+        matched = find_registered_contacts(contacts)
+        assert [contact.id for contact in matched] == ["u1"]
+        assert backend.counter["queries"] > 0
+
+        assert directory.wait_until_loaded(timeout=2.0)
+        backend.counter.reset()
+        matched = find_registered_contacts(contacts)
+        assert [contact.id for contact in matched] == ["u1"]
+        assert backend.counter["queries"] == 0
+    finally:
+        directory.close()
+
+
+def test_directory_over_the_limit_is_retried_after_the_ttl(backend):
+    _write_user("u1", "0712345678")
+    _write_user("u2", "0722000111")
+    directory = UserDirectory(ttl_seconds=0.2, max_users=1)
+
+    try:
+        assert directory.get_matcher() is None
+        assert not directory.wait_until_loaded(timeout=2.0)
+
+        # Disabled: no load is started until the TTL passes
+        backend.counter.reset()
+        assert directory.get_matcher() is None
+        assert not directory.wait_until_loaded(timeout=2.0)
+        assert backend.counter["aggregations"] == 0
+
+        get_db().collection("users").document("u2").delete()
+        time.sleep(0.25)
+        directory.get_matcher()
+        assert directory.wait_until_loaded(timeout=2.0)
+        assert _matched_id(directory.get_matcher(), "0712345678") == "u1"
+    finally:
+        directory.close()